@@ -1,7 +1,32 @@
 # app.py - Medical Professional Marketing Strategy Tool
 
 import streamlit as st
+import sys
 import urllib.parse
+import uuid
+
+from catalog import (
+    COMPETITIVE_FACTORS,
+    DIAGNOSTIC_FACILITIES,
+    FOCUS_INDEX,
+    MARKETING_FOCUS_AREAS,
+    MEDICAL_SPECIALTIES,
+    PATIENT_TYPES,
+    PHASE_LABELS,
+    PHASE_MASKS,
+    PRACTICE_INDEX,
+    PRACTICE_TYPES,
+    SPECIALTY_INDEX,
+    STRATEGY_INDEX,
+    YEARS_EXPERIENCE,
+)
+import engine
+import profiler
+import sessions
+
+# The first page only needs the catalogs and wizard state. Charts, NumPy
+# models, templates, exports and the plan store are imported by the
+# functions that use them (benchmarks/bench_startup.py keeps it that way).
 
 # Page configuration
 st.set_page_config(
@@ -11,7 +36,16 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS
+# Render profiling (MARKETING_PROFILE=1 or ?profile=1)
+st.session_state.profiling = profiler.enabled(st.query_params)
+if st.session_state.profiling:
+    profiler.install(st)
+    profiler.start('app')
+
+def timed(name):
+    return profiler.timed(name, when=lambda: st.session_state.get('profiling', False))
+
+# Custom CSS (fragment reruns keep the copy sent by the last full run)
 st.markdown("""
 <style>
     .medical-card {
@@ -59,714 +93,1005 @@ st.markdown("""
     .stProgress > div > div > div > div {
         background-color: #3b82f6;
     }
+    /* Pre-rendered sections (views.py) */
+    .section-box {
+        padding: 1rem;
+        border-radius: 0.5rem;
+        margin: 0.5rem 0 1rem 0;
+    }
+    .section-box h3 {
+        padding: 0;
+        margin: 0;
+    }
+    .section-info { background-color: rgba(28, 131, 225, 0.1); color: rgb(0, 66, 128); }
+    .section-success { background-color: rgba(33, 195, 84, 0.1); color: rgb(23, 114, 51); }
+    .section-warning { background-color: rgba(255, 193, 7, 0.15); color: rgb(146, 108, 5); }
+    .section-grid {
+        display: grid;
+        grid-template-columns: repeat(var(--columns, 2), minmax(0, 1fr));
+        gap: 1rem;
+    }
+    .section-grid.card-details {
+        grid-template-columns: 3fr 1fr;
+    }
+    .metric-label {
+        font-size: 0.875rem;
+        color: rgba(49, 51, 63, 0.6);
+    }
+    .metric-value {
+        font-size: 1.75rem;
+        line-height: 1.3;
+    }
 </style>
 """, unsafe_allow_html=True)
 
 # Initialize session state
+APP_MODES = ["Doctor Marketing Strategy", "Brand Building Activities", "Chain Reports"]
+CHAIN_MODE = APP_MODES[2]
 if 'app_mode' not in st.session_state:
     st.session_state.app_mode = 'Doctor Marketing Strategy'
-if 'step' not in st.session_state:
-    st.session_state.step = 1
-if 'specialty' not in st.session_state:
-    st.session_state.specialty = None
-if 'years_experience' not in st.session_state:
-    st.session_state.years_experience = None
-if 'practice_type' not in st.session_state:
-    st.session_state.practice_type = None
-if 'patient_types' not in st.session_state:
-    st.session_state.patient_types = []
-if 'services_offered' not in st.session_state:
-    st.session_state.services_offered = []
-if 'competitive_positioning' not in st.session_state:
-    st.session_state.competitive_positioning = {}
-if 'marketing_focus' not in st.session_state:
-    st.session_state.marketing_focus = None
-if 'selected_strategies' not in st.session_state:
-    st.session_state.selected_strategies = []
-
-# Data Definitions
-
-# Medical Specialties
-MEDICAL_SPECIALTIES = {
-    'cardiology': {
-        'name': 'Cardiology',
-        'desc': 'Heart and cardiovascular system specialists',
-        'color': '#ef4444',
-        'procedures': ['CAG', 'PTCA', 'Angioplasty', 'Pacemaker', 'Echocardiography'],
-        'marketing_focus': ['Heart health education', 'Preventive cardiology', 'Advanced cardiac care']
-    },
-    'general_practice': {
-        'name': 'General Practice',
-        'desc': 'Primary care and family medicine',
-        'color': '#3b82f6',
-        'procedures': ['General Consultation', 'Health Checkup', 'Vaccination'],
-        'marketing_focus': ['Family health', 'Preventive care', 'Holistic wellness']
-    },
-    'family_medicine': {
-        'name': 'Family Medicine',
-        'desc': 'Comprehensive healthcare for all ages',
-        'color': '#8b5cf6',
-        'procedures': ['Preventive Care', 'Chronic Disease Management', 'Family Planning'],
-        'marketing_focus': ['Multi-generational care', 'Long-term health partnerships', 'Preventive medicine']
-    },
-    'internal_medicine': {
-        'name': 'Internal Medicine',
-        'desc': 'Adult medicine and complex diagnoses',
-        'color': '#10b981',
-        'procedures': ['Diagnostic Procedures', 'Chronic Disease Management', 'Hospital Care'],
-        'marketing_focus': ['Complex case management', 'Adult healthcare', 'Hospital medicine']
-    },
-    'neurology': {
-        'name': 'Neurology',
-        'desc': 'Brain and nervous system disorders',
-        'color': '#f59e0b',
-        'procedures': ['EEG', 'EMG', 'Nerve Conduction Studies', 'Botulinum Toxin Therapy'],
-        'marketing_focus': ['Brain health', 'Neurological disorders', 'Advanced diagnostics']
-    },
-    'gastroenterology': {
-        'name': 'Gastroenterology',
-        'desc': 'Digestive system and gastrointestinal disorders',
-        'color': '#ec4899',
-        'procedures': ['Endoscopy', 'Colonoscopy', 'ERCP', 'Liver Biopsy'],
-        'marketing_focus': ['Digestive health', 'Preventive screening', 'Advanced endoscopy']
-    },
-    'pulmonology': {
-        'name': 'Pulmonology',
-        'desc': 'Respiratory system and lung disorders',
-        'color': '#6366f1',
-        'procedures': ['Bronchoscopy', 'PFT', 'Sleep Studies', 'Thoracentesis'],
-        'marketing_focus': ['Respiratory health', 'Sleep medicine', 'Lung cancer screening']
-    },
-    'orthopedics': {
-        'name': 'Orthopedics',
-        'desc': 'Musculoskeletal system and joints',
-        'color': '#f97316',
-        'procedures': ['Arthroscopy', 'Joint Replacement', 'Fracture Management'],
-        'marketing_focus': ['Joint health', 'Sports medicine', 'Pain management']
-    },
-    'pediatrics': {
-        'name': 'Pediatrics',
-        'desc': 'Healthcare for infants, children, and adolescents',
-        'color': '#06b6d4',
-        'procedures': ['Vaccination', 'Growth Monitoring', 'Developmental Assessment'],
-        'marketing_focus': ['Child health', 'Vaccination awareness', 'Developmental care']
-    },
-    'obstetrics_gynecology': {
-        'name': 'Obstetrics & Gynecology',
-        'desc': "Women's health and reproductive system",
-        'color': '#8b5cf6',
-        'procedures': ['Delivery', 'Pap Smear', 'Hysteroscopy', 'Laparoscopy'],
-        'marketing_focus': ["Women's health", 'Maternal care', 'Reproductive wellness']
-    },
-    'dermatology': {
-        'name': 'Dermatology',
-        'desc': 'Skin, hair, and nail disorders',
-        'color': '#f59e0b',
-        'procedures': ['Skin Biopsy', 'Laser Therapy', 'Chemical Peels', 'Cryotherapy'],
-        'marketing_focus': ['Skin health', 'Cosmetic dermatology', 'Skin cancer prevention']
-    },
-    'psychiatry': {
-        'name': 'Psychiatry',
-        'desc': 'Mental health and behavioral disorders',
-        'color': '#10b981',
-        'procedures': ['Psychotherapy', 'Medication Management', 'ECT'],
-        'marketing_focus': ['Mental wellness', 'Stress management', 'Therapeutic care']
-    }
-}
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+    st.session_state.restore_from_url = True
 
-# Years of Experience
-YEARS_EXPERIENCE = ['0-5 years', '6-10 years', '11-15 years', '16-20 years', '>20 years']
-
-# Practice Types
-PRACTICE_TYPES = {
-    'individual_clinic': {
-        'name': 'Individual Clinic (with basic diagnostics)',
-        'desc': 'Solo practice with basic lab/ECG/PFT facilities',
-        'scale': 'Small',
-        'marketing_needs': 'Local reputation, patient referrals',
-        'marketing_budget': '5-10% of revenue',
-        'team_needs': 'Front desk + basic marketing'
-    },
-    'group_practice': {
-        'name': 'Group Clinical Practice',
-        'desc': 'Partnership with other doctors, shared facilities',
-        'scale': 'Medium',
-        'marketing_needs': 'Group branding, cross-referrals',
-        'marketing_budget': '8-12% of revenue',
-        'team_needs': 'Marketing coordinator + reception'
-    },
-    'nursing_home': {
-        'name': 'Nursing Home/Aged Care Facility',
-        'desc': 'Associated with long-term care facility',
-        'scale': 'Medium',
-        'marketing_needs': 'Family trust, institutional credibility',
-        'marketing_budget': '6-10% of revenue',
-        'team_needs': 'Relationship manager + admin'
-    },
-    'multi_specialty_hospital': {
-        'name': 'Multi-Specialty Hospital',
-        'desc': 'Part of larger hospital with multiple departments',
-        'scale': 'Large',
-        'marketing_needs': 'Hospital reputation, inter-departmental referrals',
-        'marketing_budget': '10-15% of revenue',
-        'team_needs': 'Marketing team + coordinators'
-    },
-    'super_specialty_hospital': {
-        'name': 'Super Specialty Hospital',
-        'desc': 'Advanced specialized care facility',
-        'scale': 'Large',
-        'marketing_needs': 'Expert positioning, complex case referrals',
-        'marketing_budget': '12-18% of revenue',
-        'team_needs': 'Specialized marketing + PR'
-    },
-    'standalone_hospital': {
-        'name': 'Standalone Hospital',
-        'desc': 'Independent hospital with full facilities',
-        'scale': 'Large',
-        'marketing_needs': 'Comprehensive care reputation, emergency services',
-        'marketing_budget': '10-16% of revenue',
-        'team_needs': 'Full marketing department'
-    },
-    'corporate_chain': {
-        'name': 'Corporate Hospital Chain',
-        'desc': 'Part of national/international healthcare chain',
-        'scale': 'Very Large',
-        'marketing_needs': 'Brand association, standardized care reputation',
-        'marketing_budget': '15-20% of revenue',
-        'team_needs': 'Corporate marketing team'
-    }
-}
+# Helper Functions
+def wizard_state():
+    # Wizard answers live in the process-wide registry as a compact
+    # sessions.WizardState, which evicts them when the session goes idle
+    return sessions.registry.get(st.session_state.session_id)
 
-# Patient Types
-PATIENT_TYPES = {
-    'surgical': {
-        'name': 'Surgical Patients',
-        'desc': 'Requiring operative procedures',
-        'services': ['Pre-op Consultation', 'Surgery', 'Post-op Care', 'Follow-up'],
-        'marketing_channels': ['Surgeon referrals', 'Hospital partnerships', 'Specialized websites']
-    },
-    'icu': {
-        'name': 'ICU/Critical Care',
-        'desc': 'Critically ill patients requiring intensive monitoring',
-        'services': ['Critical Care', 'Ventilator Management', 'Hemodynamic Monitoring'],
-        'marketing_channels': ['Hospital referrals', 'Emergency services', 'Ambulance services']
-    },
-    'ward_ipd': {
-        'name': 'Ward IPD',
-        'desc': 'Inpatient department admissions',
-        'services': ['Hospital Admission', 'Daily Rounds', 'Discharge Planning'],
-        'marketing_channels': ['GP referrals', 'Insurance tie-ups', 'Corporate health programs']
-    },
-    'daycare_surgery': {
-        'name': 'Daycare Surgical Procedures',
-        'desc': 'Minor surgeries without overnight stay',
-        'services': ['Minor Surgeries', 'Pain Management', 'Same-day Discharge'],
-        'marketing_channels': ['Direct marketing', 'Online booking', 'Health insurance']
-    },
-    'daycare_medical': {
-        'name': 'Daycare Medical Procedures',
-        'desc': 'Medical procedures without admission',
-        'services': ['Chemotherapy', 'Dialysis', 'Blood Transfusions'],
-        'marketing_channels': ['Specialist referrals', 'Support groups', 'Medical associations']
-    },
-    'specialty_procedures': {
-        'name': 'Specialty Procedures',
-        'desc': 'Advanced specialized interventions',
-        'services': ['CAG', 'PTCA', 'Endoscopy', 'Colonoscopy', 'Advanced Imaging'],
-        'marketing_channels': ['Doctor referrals', 'Academic conferences', 'Research publications']
-    },
-    'opd': {
-        'name': 'OPD/Outpatient',
-        'desc': 'Outpatient consultations and follow-ups',
-        'services': ['Consultations', 'Prescriptions', 'Basic Procedures', 'Follow-ups'],
-        'marketing_channels': ['Online platforms', 'Local advertising', 'Patient referrals']
-    },
-    'emergency': {
-        'name': 'Emergency Care',
-        'desc': 'Acute/urgent medical attention',
-        'services': ['Emergency Consultation', 'Trauma Care', 'Acute Management'],
-        'marketing_channels': ['Ambulance services', 'Hospital networks', 'Community awareness']
-    }
-}
+def current_profile():
+    state = wizard_state()
+    return engine.Profile(
+        specialty=state.specialty,
+        years_experience=state.years_experience,
+        practice_type=state.practice_type,
+        patient_types=state.patient_types,
+        services_offered=state.services_offered,
+        competitive_positioning=state.competitive_positioning,
+        marketing_focus=state.marketing_focus
+    )
 
-# Diagnostic Facilities
-DIAGNOSTIC_FACILITIES = {
-    'ecg': 'ECG Machine',
-    'tmt': 'Treadmill Test (TMT)',
-    'pft': 'Pulmonary Function Test (PFT)',
-    'xray': 'X-ray Facility',
-    'usg': 'Ultrasound (USG)',
-    'lab': 'Basic Laboratory',
-    'advanced_lab': 'Advanced Laboratory',
-    'ct': 'CT Scan',
-    'mri': 'MRI',
-    'endoscopy': 'Endoscopy Unit',
-    'holter': 'Holter Monitoring',
-    'eeg': 'EEG Machine',
-    'emg': 'EMG/NCS'
-}
+def load_strategy_table():
+    import precompute
+    import specialty_rules
 
-# Competitive Positioning Factors
-COMPETITIVE_FACTORS = {
-    'expertise': {
-        'name': 'Clinical Expertise & Outcomes',
-        'aspects': ['Success Rates', 'Complication Rates', 'Patient Recovery'],
-        'improvement_strategies': ['Continuous education', 'Case audits', 'Peer reviews']
-    },
-    'technology': {
-        'name': 'Technology & Equipment',
-        'aspects': ['Latest Equipment', 'Digital Records', 'Telemedicine'],
-        'improvement_strategies': ['Technology upgrades', 'Digital integration', 'Remote monitoring']
-    },
-    'patient_experience': {
-        'name': 'Patient Experience',
-        'aspects': ['Waiting Time', 'Staff Behavior', 'Comfort Facilities'],
-        'improvement_strategies': ['Process optimization', 'Staff training', 'Facility upgrades']
-    },
-    'cost': {
-        'name': 'Cost & Insurance',
-        'aspects': ['Pricing Transparency', 'Insurance Acceptance', 'Payment Options'],
-        'improvement_strategies': ['Insurance partnerships', 'Payment plans', 'Cost breakdowns']
-    },
-    'accessibility': {
-        'name': 'Accessibility',
-        'aspects': ['Location', 'Timings', 'Emergency Availability'],
-        'improvement_strategies': ['Extended hours', 'Multiple locations', 'Emergency services']
-    },
-    'reputation': {
-        'name': 'Reputation & Trust',
-        'aspects': ['Years in Practice', 'Patient Reviews', 'Awards & Recognition'],
-        'improvement_strategies': ['Review management', 'Award applications', 'Testimonial collection']
-    }
-}
+    # Picks up edits to specialty_rules.yaml without a restart
+    specialty_rules.rules.watch()
+    return precompute.current_table()
 
-# Marketing Focus Areas
-MARKETING_FOCUS_AREAS = {
-    'new_patients': {
-        'name': 'Acquiring New Patients',
-        'key_metrics': ['New patient appointments', 'Website inquiries', 'Call volume'],
-        'strategies': ['Digital marketing', 'Health camps', 'Referral programs']
-    },
-    'patient_retention': {
-        'name': 'Retaining Existing Patients',
-        'key_metrics': ['Patient satisfaction', 'Repeat visits', 'Follow-up rate'],
-        'strategies': ['Loyalty programs', 'Patient education', 'Regular follow-ups']
-    },
-    'referral_volume': {
-        'name': 'Increasing Referrals',
-        'key_metrics': ['Referral numbers', 'Referring doctor satisfaction', 'Conversion rate'],
-        'strategies': ['Doctor networking', 'Case discussions', 'Referral incentives']
-    },
-    'premium_services': {
-        'name': 'Premium Service Promotion',
-        'key_metrics': ['Premium service revenue', 'VIP patient count', 'Service utilization'],
-        'strategies': ['Concierge services', 'Health packages', 'Exclusive programs']
-    },
-    'expert_positioning': {
-        'name': 'Expert Positioning in Specialty',
-        'key_metrics': ['Complex cases', 'Research publications', 'Conference invitations'],
-        'strategies': ['Academic publishing', 'Speaking engagements', 'Specialized training']
-    },
-    'institutional_reputation': {
-        'name': 'Building Institutional Reputation',
-        'key_metrics': ['Brand recognition', 'Media mentions', 'Accreditations'],
-        'strategies': ['Quality certifications', 'Community programs', 'Media relations']
-    }
-}
+def rules_version():
+    import specialty_rules
 
-# Brand Building Strategies
-BRAND_STRATEGIES = {
-    'digital_presence': {
-        'name': 'Digital Presence & Online Reputation',
-        'focus': 'Both',
-        'time': 'Short-term',
-        'budget': 'Low-Moderate',
-        'resources': [
-            {'name': 'Professional Website', 'tools': ['WordPress', 'Wix', 'Squarespace'], 'desc': 'Create a professional doctor website', 'cost': '$$'},
-            {'name': 'Social Media Management', 'tools': ['Canva', 'Hootsuite', 'Buffer'], 'desc': 'Regular health content posting', 'cost': '$'},
-            {'name': 'Google My Business', 'tools': ['Google', 'Review management tools'], 'desc': 'Local search optimization', 'cost': 'Free'},
-            {'name': 'Patient Review System', 'tools': ['Practo', 'Lybrate', 'Google Reviews'], 'desc': 'Collect and manage patient reviews', 'cost': '$$'}
-        ]
-    },
-    'content_marketing': {
-        'name': 'Health Content Marketing',
-        'focus': 'Patient Education',
-        'time': 'Medium-term',
-        'budget': 'Moderate',
-        'resources': [
-            {'name': 'Health Blog', 'tools': ['Medium', 'WordPress', 'LinkedIn'], 'desc': 'Regular health articles', 'cost': '$'},
-            {'name': 'Patient Education Videos', 'tools': ['Canva Video', 'InVideo', 'YouTube'], 'desc': 'Educational video content', 'cost': '$$'},
-            {'name': 'Health Newsletters', 'tools': ['Mailchimp', 'ConvertKit', 'Sendinblue'], 'desc': 'Monthly patient newsletters', 'cost': '$'},
-            {'name': 'Infographics', 'tools': ['Canva', 'Visme', 'Adobe Express'], 'desc': 'Visual health information', 'cost': '$'}
-        ]
-    },
-    'patient_relationship': {
-        'name': 'Patient Relationship Management',
-        'focus': 'Patient Retention',
-        'time': 'Long-term',
-        'budget': 'Moderate',
-        'resources': [
-            {'name': 'Appointment System', 'tools': ['Calendly', 'Zocdoc', 'Practo'], 'desc': 'Online appointment booking', 'cost': '$$'},
-            {'name': 'Follow-up Automation', 'tools': ['WhatsApp Business', 'CRM software', 'Excel'], 'desc': 'Automated patient follow-ups', 'cost': '$'},
-            {'name': 'Patient Feedback System', 'tools': ['Google Forms', 'SurveyMonkey', 'Typeform'], 'desc': 'Patient satisfaction surveys', 'cost': 'Free'},
-            {'name': 'Health Records Portal', 'tools': ['Electronic Health Records', 'Patient portals'], 'desc': 'Digital health records access', 'cost': '$$$'}
-        ]
-    },
-    'referral_network': {
-        'name': 'Referral Network Building',
-        'focus': 'Professional',
-        'time': 'Long-term',
-        'budget': 'Moderate',
-        'resources': [
-            {'name': 'Doctor Networking', 'tools': ['LinkedIn', 'Medical conferences', 'Local associations'], 'desc': 'Build professional network', 'cost': '$$'},
-            {'name': 'Hospital Partnerships', 'tools': ['Professional visits', 'Joint workshops', 'Case discussions'], 'desc': 'Institutional referrals', 'cost': '$$'},
-            {'name': 'GP Network Development', 'tools': ['Regular meetings', 'Educational sessions', 'Referral forms'], 'desc': 'Primary care referrals', 'cost': '$'},
-            {'name': 'Specialist Collaboration', 'tools': ['Multi-specialty meetings', 'Joint clinics', 'Teleconsultation'], 'desc': 'Cross-specialty referrals', 'cost': '$$'}
-        ]
-    },
-    'community_outreach': {
-        'name': 'Community Outreach Programs',
-        'focus': 'Community',
-        'time': 'Medium-term',
-        'budget': 'Low-Moderate',
-        'resources': [
-            {'name': 'Health Camps', 'tools': ['Local partnerships', 'Volunteer networks', 'Basic equipment'], 'desc': 'Free health checkup camps', 'cost': '$$'},
-            {'name': 'Public Health Talks', 'tools': ['Schools', 'Corporate offices', 'Community centers'], 'desc': 'Health education sessions', 'cost': '$'},
-            {'name': 'Media Appearances', 'tools': ['Local TV', 'Radio', 'Newspaper columns'], 'desc': 'Health expert appearances', 'cost': 'Free'},
-            {'name': 'Health Awareness Campaigns', 'tools': ['Social media campaigns', 'Posters', 'Brochures'], 'desc': 'Disease awareness programs', 'cost': '$$'}
-        ]
-    },
-    'academic_presence': {
-        'name': 'Academic & Research Presence',
-        'focus': 'Professional Reputation',
-        'time': 'Long-term',
-        'budget': 'High',
-        'resources': [
-            {'name': 'Research Publications', 'tools': ['PubMed journals', 'ResearchGate', 'ORCID'], 'desc': 'Medical research papers', 'cost': '$$$'},
-            {'name': 'Conference Presentations', 'tools': ['Medical conferences', 'Workshops', 'CME programs'], 'desc': 'Present research findings', 'cost': '$$$'},
-            {'name': 'Teaching Appointments', 'tools': ['Medical colleges', 'Training programs', 'Guest lectures'], 'desc': 'Academic teaching roles', 'cost': '$$'},
-            {'name': 'Clinical Trials', 'tools': ['Research institutions', 'Pharma companies', 'Ethics boards'], 'desc': 'Participate in clinical research', 'cost': '$$$$'}
-        ]
-    },
-    'specialized_certifications': {
-        'name': 'Specialized Certifications & Training',
-        'focus': 'Expert Positioning',
-        'time': 'Long-term',
-        'budget': 'High',
-        'resources': [
-            {'name': 'Advanced Certifications', 'tools': ['International boards', 'Specialty certifications', 'Fellowships'], 'desc': 'Advanced qualifications', 'cost': '$$$$'},
-            {'name': 'Skill Workshops', 'tools': ['Medical workshops', 'Hands-on training', 'Simulation labs'], 'desc': 'New procedure training', 'cost': '$$$'},
-            {'name': 'Quality Accreditations', 'tools': ['NABH', 'ISO', 'Hospital standards'], 'desc': 'Clinic/hospital accreditations', 'cost': '$$$$'},
-            {'name': 'International Training', 'tools': ['Overseas fellowships', 'International conferences', 'Global certifications'], 'desc': 'International exposure', 'cost': '$$$$$'}
-        ]
-    },
-    'premium_services': {
-        'name': 'Premium & Concierge Services',
-        'focus': 'High-value Patients',
-        'time': 'Medium-term',
-        'budget': 'High',
-        'resources': [
-            {'name': 'Concierge Medicine', 'tools': ['VIP services', '24/7 availability', 'Home visits'], 'desc': 'Premium practice model', 'cost': '$$$$'},
-            {'name': 'Health Packages', 'tools': ['Comprehensive checkups', 'Preventive packages', 'Corporate health'], 'desc': 'Packaged services', 'cost': '$$'},
-            {'name': 'International Patient Services', 'tools': ['Medical tourism', 'Multilingual staff', 'Travel arrangements'], 'desc': 'International patients', 'cost': '$$$'},
-            {'name': 'Executive Health Programs', 'tools': ['Corporate partnerships', 'Executive checkups', 'Wellness programs'], 'desc': 'Corporate executive health', 'cost': '$$$'}
-        ]
-    }
-}
+    return specialty_rules.rules.digest
+
+def show_rules_error():
+    # specialty_rules is only loaded with the plan table, so the first page
+    # has no rules to check and must not import them
+    specialty_rules = sys.modules.get('specialty_rules')
+    if specialty_rules is not None and specialty_rules.rules.error:
+        st.warning("The last edit to the specialty recommendations was not applied; the previous "
+                   f"recommendations are still in use. {specialty_rules.rules.error}")
+
+# Derived indexes are cached per specialty rules version
+@st.cache_resource(max_entries=2)
+def load_search_index(version):
+    import search
+
+    return search.CatalogSearch(search.catalog_entries())
+
+@st.cache_resource(max_entries=2)
+def load_scenario_index(version):
+    import scenarios
+
+    return scenarios.ScenarioIndex(load_strategy_table())
+
+def current_plan():
+    import precompute
+
+    # One lookup into the precomputed table instead of rebuilding the plan
+    with profiler.section('plan_lookup'):
+        return load_strategy_table()[precompute.profile_code(current_profile())]
 
-# Helper Functions
 def get_experience_based_strategy():
-    experience = st.session_state.years_experience
-    if not experience:
-        return {}
-    
-    strategies = {
-        '0-5 years': {
-            'focus': 'Establishing credibility and building initial patient base',
-            'key_actions': [
-                'Network with senior doctors for referrals',
-                'Build strong online presence with patient reviews',
-                'Offer competitive pricing to attract initial patients',
-                'Participate in local health camps and community events'
-            ],
-            'branding_priorities': ['Professional website', 'Patient testimonials', 'Local SEO'],
-            'budget_allocation': '70% digital marketing, 30% community outreach'
-        },
-        '6-10 years': {
-            'focus': 'Expanding practice and establishing specialization',
-            'key_actions': [
-                'Develop niche specialization within field',
-                'Build systematic referral networks',
-                'Enhance patient experience with technology',
-                'Start academic contributions through publications'
-            ],
-            'branding_priorities': ['Specialization branding', 'Patient referral system', 'Advanced certifications'],
-            'budget_allocation': '50% specialization marketing, 30% patient retention, 20% professional development'
-        },
-        '11-15 years': {
-            'focus': 'Leadership positioning and practice expansion',
-            'key_actions': [
-                'Mentor junior doctors and build team',
-                'Increase academic involvement and speaking engagements',
-                'Diversify practice with premium services',
-                'Develop standardized patient care protocols'
-            ],
-            'branding_priorities': ['Thought leadership', 'Team branding', 'Premium services'],
-            'budget_allocation': '40% team building, 30% premium services, 30% academic presence'
-        },
-        '16-20 years': {
-            'focus': 'Legacy building and practice succession',
-            'key_actions': [
-                'Develop junior partners for practice succession',
-                'Systematize practice operations',
-                'Increase community leadership roles',
-                'Focus on complex and interesting cases'
-            ],
-            'branding_priorities': ['Institutional reputation', 'Succession planning', 'Complex case branding'],
-            'budget_allocation': '50% institutional branding, 30% team development, 20% community impact'
-        },
-        '>20 years': {
-            'focus': 'Thought leadership and lasting legacy',
-            'key_actions': [
-                'Publish expertise through books and papers',
-                'Take industry leadership positions',
-                'Focus on philanthropy and social contribution',
-                'Develop training programs for next generation'
-            ],
-            'branding_priorities': ['Industry influence', 'Philanthropy branding', 'Training center establishment'],
-            'budget_allocation': '40% industry leadership, 30% social impact, 30% training programs'
-        }
-    }
-    return strategies.get(experience, {})
+    return current_plan()['experience']
 
 def get_specialty_based_recommendations():
-    specialty = st.session_state.specialty
-    if not specialty:
-        return {}
-    
-    spec_data = MEDICAL_SPECIALTIES.get(specialty, {})
-    
-    recommendations = {
-        'digital_content_types': [],
-        'networking_groups': [],
-        'patient_education_topics': [],
-        'brand_differentiators': [],
-        'referral_sources': []
-    }
-    
-    if specialty == 'cardiology':
-        recommendations['digital_content_types'] = ['Heart health tips', 'Exercise ECG explanations', 'Cholesterol management videos']
-        recommendations['networking_groups'] = ['Cardiology associations', 'General physicians', 'Hospital ER departments', 'Diabetologists']
-        recommendations['patient_education_topics'] = ['Blood pressure management', 'Heart attack prevention', 'Medication adherence']
-        recommendations['brand_differentiators'] = ['24/7 cardiac emergency access', 'Advanced cardiac imaging', 'Comprehensive rehabilitation']
-        recommendations['referral_sources'] = ['General physicians', 'Diabetologists', 'Corporate wellness programs', 'Fitness centers']
-    
-    elif specialty == 'general_practice':
-        recommendations['digital_content_types'] = ['Seasonal health tips', 'Vaccination schedules', 'Common illness management']
-        recommendations['networking_groups'] = ['Local community groups', 'Schools', 'Corporate HR departments', 'Senior citizen groups']
-        recommendations['patient_education_topics'] = ['Preventive health screenings', 'Lifestyle modifications', 'Mental wellness']
-        recommendations['brand_differentiators'] = ['Family-friendly approach', 'Extended hours', 'Home visits', 'Telemedicine options']
-        recommendations['referral_sources'] = ['Family networks', 'Local businesses', 'Schools', 'Community centers']
-    
-    elif specialty == 'neurology':
-        recommendations['digital_content_types'] = ['Brain health information', 'Migraine management tips', 'Neurological examination explanations']
-        recommendations['networking_groups'] = ['Neurology associations', 'Rehabilitation centers', 'Psychiatrists', 'Physiotherapists']
-        recommendations['patient_education_topics'] = ['Stroke prevention', 'Headache management', 'Sleep disorder information']
-        recommendations['brand_differentiators'] = ['Advanced neurodiagnostics', 'Multidisciplinary approach', 'Research participation']
-        recommendations['referral_sources'] = ['General physicians', 'Physiotherapists', 'Psychiatrists', 'Rehabilitation centers']
-    
-    elif specialty == 'gastroenterology':
-        recommendations['digital_content_types'] = ['Gut health information', 'Dietary recommendations', 'Endoscopy procedure explanations']
-        recommendations['networking_groups'] = ['Gastroenterology societies', 'Nutritionists', 'Oncologists', 'General surgeons']
-        recommendations['patient_education_topics'] = ['Irritable bowel management', 'Liver health', 'Colon cancer screening']
-        recommendations['brand_differentiators'] = ['Advanced endoscopic procedures', 'Motility studies', 'Nutritional counseling']
-        recommendations['referral_sources'] = ['General physicians', 'Oncologists', 'Nutritionists', 'Corporate wellness programs']
-    
-    return recommendations
+    return current_plan()['specialty']
 
 def get_practice_type_recommendations():
-    practice = st.session_state.practice_type
-    if not practice:
-        return {}
+    return current_plan()['practice']
+
+def generate_comprehensive_strategy():
+    return current_plan()['strategy']
+
+def get_recommended_strategies():
+    return current_plan()['recommended']
+
+def calculate_marketing_budget():
+    return current_plan()['budget']
+
+def strategy_matcher():
+    """This session's strategy rule matches, updated for the current answers."""
+    import strategy_rules
+
+    matcher = st.session_state.get('strategy_matcher')
+    if matcher is None:
+        matcher = st.session_state.strategy_matcher = strategy_rules.default_rules().matcher()
+    # Only the facts that changed since the last rerun are matched again
+    with profiler.section('strategy_rules'):
+        matcher.update(strategy_rules.facts(current_profile()))
+    return matcher
+
+# Shareable plans: ?plan=<token> follows the wizard answers so a refresh or a
+# shared link resumes them; ?saved=<id> opens a plan from the local store
+EMPTY_TOKEN = sessions.WizardState().token()
+
+def restore_from_url():
+    if st.query_params.get('job'):
+        st.session_state.chain_job_id = st.query_params['job']
+        st.session_state.app_mode = CHAIN_MODE
+        return
+    saved_id = st.query_params.get('saved')
+    token = st.query_params.get('plan')
+    if saved_id:
+        import store
+
+        token = store.default_store().load(saved_id)
+        if token is None:
+            st.warning("That saved plan could not be found.")
+            return
+    if not token:
+        return
+    try:
+        restored = sessions.WizardState.from_token(token)
+    except ValueError:
+        st.warning("That plan link is invalid; starting a new strategy.")
+        return
+    if restored.is_complete():
+        # Straight to the (cached) Step 6 output
+        restored.step = 6
+    elif restored.step == 6:
+        restored.step = 1
+    if saved_id:
+        st.session_state.saved_plan_id = saved_id
+        st.session_state.saved_token = token
+    sessions.registry.replace(st.session_state.session_id, restored)
+    st.session_state.app_mode = 'Doctor Marketing Strategy'
+
+def sync_plan_url(state):
+    token = state.token()
+    if token == EMPTY_TOKEN:
+        st.query_params.pop('plan', None)
+    elif st.query_params.get('plan') != token:
+        st.query_params['plan'] = token
+    if st.session_state.get('saved_token') != token:
+        st.query_params.pop('saved', None)
+
+if st.session_state.pop('restore_from_url', False):
+    restore_from_url()
+
+# Wizard steps
+def can_proceed():
+    state = wizard_state()
+    step = state.step
+    if step == 1:
+        return bool(state.specialty and state.years_experience)
+    elif step == 2:
+        return bool(state.practice_type)
+    elif step == 3:
+        return state.patients != 0
+    elif step == 4:
+        return state.rated_count() == len(COMPETITIVE_FACTORS)
+    elif step == 5:
+        return bool(state.marketing_focus)
+    return False
+
+def rerun_app_if_navigation_changed():
+    # Steps 2-6 are fragments, so their interactions rerun only the step body.
+    # The Next button lives outside them; rerun the app when it must change.
+    if can_proceed() != st.session_state.nav_ready:
+        st.rerun()
+
+# Step 1: Doctor Profile
+# Not a fragment: both answers are shown in the sidebar, so every click here
+# needs a full rerun anyway. Callbacks update the state before that rerun.
+def select_specialty(key):
+    wizard_state().specialty = key
+
+def select_experience(years):
+    wizard_state().years_experience = years
+
+# The per-specialty button styles all targeted the same selector, so only the
+# last one ever applied; emit that rule once.
+_button_color = list(MEDICAL_SPECIALTIES.values())[-1]['color']
+SPECIALTY_BUTTON_CSS = f"""
+<style>
+    div[data-testid="stButton"] button[data-testid="baseButton-secondary"] {{
+        background-color: {_button_color}20;
+        border-color: {_button_color};
+        color: {_button_color};
+    }}
+</style>
+"""
+
+@timed('step_1')
+def render_step_1():
+    state = wizard_state()
+    st.header("Step 1: Medical Professional Profile")
+    st.markdown("Define your specialty and experience level")
     
-    practice_data = PRACTICE_TYPES.get(practice, {})
+    st.subheader("Medical Specialty")
+    st.markdown(SPECIALTY_BUTTON_CSS, unsafe_allow_html=True)
+    cols = st.columns(3)
+    specialty_keys = SPECIALTY_INDEX.keys
     
-    recommendations = {
-        'marketing_channels': [],
-        'team_structure': [],
-        'technology_needs': [],
-        'partnership_opportunities': []
-    }
+    for i, key in enumerate(specialty_keys):
+        specialty = MEDICAL_SPECIALTIES[key]
+        with cols[i % 3]:
+            st.button(
+                f"**{specialty['name']}**\n\n{specialty['desc']}",
+                key=f"spec_{key}",
+                use_container_width=True,
+                on_click=select_specialty,
+                args=(key,)
+            )
+    
+    show_rules_error()
+    if state.specialty:
+        specialty = MEDICAL_SPECIALTIES[state.specialty]
+        st.success(f"✓ Selected: {specialty['name']}")
+        
+        # Show specialty details
+        with st.expander("Specialty Details", expanded=True):
+            cols = st.columns(2)
+            with cols[0]:
+                st.markdown("**Common Procedures:**")
+                for proc in specialty['procedures']:
+                    st.markdown(f"- {proc}")
+            with cols[1]:
+                st.markdown("**Marketing Focus Areas:**")
+                for focus in specialty['marketing_focus']:
+                    st.markdown(f"- {focus}")
+    
+    st.subheader("Years of Clinical Experience")
+    cols = st.columns(5)
+    for i, years in enumerate(YEARS_EXPERIENCE):
+        with cols[i]:
+            st.button(years, key=f"exp_{years}", use_container_width=True,
+                      on_click=select_experience, args=(years,))
+    
+    if state.years_experience:
+        st.success(f"✓ Selected: {state.years_experience}")
+        exp_strategy = get_experience_based_strategy()
+        if exp_strategy:
+            st.info(f"**Strategy Focus:** {exp_strategy.get('focus', '')}")
+
+
+# Step 2: Practice Setup
+@st.fragment
+@timed('step_2')
+def render_step_2():
+    state = wizard_state()
+    st.header("Step 2: Practice Type & Facilities")
+    st.markdown("Define your practice setup and available facilities")
+    
+    st.subheader("Type of Practice")
+    cols = st.columns(2)
+    practice_keys = list(PRACTICE_TYPES.keys())
     
-    scale = practice_data.get('scale', '')
+    for i, key in enumerate(practice_keys):
+        practice = PRACTICE_TYPES[key]
+        with cols[i % 2]:
+            if st.button(
+                f"**{practice['name']}**\n\n*{practice['desc']}*\n\nScale: {practice['scale']}",
+                key=f"practice_{key}",
+                use_container_width=True
+            ):
+                state.practice_type = key
     
-    if scale == 'Small':
-        recommendations['marketing_channels'] = ['Local SEO', 'Google My Business', 'Community newspapers', 'Local health camps']
-        recommendations['team_structure'] = ['Receptionist with basic marketing skills', 'Part-time social media manager', 'Billing assistant']
-        recommendations['technology_needs'] = ['Basic website', 'Appointment software', 'Electronic medical records', 'Payment gateway']
-        recommendations['partnership_opportunities'] = ['Local pharmacies', 'Gymnasiums', 'Community centers', 'Local corporations']
+    if state.practice_type:
+        practice = PRACTICE_TYPES[state.practice_type]
+        st.success(f"✓ Selected: {practice['name']}")
+        
+        with st.expander("Practice Details", expanded=True):
+            cols = st.columns(2)
+            with cols[0]:
+                st.markdown("**Marketing Needs:**")
+                st.markdown(f"- {practice['marketing_needs']}")
+                st.markdown(f"**Recommended Budget:** {practice['marketing_budget']}")
+            with cols[1]:
+                st.markdown("**Team Requirements:**")
+                st.markdown(f"- {practice['team_needs']}")
     
-    elif scale == 'Medium':
-        recommendations['marketing_channels'] = ['Digital marketing mix', 'Local TV/radio', 'Health magazines', 'Corporate tie-ups']
-        recommendations['team_structure'] = ['Dedicated reception staff', 'Marketing coordinator', 'Patient relationship manager']
-        recommendations['technology_needs'] = ['Advanced website with booking', 'CRM system', 'Telemedicine platform', 'Analytics tools']
-        recommendations['partnership_opportunities'] = ['Insurance companies', 'Corporate HR departments', 'Other specialist clinics', 'Diagnostic centers']
+    st.subheader("Diagnostic Facilities Available")
+    st.markdown("Select all diagnostic facilities in your practice:")
     
-    elif scale == 'Large':
-        recommendations['marketing_channels'] = ['Comprehensive digital strategy', 'TV commercials', 'National publications', 'Medical tourism portals']
-        recommendations['team_structure'] = ['Full marketing team', 'PR manager', 'Digital marketing specialists', 'Patient experience team']
-        recommendations['technology_needs'] = ['Enterprise software', 'Advanced analytics', 'Mobile apps', 'AI integration']
-        recommendations['partnership_opportunities'] = ['International hospitals', 'Medical device companies', 'Research institutions', 'Government programs']
+    cols = st.columns(4)
+    facility_keys = list(DIAGNOSTIC_FACILITIES.keys())
     
-    elif scale == 'Very Large':
-        recommendations['marketing_channels'] = ['Brand campaigns', 'International marketing', 'Research publications', 'Industry conferences']
-        recommendations['team_structure'] = ['Corporate marketing department', 'Brand managers', 'International marketing team', 'Research coordinators']
-        recommendations['technology_needs'] = ['Global systems', 'Advanced data analytics', 'International telemedicine', 'Research databases']
-        recommendations['partnership_opportunities'] = ['Global health organizations', 'International universities', 'Pharmaceutical companies', 'Government health departments']
+    selected_facilities = []
+    for i, key in enumerate(facility_keys):
+        facility = DIAGNOSTIC_FACILITIES[key]
+        with cols[i % 4]:
+            if st.checkbox(facility, key=f"fac_{key}"):
+                selected_facilities.append(key)
     
-    return recommendations
+    if selected_facilities:
+        state.set_services(selected_facilities)
+        st.success(f"✓ Selected {len(selected_facilities)} diagnostic facilities")
+    
+    rerun_app_if_navigation_changed()
 
-def generate_comprehensive_strategy():
-    strategy = {
-        'personal_branding': [],
-        'patient_acquisition': [],
-        'patient_retention': [],
-        'professional_development': [],
-        'reputation_management': [],
-        'financial_planning': []
-    }
+
+# Step 3: Patient Types & Services
+@st.fragment
+@timed('step_3')
+def render_step_3():
+    state = wizard_state()
+    st.header("Step 3: Patient Types & Services Offered")
+    st.markdown("Select the types of patients you treat and services provided")
+    
+    st.subheader("Patient Types")
+    cols = st.columns(2)
+    patient_keys = list(PATIENT_TYPES.keys())
     
-    # Experience-based strategies
-    exp_strategy = get_experience_based_strategy()
-    if exp_strategy:
-        strategy['personal_branding'].extend(exp_strategy.get('branding_priorities', []))
-    
-    # Specialty-based recommendations
-    spec_rec = get_specialty_based_recommendations()
-    if spec_rec:
-        strategy['patient_acquisition'].extend(spec_rec.get('referral_sources', []))
-        strategy['reputation_management'].extend(spec_rec.get('brand_differentiators', []))
-    
-    # Practice type recommendations
-    practice_rec = get_practice_type_recommendations()
-    if practice_rec:
-        strategy['professional_development'].extend(practice_rec.get('technology_needs', []))
-    
-    # Add universal strategies
-    strategy['patient_acquisition'].extend([
-        'Online appointment booking optimization',
-        'Referral incentive program implementation',
-        'Health camp participation strategy',
-        'Corporate health program development'
-    ])
-    
-    strategy['patient_retention'].extend([
-        'Systematic follow-up protocol',
-        'Patient education program development',
-        'Loyalty benefits for returning patients',
-        'Annual health review system'
-    ])
-    
-    strategy['reputation_management'].extend([
-        'Quarterly patient feedback collection',
-        'Online review management system',
-        'Transparent outcome reporting mechanism',
-        'Quality accreditation pursuit'
-    ])
-    
-    strategy['financial_planning'].extend([
-        'Marketing budget allocation planning',
-        'Revenue diversification strategy',
-        'Cost optimization analysis',
-        'ROI tracking system'
-    ])
-    
-    return strategy
+    for i, key in enumerate(patient_keys):
+        patient_type = PATIENT_TYPES[key]
+        with cols[i % 2]:
+            selected = st.checkbox(
+                f"**{patient_type['name']}**\n\n{patient_type['desc']}",
+                key=f"patient_{key}"
+            )
+            state.set_patient(key, selected)
+    
+    if state.patients:
+        st.success(f"✓ Selected {len(state.patient_types)} patient types")
+        
+        # Show services for selected patient types
+        st.subheader("Services Provided")
+        for key in state.patient_types:
+            patient_type = PATIENT_TYPES[key]
+            st.markdown(f"**{patient_type['name']}:**")
+            cols = st.columns(2)
+            with cols[0]:
+                for service in patient_type['services'][:2]:
+                    st.markdown(f"- {service}")
+            with cols[1]:
+                for service in patient_type['services'][2:4]:
+                    st.markdown(f"- {service}")
+    
+    # Additional services
+    st.subheader("Additional Services")
+    additional_services = st.multiselect(
+        "Select additional value-added services:",
+        [
+            'Telemedicine Consultations',
+            'Second Opinion Services',
+            'Home Visits',
+            'Corporate Health Programs',
+            'Medical Tourism Services',
+            'Executive Health Checkups',
+            'Diet & Nutrition Counseling',
+            'Physical Therapy Services',
+            'Psychological Counseling',
+            'Alternative Medicine Options'
+        ]
+    )
+    
+    if additional_services:
+        st.info(f"**Value-Added Services:** {', '.join(additional_services)}")
+    
+    rerun_app_if_navigation_changed()
 
-def get_recommended_strategies():
-    focus = st.session_state.marketing_focus
-    if not focus:
-        return []
+
+# Step 4: Competitive Positioning
+RATING_LABELS = {
+    '1': 'Needs Improvement',
+    '2': 'Average/Competitive',
+    '3': 'Strong Advantage'
+}
+
+# Peer averages come from plans saved for the same specialty, refreshed each minute
+PEER_MIN_PLANS = 3
+
+@st.cache_data(ttl=60, show_spinner=False)
+def peer_averages(specialty):
+    import store
+
+    masks = store.default_store().peer_ratings(specialty)
+    if len(masks) < PEER_MIN_PLANS:
+        return None, len(masks)
+    vectors = [sessions.unpack_ratings(mask) for mask in masks]
+    # Rounded so the memoized radar figures stay few
+    return tuple(round(sum(column) / len(vectors), 1) for column in zip(*vectors)), len(vectors)
+
+def render_positioning_chart(state):
+    import charts
+
+    peers, peer_count = peer_averages(state.specialty) if state.specialty else (None, 0)
+    show_peers = peers is not None and st.checkbox(
+        f"Compare with peer averages ({peer_count} saved plans)", key="peer_overlay"
+    )
+    st.plotly_chart(charts.radar(state.rating_vector(), peers if show_peers else None))
+
+@st.fragment
+@timed('step_4')
+def render_step_4():
+    state = wizard_state()
+    st.header("Step 4: Competitive Positioning Analysis")
+    st.markdown("Rate your competitive advantages in key areas")
     
-    recommendations = []
+    st.info("**Rate each factor (1 = Needs Improvement, 2 = Average, 3 = Strong Advantage)**")
     
-    for key, strategy in BRAND_STRATEGIES.items():
-        score = 0
-        reasoning = ''
+    for key, factor in COMPETITIVE_FACTORS.items():
+        st.subheader(factor['name'])
         
-        if focus == 'new_patients':
-            if strategy['focus'] in ['Both', 'Patient Education']:
-                score = 3
-                reasoning = 'Directly attracts new patients through education and awareness building'
-        elif focus == 'patient_retention':
-            if strategy['name'] == 'Patient Relationship Management':
-                score = 3
-                reasoning = 'Focuses on retaining existing patients through relationship building'
-        elif focus == 'referral_volume':
-            if strategy['name'] == 'Referral Network Building':
-                score = 3
-                reasoning = 'Specifically designed to increase referrals from other professionals'
-        elif focus == 'premium_services':
-            if strategy['name'] == 'Premium & Concierge Services':
-                score = 3
-                reasoning = 'Directly promotes and develops premium service offerings'
-        elif focus == 'expert_positioning':
-            if strategy['name'] in ['Academic & Research Presence', 'Specialized Certifications & Training']:
-                score = 3
-                reasoning = 'Establishes expertise through credentials and research'
-        elif focus == 'institutional_reputation':
-            if strategy['focus'] in ['Professional', 'Community']:
-                score = 3
-                reasoning = 'Builds institutional credibility and community trust'
+        # Show aspects
+        if factor.get('aspects'):
+            st.caption(f"**Key Aspects:** {', '.join(factor['aspects'])}")
         
-        if score > 0:
-            recommendations.append({
-                'name': strategy['name'],
-                'score': score,
-                'reasoning': reasoning,
-                'focus': strategy['focus'],
-                'time': strategy['time'],
-                'budget': strategy['budget'],
-                'resources': strategy['resources']
-            })
-    
-    recommendations.sort(key=lambda x: x['score'], reverse=True)
-    return recommendations[:6]
+        cols = st.columns(3)
+        
+        for rating_num, rating_text in RATING_LABELS.items():
+            col_idx = int(rating_num) - 1
+            with cols[col_idx]:
+                if st.button(
+                    f"{rating_num}: {rating_text}",
+                    key=f"rate_{key}_{rating_num}",
+                    use_container_width=True
+                ):
+                    state.set_rating(key, rating_num)
+        
+        rating = state.rating(key)
+        if rating == '3':
+            st.success(f"✓ Strength: {RATING_LABELS[rating]}")
+        elif rating == '2':
+            st.info(f"✓ Competitive: {RATING_LABELS[rating]}")
+        elif rating == '1':
+            st.warning(f"✓ Area for Improvement: {RATING_LABELS[rating]}")
+    
+    # Show summary
+    if state.ratings:
+        st.markdown("---")
+        st.subheader("Competitive Position Summary")
+        render_positioning_chart(state)
+        
+        strong_areas = [k for k, rating in state.competitive_positioning if rating == '3']
+        weak_areas = [k for k, rating in state.competitive_positioning if rating == '1']
+        
+        cols = st.columns(2)
+        with cols[0]:
+            if strong_areas:
+                st.success("**Your Competitive Strengths:**")
+                for area in strong_areas:
+                    factor = COMPETITIVE_FACTORS[area]
+                    st.markdown(f"- {factor['name']}")
+                    if factor.get('improvement_strategies'):
+                        with st.expander(f"Maintain {factor['name']}"):
+                            for strat in factor['improvement_strategies']:
+                                st.markdown(f"• {strat}")
+        
+        with cols[1]:
+            if weak_areas:
+                st.warning("**Areas for Improvement:**")
+                for area in weak_areas:
+                    factor = COMPETITIVE_FACTORS[area]
+                    st.markdown(f"- {factor['name']}")
+                    if factor.get('improvement_strategies'):
+                        with st.expander(f"Improve {factor['name']}"):
+                            for strat in factor['improvement_strategies']:
+                                st.markdown(f"• {strat}")
+    
+    rerun_app_if_navigation_changed()
 
-def calculate_marketing_budget():
-    practice = st.session_state.practice_type
-    if not practice:
-        return "Not available - select practice type"
+
+# Step 5: Marketing Focus
+@st.fragment
+@timed('step_5')
+def render_step_5():
+    state = wizard_state()
+    st.header("Step 5: Marketing Focus Area")
+    st.markdown("Select your primary marketing objective")
+    
+    st.subheader("What is your main marketing goal?")
+    cols = st.columns(2)
+    focus_keys = FOCUS_INDEX.keys
+    
+    for i, key in enumerate(focus_keys):
+        focus = MARKETING_FOCUS_AREAS[key]
+        with cols[i % 2]:
+            if st.button(
+                f"**{focus['name']}**",
+                key=f"focus_{key}",
+                use_container_width=True,
+                help=f"Key metrics: {', '.join(focus['key_metrics'])}"
+            ):
+                state.marketing_focus = key
+    
+    if state.marketing_focus:
+        focus = MARKETING_FOCUS_AREAS[state.marketing_focus]
+        st.success(f"✓ Selected Focus: {focus['name']}")
+        
+        # Show focus details
+        with st.expander("Focus Area Details", expanded=True):
+            cols = st.columns(3)
+            with cols[0]:
+                st.markdown("**Key Metrics to Track:**")
+                for metric in focus['key_metrics']:
+                    st.markdown(f"- {metric}")
+            with cols[1]:
+                st.markdown("**Recommended Strategies:**")
+                for strategy in focus['strategies']:
+                    st.markdown(f"- {strategy}")
+            with cols[2]:
+                st.markdown("**Expected Outcomes:**")
+                if state.marketing_focus == 'new_patients':
+                    st.markdown("- 20-30% increase in new patients")
+                    st.markdown("- Improved online visibility")
+                    st.markdown("- Better conversion rates")
+                elif state.marketing_focus == 'patient_retention':
+                    st.markdown("- 15-25% increase in repeat visits")
+                    st.markdown("- Higher patient satisfaction")
+                    st.markdown("- Reduced patient churn")
+    
+    rerun_app_if_navigation_changed()
+
+
+# Step 6: Comprehensive Strategy
+@st.fragment
+@timed('step_6')
+def render_step_6():
+    import precompute
+    import views
+
+    state = wizard_state()
+    st.header("Step 6: Complete Marketing Strategy")
+    st.markdown("Your personalized marketing strategy based on all inputs")
+    show_rules_error()
+    
+    # Each section is one pre-rendered HTML payload, cached per plan
+    sections = views.step_6(precompute.profile_code(current_profile()), current_plan())
+    matcher = strategy_matcher()
+    
+    st.success("### 🎯 Your Personalized Medical Practice Marketing Strategy")
+    
+    # Professional Profile Summary
+    st.markdown(sections['summary'], unsafe_allow_html=True)
+    
+    # Experience-based Strategy
+    if sections['experience']:
+        st.markdown(sections['experience'], unsafe_allow_html=True)
+    
+    # Practice Recommendations
+    if sections['practice']:
+        st.markdown(sections['practice'], unsafe_allow_html=True)
+    
+    # What the competitive positioning ratings (and other answers) call for
+    if matcher.firing:
+        st.markdown(views.positioning_priorities(matcher.ruleset, matcher.key()), unsafe_allow_html=True)
     
-    practice_data = PRACTICE_TYPES.get(practice, {})
-    budget_range = practice_data.get('marketing_budget', 'Not specified')
+    # Complete Strategy Framework
+    st.info("### 🎨 Complete Marketing Strategy Framework")
     
-    # Add recommendations based on experience
-    exp_strategy = get_experience_based_strategy()
-    if exp_strategy:
-        budget_allocation = exp_strategy.get('budget_allocation', '')
-        return f"{budget_range} - Allocation: {budget_allocation}"
+    tabs = st.tabs([label for label, _, _ in engine.STRATEGY_TABS])
     
-    return budget_range
+    for tab, html in zip(tabs, sections['tabs']):
+        with tab:
+            st.markdown(html, unsafe_allow_html=True)
+    
+    # Implementation Timeline
+    st.markdown(sections['timeline'], unsafe_allow_html=True)
+    
+    # Action Items
+    st.markdown(sections['actions'], unsafe_allow_html=True)
+    
+    # Budget Projection
+    if state.practice_type and state.years_experience:
+        render_budget_projection()
+    
+    # What-if scenarios
+    if state.specialty and state.marketing_focus:
+        render_scenarios()
+    
+    # Export
+    st.markdown("---")
+    export_cols = st.columns(3)
+    with export_cols[0]:
+        render_pdf_export('strategy')
+    with export_cols[1]:
+        render_docx_export('strategy')
+    with export_cols[2]:
+        render_save_plan()
+    
+    # Link to Brand Building Activities
+    st.markdown("---")
+    st.success("### 🎨 Ready to implement specific strategies?")
+    if st.button("Go to Brand Building Activities →", type="primary", use_container_width=True):
+        st.session_state.app_mode = "Brand Building Activities"
+        st.rerun()
+
+# Budget projection: its own fragment, so editing revenue reruns only the chart.
+# budget.project() memoizes each input combination.
+@st.fragment
+@timed('budget')
+def render_budget_projection():
+    import budget
+    import charts
+
+    state = wizard_state()
+    st.markdown("---")
+    st.info("### 💵 Marketing Budget Projection")
+    
+    cols = st.columns(2)
+    with cols[0]:
+        likely = st.number_input("Expected annual revenue ($)", min_value=0, value=500_000, step=50_000,
+                                 key="budget_revenue")
+    with cols[1]:
+        spread = st.slider("Revenue uncertainty (±%)", 0, 50, 20, step=5, key="budget_spread")
+    
+    revenue = (likely * (1 - spread / 100), float(likely), likely * (1 + spread / 100))
+    result = budget.project(state.practice_type, state.years_experience, revenue)
+    low, high = result['share_range']
+    st.caption(f"{low:.0%}-{high:.0%} of revenue, split by your experience stage; "
+               f"{budget.DEFAULT_SAMPLES:,} simulated years. Boxes span the 25th-75th percentile, whiskers 5th-95th.")
+    st.plotly_chart(charts.budget_projection(result['labels'], result['values']))
+
+# What-if scenarios: every experience band x practice type for this specialty
+# and focus, computed in one vectorized pass (scenarios.ScenarioIndex)
+SCENARIO_PRACTICE_LABELS = tuple(name.split(' (')[0] for name in PRACTICE_INDEX.names)
+
+@st.fragment
+@timed('scenarios')
+def render_scenarios():
+    import budget
+    import charts
+
+    st.markdown("---")
+    if not st.toggle("🔀 What-if scenarios: compare every experience band and practice type", key="scenario_mode"):
+        return
+    
+    grid = load_scenario_index(rules_version()).grid(current_profile())
+    low, high, overlap = grid['share_low'], grid['share_high'], grid['overlap']
+    allocations = [budget.ALLOCATIONS[years] for years in YEARS_EXPERIENCE]
+    
+    budget_tab, overlap_tab = st.tabs(["💰 Budget range", "🔁 Plan overlap"])
+    with budget_tab:
+        st.caption("Marketing budget as a share of revenue; hover for how each experience stage splits it.")
+        st.plotly_chart(charts.heatmap(
+            z=tuple(tuple(round((l + h) * 50, 1) for l, h in zip(lows, highs)) for lows, highs in zip(low, high)),
+            text=tuple(tuple(f"{l:.0%}-{h:.0%}" for l, h in zip(lows, highs)) for lows, highs in zip(low, high)),
+            hover=tuple(
+                tuple(f"{years}, {practice}<br>" + "<br>".join(f"{w:.0%} {label}" for label, w in zip(*allocation))
+                      for practice in SCENARIO_PRACTICE_LABELS)
+                for years, allocation in zip(YEARS_EXPERIENCE, allocations)
+            ),
+            x=SCENARIO_PRACTICE_LABELS, y=YEARS_EXPERIENCE, colorscale='Blues', zmin=0, zmax=20,
+            colorbar_title='% of revenue', current=grid['current']
+        ))
+    with overlap_tab:
+        st.caption("How much of each scenario's plan (strategy, key actions, channels) you already have; outlined: your plan.")
+        st.plotly_chart(charts.heatmap(
+            z=tuple(tuple(round(float(v) * 100) for v in row) for row in overlap),
+            text=tuple(tuple(f"{v:.0%}" for v in row) for row in overlap),
+            hover=tuple(
+                tuple(f"{shared} shared, {added} new actions" for shared, added in zip(shared_row, added_row))
+                for shared_row, added_row in zip(grid['shared'], grid['added'])
+            ),
+            x=SCENARIO_PRACTICE_LABELS, y=YEARS_EXPERIENCE, colorscale='Greens', zmin=0, zmax=100,
+            colorbar_title='Overlap %', current=grid['current']
+        ))
+
+# PDF export: rendered by reports' background pool, cached on disk by plan
+@st.fragment(run_every=1.0)
+def poll_pdf_export(key):
+    import reports
+
+    if reports.status(key) == 'pending':
+        st.caption("⏳ Preparing your PDF…")
+    else:
+        st.rerun()
+
+def render_pdf_export(name):
+    import reports
+
+    state = wizard_state()
+    profile = current_profile()
+    key = reports.report_key(profile, state.selected_strategies)
+    data = reports.cached(key)
+    if data is not None:
+        st.download_button("📄 Download PDF", data, file_name=f"marketing-plan-{state.specialty or 'doctor'}.pdf",
+                           mime="application/pdf", key=f"pdf_download_{name}", use_container_width=True)
+    elif reports.status(key) == 'pending':
+        poll_pdf_export(key)
+    else:
+        if reports.status(key) == 'failed':
+            st.error(f"PDF export failed: {reports.error(key)}")
+        if st.button("📄 Export PDF", key=f"pdf_export_{name}", use_container_width=True):
+            reports.submit_pdf(profile, state.selected_strategies)
+            st.rerun()
+
+# DOCX export: cloned from a preloaded template in milliseconds, so rendered inline
+def render_docx_export(name):
+    import reports
+
+    state = wizard_state()
+    profile = current_profile()
+    data = reports.cached(reports.report_key(profile, state.selected_strategies, 'docx'), 'docx')
+    if data is not None:
+        st.download_button("📝 Download DOCX", data, file_name=f"marketing-plan-{state.specialty or 'doctor'}.docx",
+                           mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                           key=f"docx_download_{name}", use_container_width=True)
+    elif st.button("📝 Export DOCX", key=f"docx_export_{name}", use_container_width=True):
+        reports.docx_report(profile, state.selected_strategies)
+        st.rerun()
+
+STEP_RENDERERS = {
+    1: render_step_1,
+    2: render_step_2,
+    3: render_step_3,
+    4: render_step_4,
+    5: render_step_5,
+    6: render_step_6,
+}
+
+# Saving: the plan token goes into the local SQLite store under a short id
+def render_save_plan():
+    import store
+
+    state = wizard_state()
+    token = state.token()
+    if st.session_state.get('saved_token') == token:
+        query = urllib.parse.urlencode({'saved': st.session_state.saved_plan_id})
+        st.caption(f"💾 Saved. Reopen this plan any time with `?{query}`")
+    elif st.button("💾 Save Plan", key="save_plan", use_container_width=True):
+        name = f"{MEDICAL_SPECIALTIES[state.specialty]['name']} - {MARKETING_FOCUS_AREAS[state.marketing_focus]['name']}"
+        st.session_state.saved_plan_id = store.default_store().save(token, name, state.specialty, state.ratings)
+        st.session_state.saved_token = token
+        st.query_params['saved'] = st.session_state.saved_plan_id
+        st.rerun()
+
+# Chain reports: one document per doctor, rendered by a jobs.py runner
+# process (a process pool cannot be started from this script) and polled
+# here; ?job=<id> keeps a job reachable after a refresh
+JOB_STATE_LABELS = {
+    'queued': "⏳ Starting…",
+    'running': "⚙️ Generating reports…",
+    'done': "✅ Finished",
+    'cancelled': "⏹ Cancelled",
+    'interrupted': "⚠️ Interrupted",
+    'failed': "❌ Failed",
+}
+
+def render_job_progress(status):
+    total = status['total']
+    processed = status['done'] + len(status['failed'])
+    st.progress(min(processed / total, 1.0),
+                text=f"{JOB_STATE_LABELS.get(status['state'], status['state'])} "
+                     f"{status['done']} of {total} documents, {len(status['failed'])} skipped")
+
+@st.fragment(run_every=1.0)
+def poll_chain_job(job_id):
+    import jobs
+
+    status = jobs.job_status(job_id)
+    if status['state'] not in ('queued', 'running'):
+        st.rerun()
+    render_job_progress(status)
+    if st.button("⏹ Cancel", key="chain_cancel"):
+        jobs.cancel_job(job_id)
+
+def clear_chain_job():
+    st.session_state.pop('chain_job_id', None)
+    st.query_params.pop('job', None)
+
+def render_new_chain_job():
+    import jobs
+
+    st.markdown("Upload a roster with one doctor per row (specialty, experience, patient types, marketing focus). "
+                f"Rows without a practice type use *{PRACTICE_TYPES[jobs.DEFAULT_PRACTICE_TYPE]['name']}*.")
+    uploaded = st.file_uploader("Doctor roster", type=['csv', 'xlsx'], key="chain_roster")
+    fmt = st.radio("Report format", jobs.FORMATS, format_func=str.upper, horizontal=True, key="chain_format")
+    if st.button("▶️ Generate Reports", type="primary", disabled=uploaded is None):
+        try:
+            job_id = jobs.create_job(uploaded.name, uploaded.getvalue(), fmt)
+        except ValueError as exc:
+            st.error(f"Could not read the roster: {exc}")
+            return
+        jobs.start_job(job_id)
+        st.session_state.chain_job_id = job_id
+        st.query_params['job'] = job_id
+        st.rerun()
+
+def render_chain_reports():
+    import jobs
+
+    job_id = st.session_state.get('chain_job_id')
+    status = None
+    if job_id:
+        try:
+            status = jobs.job_status(job_id)
+        except ValueError:
+            pass
+        if status is None:
+            st.warning("That report job could not be found.")
+            clear_chain_job()
+    if status is None:
+        render_new_chain_job()
+        return
+
+    st.caption(f"Roster: {status['roster_name']} · {status['format'].upper()}")
+    if status['state'] in ('queued', 'running'):
+        poll_chain_job(job_id)
+        return
+    render_job_progress(status)
+    if status['state'] == 'failed' and status.get('error'):
+        st.error(status['error'])
+
+    cols = st.columns(2)
+    with cols[0]:
+        if status['state'] == 'done':
+            with open(status['zip_path'], 'rb') as f:
+                st.download_button("📦 Download Reports", f, file_name=f"chain-reports-{job_id[:8]}.zip",
+                                   mime="application/zip", use_container_width=True, type="primary")
+        elif st.button("▶️ Resume", use_container_width=True, type="primary"):
+            jobs.start_job(job_id)
+            st.rerun()
+    with cols[1]:
+        if st.button("➕ New Job", use_container_width=True):
+            clear_chain_job()
+            st.rerun()
+
+    if status['failed']:
+        with st.expander(f"Skipped rows ({len(status['failed'])})"):
+            st.dataframe({'Row': [int(row) for row in status['failed']], 'Error': list(status['failed'].values())},
+                         hide_index=True, use_container_width=True)
+
+# Catalog search: one pass over the process-wide inverted index per keystroke
+def render_catalog_search():
+    query = st.text_input("🔎 Search the catalog", key="catalog_search",
+                          placeholder="Strategies, tools, procedures, topics…")
+    if not query.strip():
+        return
+    import search
+
+    results = load_search_index(rules_version()).search(query)
+    if not results:
+        st.caption("No matches")
+        return
+    lines = []
+    for entry in results:
+        where = ", ".join(entry.contexts[:2]) + (f" +{len(entry.contexts) - 2} more" if len(entry.contexts) > 2 else "")
+        lines.append(f"- **{entry.text}** · {search.KINDS[entry.kind]}  \n  <small>{where}</small>")
+    st.markdown("\n".join(lines), unsafe_allow_html=True)
+
+# Brand Building results
+def add_strategy(key):
+    wizard_state().selected_strategies |= STRATEGY_INDEX.bit(key)
+
+def remove_strategy(key):
+    wizard_state().selected_strategies &= ~STRATEGY_INDEX.bit(key)
+
+# Each card's resource list is its own fragment, so "Learn More" reruns only that card
+@st.fragment
+@timed('resources')
+def render_strategy_resources(rec, resources_html):
+    for resource, html in zip(rec['resources'], resources_html):
+        st.markdown(html, unsafe_allow_html=True)
+        if st.button("Learn More", key=f"learn_{resource['name']}_{rec['name']}"):
+            st.info(f"Detailed implementation guide for {resource['name']} coming soon!")
+
+
+# A fragment: adding or removing a strategy reruns only the results section
+@st.fragment
+@timed('results')
+def render_recommendations(recommendations, sections):
+    import views
+
+    state = wizard_state()
+    selected = state.selected_strategies
+    
+    # Header with count
+    header_cols = st.columns([3, 1])
+    with header_cols[0]:
+        st.subheader("Recommended Brand Building Strategies")
+    with header_cols[1]:
+        if selected:
+            st.success(f"✓ {bin(selected).count('1')} Selected")
+    
+    # Strategy cards
+    for rec in recommendations:
+        is_selected = selected & STRATEGY_INDEX.bit(rec['key'])
+        with st.expander(f"{'✓ ' if is_selected else ''}**{rec['name']}**", 
+                       expanded=False):
+            
+            # Strategy details, priority and reasoning
+            st.markdown(sections['cards'][rec['key']], unsafe_allow_html=True)
+            
+            # Toggle selection
+            if is_selected:
+                st.button(f"Remove from Plan", key=f"remove_{rec['name']}", use_container_width=True,
+                          on_click=remove_strategy, args=(rec['key'],))
+            else:
+                st.button(f"Add to Plan", key=f"add_{rec['name']}", type="primary", use_container_width=True,
+                          on_click=add_strategy, args=(rec['key'],))
+            
+            # Implementation resources
+            render_strategy_resources(rec, sections['resources'][rec['key']])
+
+    # Selected strategies summary
+    if selected:
+        st.markdown("---")
+        st.success("### 🎯 Your Selected Brand Building Plan")
+        
+        # Implementation timeline
+        tabs = st.tabs(list(PHASE_LABELS.values()))
+        
+        for tab, phase in zip(tabs, PHASE_LABELS):
+            with tab:
+                phase_selected = selected & PHASE_MASKS[phase]
+                if phase_selected:
+                    st.markdown(views.phase_strategies(phase_selected), unsafe_allow_html=True)
+                else:
+                    st.info(f"Add Phase {phase} strategies to your plan")
+        
+        # Budget Planning
+        st.markdown(views.budget_guide(), unsafe_allow_html=True)
+        
+        # Next Steps
+        st.markdown("---")
+        st.warning("### 🚀 Next Steps & Implementation")
+        
+        step_cols = st.columns(3)
+        with step_cols[0]:
+            render_pdf_export('brand')
+            render_docx_export('brand')
+        
+        with step_cols[1]:
+            if st.button("📅 Schedule Implementation", use_container_width=True):
+                st.info("Calendar scheduling coming soon")
+        
+        with step_cols[2]:
+            if st.button("📊 Track Progress", use_container_width=True):
+                st.info("Progress tracking dashboard coming soon")
+    
+    # Pro tip
+    st.markdown("---")
+    st.warning("""
+    **💡 Pro Tips for Medical Brand Building:**
+    
+    1. **Start with Foundation:** Build digital presence before advanced strategies
+    2. **Be Consistent:** Regular content and engagement build trust
+    3. **Measure Everything:** Track metrics to understand what works
+    4. **Patient-Centric:** Always focus on patient needs and experiences
+    5. **Ethical First:** Maintain medical ethics in all marketing activities
+    
+    **Remember:** Building a medical brand takes time - focus on consistency and quality.
+    """)
+
+state = wizard_state()
 
 # Sidebar navigation
-with st.sidebar:
+with st.sidebar, profiler.section('sidebar'):
     st.title("🏥 Navigation")
     st.session_state.app_mode = st.radio(
         "Select Tool:",
-        ["Doctor Marketing Strategy", "Brand Building Activities"],
-        index=0 if st.session_state.app_mode == "Doctor Marketing Strategy" else 1
+        APP_MODES,
+        index=APP_MODES.index(st.session_state.app_mode)
     )
     
+    st.markdown("---")
+    render_catalog_search()
+    
     st.markdown("---")
     
     # Show current selection summary
-    if st.session_state.specialty:
-        specialty = MEDICAL_SPECIALTIES[st.session_state.specialty]['name']
+    if state.specialty:
+        specialty = MEDICAL_SPECIALTIES[state.specialty]['name']
         st.info(f"**Specialty:** {specialty}")
     
-    if st.session_state.years_experience:
-        st.info(f"**Experience:** {st.session_state.years_experience}")
+    if state.years_experience:
+        st.info(f"**Experience:** {state.years_experience}")
     
     st.markdown("---")
     st.markdown("### About")
@@ -776,6 +1101,9 @@ with st.sidebar:
     
     **Brand Building Activities:**
     Specific strategies with implementation tools
+    
+    **Chain Reports:**
+    A plan document for every doctor in a roster
     """)
 
 # Main Application Logic
@@ -784,7 +1112,7 @@ if st.session_state.app_mode == "Doctor Marketing Strategy":
     st.markdown("*Strategic framework for doctor branding and practice growth*")
     
     # Progress bar - MOVED INSIDE THE CONDITIONAL BLOCK
-    progress = (st.session_state.step - 1) / 5
+    progress = (state.step - 1) / 5
     st.progress(progress)
     
     # Step indicator
@@ -792,489 +1120,47 @@ if st.session_state.app_mode == "Doctor Marketing Strategy":
     step_names = ['Profile', 'Practice', 'Services', 'Positioning', 'Focus', 'Strategy']
     for i, (col, name) in enumerate(zip(cols, step_names), 1):
         with col:
-            if i < st.session_state.step:
+            if i < state.step:
                 st.markdown(f"**✓ {name}**")
-            elif i == st.session_state.step:
+            elif i == state.step:
                 st.markdown(f"**→ {name}**")
             else:
                 st.markdown(f"{name}")
     
     st.markdown("---")
     
-    # Step 1: Doctor Profile
-    if st.session_state.step == 1:
-        st.header("Step 1: Medical Professional Profile")
-        st.markdown("Define your specialty and experience level")
-        
-        st.subheader("Medical Specialty")
-        cols = st.columns(3)
-        specialty_keys = list(MEDICAL_SPECIALTIES.keys())
-        
-        for i, key in enumerate(specialty_keys):
-            specialty = MEDICAL_SPECIALTIES[key]
-            with cols[i % 3]:
-                button_style = f"""
-                <style>
-                    div[data-testid="stButton"] button[data-testid="baseButton-secondary"] {{
-                        background-color: {specialty['color']}20;
-                        border-color: {specialty['color']};
-                        color: {specialty['color']};
-                    }}
-                </style>
-                """
-                st.markdown(button_style, unsafe_allow_html=True)
-                
-                if st.button(
-                    f"**{specialty['name']}**\n\n{specialty['desc']}",
-                    key=f"spec_{key}",
-                    use_container_width=True
-                ):
-                    st.session_state.specialty = key
-        
-        if st.session_state.specialty:
-            specialty = MEDICAL_SPECIALTIES[st.session_state.specialty]
-            st.success(f"✓ Selected: {specialty['name']}")
-            
-            # Show specialty details
-            with st.expander("Specialty Details", expanded=True):
-                cols = st.columns(2)
-                with cols[0]:
-                    st.markdown("**Common Procedures:**")
-                    for proc in specialty['procedures']:
-                        st.markdown(f"- {proc}")
-                with cols[1]:
-                    st.markdown("**Marketing Focus Areas:**")
-                    for focus in specialty['marketing_focus']:
-                        st.markdown(f"- {focus}")
-        
-        st.subheader("Years of Clinical Experience")
-        cols = st.columns(5)
-        for i, years in enumerate(YEARS_EXPERIENCE):
-            with cols[i]:
-                if st.button(years, key=f"exp_{years}", use_container_width=True):
-                    st.session_state.years_experience = years
-        
-        if st.session_state.years_experience:
-            st.success(f"✓ Selected: {st.session_state.years_experience}")
-            exp_strategy = get_experience_based_strategy()
-            if exp_strategy:
-                st.info(f"**Strategy Focus:** {exp_strategy.get('focus', '')}")
-    
-    # Step 2: Practice Setup
-    elif st.session_state.step == 2:
-        st.header("Step 2: Practice Type & Facilities")
-        st.markdown("Define your practice setup and available facilities")
-        
-        st.subheader("Type of Practice")
-        cols = st.columns(2)
-        practice_keys = list(PRACTICE_TYPES.keys())
-        
-        for i, key in enumerate(practice_keys):
-            practice = PRACTICE_TYPES[key]
-            with cols[i % 2]:
-                if st.button(
-                    f"**{practice['name']}**\n\n*{practice['desc']}*\n\nScale: {practice['scale']}",
-                    key=f"practice_{key}",
-                    use_container_width=True
-                ):
-                    st.session_state.practice_type = key
-        
-        if st.session_state.practice_type:
-            practice = PRACTICE_TYPES[st.session_state.practice_type]
-            st.success(f"✓ Selected: {practice['name']}")
-            
-            with st.expander("Practice Details", expanded=True):
-                cols = st.columns(2)
-                with cols[0]:
-                    st.markdown("**Marketing Needs:**")
-                    st.markdown(f"- {practice['marketing_needs']}")
-                    st.markdown(f"**Recommended Budget:** {practice['marketing_budget']}")
-                with cols[1]:
-                    st.markdown("**Team Requirements:**")
-                    st.markdown(f"- {practice['team_needs']}")
-        
-        st.subheader("Diagnostic Facilities Available")
-        st.markdown("Select all diagnostic facilities in your practice:")
-        
-        cols = st.columns(4)
-        facility_keys = list(DIAGNOSTIC_FACILITIES.keys())
-        
-        selected_facilities = []
-        for i, key in enumerate(facility_keys):
-            facility = DIAGNOSTIC_FACILITIES[key]
-            with cols[i % 4]:
-                if st.checkbox(facility, key=f"fac_{key}"):
-                    selected_facilities.append(facility)
-        
-        if selected_facilities:
-            st.session_state.services_offered = selected_facilities
-            st.success(f"✓ Selected {len(selected_facilities)} diagnostic facilities")
-    
-    # Step 3: Patient Types & Services
-    elif st.session_state.step == 3:
-        st.header("Step 3: Patient Types & Services Offered")
-        st.markdown("Select the types of patients you treat and services provided")
-        
-        st.subheader("Patient Types")
-        cols = st.columns(2)
-        patient_keys = list(PATIENT_TYPES.keys())
-        
-        for i, key in enumerate(patient_keys):
-            patient_type = PATIENT_TYPES[key]
-            with cols[i % 2]:
-                if st.checkbox(
-                    f"**{patient_type['name']}**\n\n{patient_type['desc']}",
-                    key=f"patient_{key}"
-                ):
-                    if key not in st.session_state.patient_types:
-                        st.session_state.patient_types.append(key)
-                else:
-                    if key in st.session_state.patient_types:
-                        st.session_state.patient_types.remove(key)
-        
-        if st.session_state.patient_types:
-            st.success(f"✓ Selected {len(st.session_state.patient_types)} patient types")
-            
-            # Show services for selected patient types
-            st.subheader("Services Provided")
-            for key in st.session_state.patient_types:
-                patient_type = PATIENT_TYPES[key]
-                st.markdown(f"**{patient_type['name']}:**")
-                cols = st.columns(2)
-                with cols[0]:
-                    for service in patient_type['services'][:2]:
-                        st.markdown(f"- {service}")
-                with cols[1]:
-                    for service in patient_type['services'][2:4]:
-                        st.markdown(f"- {service}")
-        
-        # Additional services
-        st.subheader("Additional Services")
-        additional_services = st.multiselect(
-            "Select additional value-added services:",
-            [
-                'Telemedicine Consultations',
-                'Second Opinion Services',
-                'Home Visits',
-                'Corporate Health Programs',
-                'Medical Tourism Services',
-                'Executive Health Checkups',
-                'Diet & Nutrition Counseling',
-                'Physical Therapy Services',
-                'Psychological Counseling',
-                'Alternative Medicine Options'
-            ]
-        )
-        
-        if additional_services:
-            st.info(f"**Value-Added Services:** {', '.join(additional_services)}")
-    
-    # Step 4: Competitive Positioning
-    elif st.session_state.step == 4:
-        st.header("Step 4: Competitive Positioning Analysis")
-        st.markdown("Rate your competitive advantages in key areas")
-        
-        st.info("**Rate each factor (1 = Needs Improvement, 2 = Average, 3 = Strong Advantage)**")
-        
-        for key, factor in COMPETITIVE_FACTORS.items():
-            st.subheader(factor['name'])
-            
-            # Show aspects
-            if factor.get('aspects'):
-                st.caption(f"**Key Aspects:** {', '.join(factor['aspects'])}")
-            
-            cols = st.columns(3)
-            ratings = {
-                '1': 'Needs Improvement',
-                '2': 'Average/Competitive',
-                '3': 'Strong Advantage'
-            }
-            
-            for rating_num, rating_text in ratings.items():
-                col_idx = int(rating_num) - 1
-                with cols[col_idx]:
-                    if st.button(
-                        f"{rating_num}: {rating_text}",
-                        key=f"rate_{key}_{rating_num}",
-                        use_container_width=True
-                    ):
-                        st.session_state.competitive_positioning[key] = {
-                            'rating': rating_num,
-                            'text': rating_text
-                        }
-            
-            if key in st.session_state.competitive_positioning:
-                rating_info = st.session_state.competitive_positioning[key]
-                if rating_info['rating'] == '3':
-                    st.success(f"✓ Strength: {rating_info['text']}")
-                elif rating_info['rating'] == '2':
-                    st.info(f"✓ Competitive: {rating_info['text']}")
-                else:
-                    st.warning(f"✓ Area for Improvement: {rating_info['text']}")
-        
-        # Show summary
-        if st.session_state.competitive_positioning:
-            st.markdown("---")
-            st.subheader("Competitive Position Summary")
-            
-            strong_areas = [k for k, v in st.session_state.competitive_positioning.items() if v['rating'] == '3']
-            weak_areas = [k for k, v in st.session_state.competitive_positioning.items() if v['rating'] == '1']
-            
-            cols = st.columns(2)
-            with cols[0]:
-                if strong_areas:
-                    st.success("**Your Competitive Strengths:**")
-                    for area in strong_areas:
-                        factor = COMPETITIVE_FACTORS[area]
-                        st.markdown(f"- {factor['name']}")
-                        if factor.get('improvement_strategies'):
-                            with st.expander(f"Maintain {factor['name']}"):
-                                for strat in factor['improvement_strategies']:
-                                    st.markdown(f"• {strat}")
-            
-            with cols[1]:
-                if weak_areas:
-                    st.warning("**Areas for Improvement:**")
-                    for area in weak_areas:
-                        factor = COMPETITIVE_FACTORS[area]
-                        st.markdown(f"- {factor['name']}")
-                        if factor.get('improvement_strategies'):
-                            with st.expander(f"Improve {factor['name']}"):
-                                for strat in factor['improvement_strategies']:
-                                    st.markdown(f"• {strat}")
-    
-    # Step 5: Marketing Focus
-    elif st.session_state.step == 5:
-        st.header("Step 5: Marketing Focus Area")
-        st.markdown("Select your primary marketing objective")
-        
-        st.subheader("What is your main marketing goal?")
-        cols = st.columns(2)
-        focus_keys = list(MARKETING_FOCUS_AREAS.keys())
-        
-        for i, key in enumerate(focus_keys):
-            focus = MARKETING_FOCUS_AREAS[key]
-            with cols[i % 2]:
-                if st.button(
-                    f"**{focus['name']}**",
-                    key=f"focus_{key}",
-                    use_container_width=True,
-                    help=f"Key metrics: {', '.join(focus['key_metrics'])}"
-                ):
-                    st.session_state.marketing_focus = key
-        
-        if st.session_state.marketing_focus:
-            focus = MARKETING_FOCUS_AREAS[st.session_state.marketing_focus]
-            st.success(f"✓ Selected Focus: {focus['name']}")
-            
-            # Show focus details
-            with st.expander("Focus Area Details", expanded=True):
-                cols = st.columns(3)
-                with cols[0]:
-                    st.markdown("**Key Metrics to Track:**")
-                    for metric in focus['key_metrics']:
-                        st.markdown(f"- {metric}")
-                with cols[1]:
-                    st.markdown("**Recommended Strategies:**")
-                    for strategy in focus['strategies']:
-                        st.markdown(f"- {strategy}")
-                with cols[2]:
-                    st.markdown("**Expected Outcomes:**")
-                    if st.session_state.marketing_focus == 'new_patients':
-                        st.markdown("- 20-30% increase in new patients")
-                        st.markdown("- Improved online visibility")
-                        st.markdown("- Better conversion rates")
-                    elif st.session_state.marketing_focus == 'patient_retention':
-                        st.markdown("- 15-25% increase in repeat visits")
-                        st.markdown("- Higher patient satisfaction")
-                        st.markdown("- Reduced patient churn")
-    
-    # Step 6: Comprehensive Strategy
-    elif st.session_state.step == 6:
-        st.header("Step 6: Complete Marketing Strategy")
-        st.markdown("Your personalized marketing strategy based on all inputs")
-        
-        # Generate comprehensive strategy
-        strategy = generate_comprehensive_strategy()
-        exp_strategy = get_experience_based_strategy()
-        spec_rec = get_specialty_based_recommendations()
-        practice_rec = get_practice_type_recommendations()
-        
-        st.success("### 🎯 Your Personalized Medical Practice Marketing Strategy")
-        
-        # Professional Profile Summary
-        cols = st.columns(4)
-        with cols[0]:
-            specialty_name = MEDICAL_SPECIALTIES.get(st.session_state.specialty, {}).get('name', 'Not Selected')
-            st.metric("Specialty", specialty_name)
-        with cols[1]:
-            st.metric("Experience", st.session_state.years_experience or "Not Selected")
-        with cols[2]:
-            practice_name = PRACTICE_TYPES.get(st.session_state.practice_type, {}).get('name', 'Not Selected')
-            st.metric("Practice Type", practice_name)
-        with cols[3]:
-            st.metric("Marketing Budget", calculate_marketing_budget())
-        
-        st.markdown("---")
-        
-        # Experience-based Strategy
-        if exp_strategy:
-            st.info("### 📊 Experience-Based Strategy")
-            cols = st.columns(3)
-            with cols[0]:
-                st.markdown("**Focus:**")
-                st.markdown(f"{exp_strategy.get('focus', '')}")
-            with cols[1]:
-                st.markdown("**Key Actions:**")
-                for action in exp_strategy.get('key_actions', [])[:3]:
-                    st.markdown(f"- {action}")
-            with cols[2]:
-                st.markdown("**Branding Priorities:**")
-                for priority in exp_strategy.get('branding_priorities', []):
-                    st.markdown(f"- {priority}")
-        
-        # Practice Recommendations
-        if practice_rec:
-            st.info("### 🏢 Practice Infrastructure Plan")
-            cols = st.columns(2)
-            with cols[0]:
-                st.markdown("**Marketing Channels:**")
-                for channel in practice_rec.get('marketing_channels', [])[:4]:
-                    st.markdown(f"- {channel}")
-            with cols[1]:
-                st.markdown("**Technology Needs:**")
-                for tech in practice_rec.get('technology_needs', [])[:4]:
-                    st.markdown(f"- {tech}")
-        
-        # Complete Strategy Framework
-        st.info("### 🎨 Complete Marketing Strategy Framework")
-        
-        tabs = st.tabs(["Patient Acquisition", "Patient Retention", "Brand Building", "Professional Growth", "Financial Planning"])
-        
-        with tabs[0]:
-            st.markdown("**Patient Acquisition Strategies:**")
-            for i, item in enumerate(strategy.get('patient_acquisition', []), 1):
-                st.markdown(f"{i}. {item}")
-        
-        with tabs[1]:
-            st.markdown("**Patient Retention Strategies:**")
-            for i, item in enumerate(strategy.get('patient_retention', []), 1):
-                st.markdown(f"{i}. {item}")
-        
-        with tabs[2]:
-            st.markdown("**Brand Building Strategies:**")
-            for i, item in enumerate(strategy.get('personal_branding', []), 1):
-                st.markdown(f"{i}. {item}")
-        
-        with tabs[3]:
-            st.markdown("**Professional Development Strategies:**")
-            for i, item in enumerate(strategy.get('professional_development', []), 1):
-                st.markdown(f"{i}. {item}")
-        
-        with tabs[4]:
-            st.markdown("**Financial Planning Strategies:**")
-            for i, item in enumerate(strategy.get('financial_planning', []), 1):
-                st.markdown(f"{i}. {item}")
-        
-        # Implementation Timeline
-        st.markdown("---")
-        st.warning("### 🚀 12-Month Implementation Plan")
-        
-        timeline_cols = st.columns(4)
-        with timeline_cols[0]:
-            st.markdown("**Months 1-3:**")
-            st.markdown("- Foundation Building")
-            st.markdown("- Digital Presence Setup")
-            st.markdown("- Team Training")
-        
-        with timeline_cols[1]:
-            st.markdown("**Months 4-6:**")
-            st.markdown("- Strategy Implementation")
-            st.markdown("- Marketing Campaigns")
-            st.markdown("- Network Building")
-        
-        with timeline_cols[2]:
-            st.markdown("**Months 7-9:**")
-            st.markdown("- Performance Analysis")
-            st.markdown("- Strategy Refinement")
-            st.markdown("- Service Expansion")
-        
-        with timeline_cols[3]:
-            st.markdown("**Months 10-12:**")
-            st.markdown("- Scale Successful Programs")
-            st.markdown("- Advanced Brand Building")
-            st.markdown("- Annual Review")
-        
-        # Action Items
-        st.markdown("---")
-        st.info("### ✅ Immediate Action Items (Next 30 Days)")
-        
-        action_cols = st.columns(3)
-        with action_cols[0]:
-            st.markdown("**Week 1-2:**")
-            st.markdown("1. Set up Google My Business")
-            st.markdown("2. Create social media profiles")
-            st.markdown("3. Design patient intake forms")
-        
-        with action_cols[1]:
-            st.markdown("**Week 3-4:**")
-            st.markdown("1. Launch basic website")
-            st.markdown("2. Set up appointment system")
-            st.markdown("3. Create patient education materials")
-        
-        with action_cols[2]:
-            st.markdown("**Metrics to Track:**")
-            st.markdown("- New patient inquiries")
-            st.markdown("- Website traffic")
-            st.markdown("- Patient satisfaction")
-            st.markdown("- Revenue growth")
-        
-        # Link to Brand Building Activities
-        st.markdown("---")
-        st.success("### 🎨 Ready to implement specific strategies?")
-        if st.button("Go to Brand Building Activities →", type="primary", use_container_width=True):
-            st.session_state.app_mode = "Brand Building Activities"
-            st.rerun()
+    st.session_state.nav_ready = can_proceed()
+    STEP_RENDERERS[state.step]()
     
     # Navigation buttons
     st.markdown("---")
     nav_cols = st.columns([1, 1])
     
     with nav_cols[0]:
-        if st.session_state.step > 1:
+        if state.step > 1:
             if st.button("← Previous", use_container_width=True):
-                st.session_state.step -= 1
+                state.step -= 1
                 st.rerun()
     
     with nav_cols[1]:
-        can_proceed = False
-        if st.session_state.step == 1:
-            can_proceed = st.session_state.specialty and st.session_state.years_experience
-        elif st.session_state.step == 2:
-            can_proceed = st.session_state.practice_type
-        elif st.session_state.step == 3:
-            can_proceed = len(st.session_state.patient_types) > 0
-        elif st.session_state.step == 4:
-            can_proceed = len(st.session_state.competitive_positioning) == len(COMPETITIVE_FACTORS)
-        elif st.session_state.step == 5:
-            can_proceed = st.session_state.marketing_focus
-        
-        if st.session_state.step < 6:
-            if st.button("Next →", disabled=not can_proceed, use_container_width=True, type="primary"):
-                st.session_state.step += 1
+        if state.step < 6:
+            if st.button("Next →", disabled=not st.session_state.nav_ready, use_container_width=True, type="primary"):
+                state.step += 1
                 st.rerun()
         else:
             if st.button("🔄 Start New Strategy", use_container_width=True, type="primary"):
-                st.session_state.step = 1
-                st.session_state.specialty = None
-                st.session_state.years_experience = None
-                st.session_state.practice_type = None
-                st.session_state.patient_types = []
-                st.session_state.services_offered = []
-                st.session_state.competitive_positioning = {}
-                st.session_state.marketing_focus = None
-                st.session_state.selected_strategies = []
+                state.reset()
                 st.rerun()
+    
+    sync_plan_url(state)
+
+# Bulk reports for hospital chains
+elif st.session_state.app_mode == CHAIN_MODE:
+    st.title("🏢 Chain Reports")
+    st.markdown("*A marketing plan document for every doctor in your hospital chain*")
+    
+    with profiler.section('chain_reports'):
+        render_chain_reports()
 
 # Brand Building Activities Tool
 else:
@@ -1282,231 +1168,69 @@ else:
     st.markdown("*Get specific strategies and tools to build your medical brand and reputation*")
     
     # Input section
-    with st.container():
+    with st.container(), profiler.section('brand_inputs'):
         st.subheader("Configure Your Brand Building Strategy")
         
         cols = st.columns(3)
         
         with cols[0]:
-            specialty_names = [MEDICAL_SPECIALTIES[s]['name'] for s in MEDICAL_SPECIALTIES]
             specialty_input = st.selectbox(
                 "🩺 Specialty",
-                [''] + specialty_names,
+                ('',) + SPECIALTY_INDEX.names,
                 index=0
             )
         
         with cols[1]:
             experience_input = st.selectbox(
                 "📈 Years of Experience",
-                [''] + YEARS_EXPERIENCE,
+                ('',) + YEARS_EXPERIENCE,
                 index=0
             )
         
         with cols[2]:
-            focus_options = [MARKETING_FOCUS_AREAS[f]['name'] for f in MARKETING_FOCUS_AREAS]
             focus_input = st.selectbox(
                 "🎯 Marketing Focus",
-                [''] + focus_options,
+                ('',) + FOCUS_INDEX.names,
                 index=0
             )
         
         if st.button("🔍 Generate Brand Building Strategies", type="primary", use_container_width=True):
             if specialty_input and experience_input and focus_input:
-                # Find the focus key
-                focus_key = None
-                for key, value in MARKETING_FOCUS_AREAS.items():
-                    if value['name'] == focus_input:
-                        focus_key = key
-                        break
+                focus_key = FOCUS_INDEX.key(focus_input)
                 
                 if focus_key:
-                    st.session_state.marketing_focus = focus_key
-                    st.session_state.selected_strategies = []
+                    state.marketing_focus = focus_key
+                    state.selected_strategies = 0
                     st.rerun()
     
     # Results section
-    if st.session_state.marketing_focus and experience_input:
+    if state.marketing_focus and experience_input:
         st.markdown("---")
         st.header("Your Brand Building Strategy")
         
-        # Insights
-        cols = st.columns(2)
-        with cols[0]:
-            st.info(f"**📈 Experience-Based Insight**")
-            exp_strat = get_experience_based_strategy()
-            if exp_strat:
-                st.markdown(f"**Focus:** {exp_strat.get('focus', '')}")
-                st.markdown("**Key Actions for Your Experience Level:**")
-                for action in exp_strat.get('key_actions', [])[:3]:
-                    st.markdown(f"- {action}")
+        import precompute
+        import strategy_rules
+        import views
         
-        with cols[1]:
-            focus_data = MARKETING_FOCUS_AREAS[st.session_state.marketing_focus]
-            st.info(f"**🎯 {focus_data['name']} Focus**")
-            st.markdown("**Key Metrics to Track:**")
-            for metric in focus_data['key_metrics'][:3]:
-                st.markdown(f"- {metric}")
-            st.markdown("**Recommended Approaches:**")
-            for strategy in focus_data['strategies'][:3]:
-                st.markdown(f"- {strategy}")
-        
-        st.markdown("---")
+        plan = current_plan()
+        # Rescored when strategy rules fire for the wizard answers (ratings included)
+        recommendations, rules_key = strategy_rules.recommend(
+            plan['recommended'], state.marketing_focus, strategy_matcher()
+        )
+        sections = views.brand_results(precompute.profile_code(current_profile()), plan,
+                                       recommendations, rules_key)
         
-        # Get recommendations
-        recommendations = get_recommended_strategies()
+        # Insights
+        st.markdown(sections['insights'], unsafe_allow_html=True)
         
         if recommendations:
-            # Header with count
-            header_cols = st.columns([3, 1])
-            with header_cols[0]:
-                st.subheader("Recommended Brand Building Strategies")
-            with header_cols[1]:
-                if st.session_state.selected_strategies:
-                    st.success(f"✓ {len(st.session_state.selected_strategies)} Selected")
-            
-            # Strategy cards
-            for rec in recommendations:
-                with st.expander(f"{'✓ ' if rec['name'] in st.session_state.selected_strategies else ''}**{rec['name']}**", 
-                               expanded=False):
-                    
-                    # Strategy details
-                    cols = st.columns([3, 1])
-                    with cols[0]:
-                        st.markdown(f"**Focus:** {rec['focus']}")
-                        st.markdown(f"**Timeframe:** {rec['time']}")
-                        st.markdown(f"**Budget Level:** {rec['budget']}")
-                    with cols[1]:
-                        priority_class = "priority-high" if rec['score'] == 3 else "priority-medium"
-                        priority_text = "High Priority" if rec['score'] == 3 else "Medium Priority"
-                        st.markdown(f'<span class="{priority_class}">{priority_text}</span>', unsafe_allow_html=True)
-                    
-                    # Reasoning
-                    st.markdown(f"**Why this works:** {rec['reasoning']}")
-                    
-                    # Toggle selection
-                    if rec['name'] in st.session_state.selected_strategies:
-                        if st.button(f"Remove from Plan", key=f"remove_{rec['name']}", use_container_width=True):
-                            st.session_state.selected_strategies.remove(rec['name'])
-                            st.rerun()
-                    else:
-                        if st.button(f"Add to Plan", key=f"add_{rec['name']}", type="primary", use_container_width=True):
-                            st.session_state.selected_strategies.append(rec['name'])
-                            st.rerun()
-                    
-                    # Implementation resources
-                    if rec['resources']:
-                        st.markdown("---")
-                        st.markdown("**🛠️ Implementation Resources:**")
-                        
-                        for resource in rec['resources']:
-                            with st.container():
-                                st.markdown(f"**{resource['name']}**")
-                                st.markdown(f"*{resource['desc']}*")
-                                
-                                col1, col2, col3 = st.columns([2, 2, 1])
-                                with col1:
-                                    st.markdown(f"**Tools:** {', '.join(resource['tools'][:3])}")
-                                with col2:
-                                    st.markdown(f"**Cost Level:** {resource['cost']}")
-                                with col3:
-                                    if st.button("Learn More", key=f"learn_{resource['name']}_{rec['name']}"):
-                                        st.info(f"Detailed implementation guide for {resource['name']} coming soon!")
-            
-            # Selected strategies summary
-            if st.session_state.selected_strategies:
-                st.markdown("---")
-                st.success("### 🎯 Your Selected Brand Building Plan")
-                
-                # Implementation timeline
-                tabs = st.tabs(["Phase 1: Foundation (0-3 months)", "Phase 2: Growth (4-9 months)", "Phase 3: Maturity (10-18 months)"])
-                
-                with tabs[0]:
-                    short_term = [s for s in st.session_state.selected_strategies 
-                                if any(x in s for x in ['Digital Presence', 'Content Marketing', 'Patient Relationship'])]
-                    if short_term:
-                        for strategy in short_term:
-                            st.markdown(f"✓ {strategy}")
-                    else:
-                        st.info("Add Phase 1 strategies to your plan")
-                
-                with tabs[1]:
-                    medium_term = [s for s in st.session_state.selected_strategies 
-                                 if any(x in s for x in ['Community Outreach', 'Premium Services', 'Referral Network'])]
-                    if medium_term:
-                        for strategy in medium_term:
-                            st.markdown(f"✓ {strategy}")
-                    else:
-                        st.info("Add Phase 2 strategies to your plan")
-                
-                with tabs[2]:
-                    long_term = [s for s in st.session_state.selected_strategies 
-                               if any(x in s for x in ['Academic Presence', 'Specialized Certifications'])]
-                    if long_term:
-                        for strategy in long_term:
-                            st.markdown(f"✓ {strategy}")
-                    else:
-                        st.info("Add Phase 3 strategies to your plan")
-                
-                # Budget Planning
-                st.markdown("---")
-                st.info("### 💰 Budget Planning Guide")
-                
-                budget_cols = st.columns(3)
-                with budget_cols[0]:
-                    st.markdown("**Low Budget (< $5,000/yr):**")
-                    st.markdown("- Focus on free tools")
-                    st.markdown("- DIY content creation")
-                    st.markdown("- Local networking")
-                
-                with budget_cols[1]:
-                    st.markdown("**Medium Budget ($5,000-$20,000/yr):**")
-                    st.markdown("- Professional website")
-                    st.markdown("- Basic marketing campaigns")
-                    st.markdown("- Training programs")
-                
-                with budget_cols[2]:
-                    st.markdown("**High Budget ($20,000+/yr):**")
-                    st.markdown("- Full marketing team")
-                    st.markdown("- Advanced technology")
-                    st.markdown("- Research projects")
-                
-                # Next Steps
-                st.markdown("---")
-                st.warning("### 🚀 Next Steps & Implementation")
-                
-                step_cols = st.columns(3)
-                with step_cols[0]:
-                    if st.button("📋 Create Action Plan", use_container_width=True):
-                        st.info("Action plan template will be generated")
-                
-                with step_cols[1]:
-                    if st.button("📅 Schedule Implementation", use_container_width=True):
-                        st.info("Calendar scheduling coming soon")
-                
-                with step_cols[2]:
-                    if st.button("📊 Track Progress", use_container_width=True):
-                        st.info("Progress tracking dashboard coming soon")
-            
-            # Pro tip
-            st.markdown("---")
-            st.warning("""
-            **💡 Pro Tips for Medical Brand Building:**
-            
-            1. **Start with Foundation:** Build digital presence before advanced strategies
-            2. **Be Consistent:** Regular content and engagement build trust
-            3. **Measure Everything:** Track metrics to understand what works
-            4. **Patient-Centric:** Always focus on patient needs and experiences
-            5. **Ethical First:** Maintain medical ethics in all marketing activities
-            
-            **Remember:** Building a medical brand takes time - focus on consistency and quality.
-            """)
+            render_recommendations(recommendations, sections)
     
     else:
         st.info("👆 Fill in the details above and click 'Generate Brand Building Strategies' to get personalized recommendations.")
 
 # Footer
-st.markdown("---")
-st.markdown("""
+FOOTER_HTML = """
 <div style='text-align: center; color: #666; padding: 20px;'>
     <p><strong>Medical Professional Marketing Strategy Tool</strong></p>
     <p>Built for Doctors & Medical Practices | Version 2.0</p>
@@ -1515,4 +1239,25 @@ st.markdown("""
         maintain patient confidentiality, and comply with local medical advertising regulations.
     </p>
 </div>
-""", unsafe_allow_html=True)
+"""
+
+with profiler.section('footer'):
+    st.markdown("---")
+    st.markdown(FOOTER_HTML, unsafe_allow_html=True)
+
+if st.session_state.profiling:
+    run_label = st.session_state.app_mode
+    if st.session_state.app_mode == "Doctor Marketing Strategy":
+        run_label += f" / step {state.step}"
+    session_stats = sessions.registry.stats()
+    graph_stats = engine.plan_graph.stats()
+    profiler.render_panel(st, profiler.finish(label=run_label), extra_metrics={
+        "Live sessions": session_stats['sessions'],
+        "Session memory": f"{session_stats['total_bytes'] / 1024:.1f} KB",
+        "Snapshots": session_stats['snapshots'],
+        "Evicted": session_stats['evictions'],
+        "Plan output hits": f"{graph_stats['hit_rate']:.0%}" if graph_stats['misses'] else "n/a",
+        "Plan outputs computed": graph_stats['misses']
+    })
+
+sessions.registry.record_usage(st.session_state.session_id, st.session_state)
@@ -0,0 +1,239 @@
+# bench_app.py - Headless benchmark for the wizard and Brand Building flows
+#
+# Drives app.py with Streamlit's AppTest harness through all six wizard
+# steps and the Brand Building flow for a spread of specialties, practice
+# types and focus areas, then reports per-rerun latency percentiles, script
+# execution time (from the render profiler) and memory.
+#
+#     python benchmarks/bench_app.py                  # run and compare with baseline.json
+#     python benchmarks/bench_app.py --update-baseline
+#
+# Each run is saved under benchmarks/results/. The command exits with status
+# 1 when a metric exceeds its baseline value by more than the tolerance.
+
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+APP_PATH = os.path.join(REPO_DIR, 'app.py')
+BASELINE_PATH = os.path.join(BENCH_DIR, 'baseline.json')
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+
+DEFAULT_TOLERANCE = 0.5  # fail when a metric is more than 50% above baseline
+
+# (specialty, experience, practice type, focus)
+WIZARD_CASES = [
+    ('cardiology', '0-5 years', 'individual_clinic', 'new_patients'),
+    ('neurology', '11-15 years', 'multi_specialty_hospital', 'referral_volume'),
+    ('pediatrics', '>20 years', 'corporate_chain', 'institutional_reputation'),
+    ('dermatology', '6-10 years', 'group_practice', 'premium_services'),
+]
+RATINGS = ['1', '2', '3', '1', '2', '3']
+
+# (specialty name, experience, focus name)
+BRAND_CASES = [
+    ('Cardiology', '6-10 years', 'Acquiring New Patients'),
+    ('Psychiatry', '16-20 years', 'Expert Positioning in Specialty'),
+    ('Orthopedics', '0-5 years', 'Building Institutional Reputation'),
+]
+
+# Metrics compared against the baseline (lower is better)
+GATED_METRICS = ['rerun_p50_ms', 'rerun_p95_ms', 'script_mean_ms', 'peak_traced_mb']
+
+
+class Driver:
+    """Wraps an AppTest and records the latency of every rerun."""
+
+    def __init__(self, timeout=60):
+        from streamlit.testing.v1 import AppTest
+
+        self.at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+        self.latencies = []
+        self.run()
+
+    def run(self, element=None):
+        started = time.perf_counter()
+        (element or self.at).run()
+        self.latencies.append(time.perf_counter() - started)
+        if self.at.exception:
+            raise RuntimeError(f"app raised: {self.at.exception[0].value}")
+
+    def click(self, key=None, label=None):
+        if key is not None:
+            button = self.at.button(key=key)
+        else:
+            button = next(b for b in self.at.button if b.label == label)
+        self.run(button.click())
+
+    def next_step(self):
+        self.click(label="Next →")
+
+
+def walk_wizard(driver, specialty, experience, practice, focus):
+    from catalog import COMPETITIVE_FACTORS, DIAGNOSTIC_FACILITIES, PATIENT_TYPES
+
+    driver.click(key=f"spec_{specialty}")
+    driver.click(key=f"exp_{experience}")
+    driver.next_step()
+    driver.click(key=f"practice_{practice}")
+    for key in list(DIAGNOSTIC_FACILITIES)[:3]:
+        driver.run(driver.at.checkbox(key=f"fac_{key}").check())
+    driver.next_step()
+    for key in list(PATIENT_TYPES)[:2]:
+        driver.run(driver.at.checkbox(key=f"patient_{key}").check())
+    driver.next_step()
+    for key, rating in zip(COMPETITIVE_FACTORS, RATINGS):
+        driver.click(key=f"rate_{key}_{rating}")
+    driver.next_step()
+    driver.click(key=f"focus_{focus}")
+    driver.next_step()
+    # Step 6, then back to a fresh wizard
+    driver.click(label="🔄 Start New Strategy")
+
+
+def walk_brand_building(driver, specialty, experience, focus):
+    driver.at.selectbox[0].set_value(specialty)
+    driver.at.selectbox[1].set_value(experience)
+    driver.at.selectbox[2].set_value(focus)
+    driver.click(label="🔍 Generate Brand Building Strategies")
+    while True:
+        add = next((b for b in driver.at.button if b.label == "Add to Plan"), None)
+        if add is None:
+            break
+        driver.run(add.click())
+    learn = next((b for b in driver.at.button if b.label == "Learn More"), None)
+    if learn is not None:
+        driver.run(learn.click())
+
+
+def run_scenarios(driver):
+    for case in WIZARD_CASES:
+        walk_wizard(driver, *case)
+    # The mode radio's index follows session state, so switch modes only once
+    driver.run(driver.at.sidebar.radio[0].set_value("Brand Building Activities"))
+    for case in BRAND_CASES:
+        walk_brand_building(driver, *case)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def script_times(log_path):
+    times = []
+    with open(log_path, encoding='utf-8') as f:
+        for line in f:
+            entry = json.loads(line)
+            if entry.get('kind') == 'app':
+                times.append(entry['total_ms'])
+    return times
+
+
+def benchmark(rounds):
+    sys.path.insert(0, REPO_DIR)
+    log_fd, log_path = tempfile.mkstemp(suffix='.jsonl')
+    os.close(log_fd)
+    os.environ['MARKETING_PROFILE'] = '1'
+    os.environ['MARKETING_PROFILE_LOG'] = log_path
+    try:
+        # Warm-up pass so imports and cached resources are not timed
+        run_scenarios(Driver())
+        open(log_path, 'w').close()
+
+        latencies = []
+        for _ in range(rounds):
+            driver = Driver()
+            run_scenarios(driver)
+            latencies.extend(driver.latencies[1:])
+        scripts = script_times(log_path)
+
+        # Separate pass for memory: tracemalloc slows the app down
+        tracemalloc.start()
+        driver = Driver()
+        run_scenarios(driver)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        os.unlink(log_path)
+
+    latencies_ms = [s * 1000 for s in latencies]
+    return {
+        'reruns': len(latencies_ms),
+        'rerun_p50_ms': round(percentile(latencies_ms, 50), 3),
+        'rerun_p90_ms': round(percentile(latencies_ms, 90), 3),
+        'rerun_p95_ms': round(percentile(latencies_ms, 95), 3),
+        'rerun_p99_ms': round(percentile(latencies_ms, 99), 3),
+        'rerun_max_ms': round(max(latencies_ms), 3),
+        'script_mean_ms': round(sum(scripts) / len(scripts), 3) if scripts else 0.0,
+        'script_p95_ms': round(percentile(scripts, 95), 3),
+        'peak_traced_mb': round(peak / 2 ** 20, 3),
+        'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
+
+
+def compare(result, baseline, tolerance):
+    """Return a list of (metric, value, limit) for metrics over their limit."""
+    failures = []
+    for metric in GATED_METRICS:
+        if metric not in baseline:
+            continue
+        limit = baseline[metric] * (1 + tolerance)
+        if result[metric] > limit:
+            failures.append((metric, result[metric], limit))
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark app.py reruns headlessly.")
+    parser.add_argument('--rounds', type=int, default=3, help="timed passes over all scenarios")
+    parser.add_argument('--tolerance', type=float, default=None,
+                        help=f"allowed fraction above baseline (default: baseline's, else {DEFAULT_TOLERANCE})")
+    parser.add_argument('--update-baseline', action='store_true', help="write this run to baseline.json")
+    args = parser.parse_args(argv)
+
+    result = benchmark(args.rounds)
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    with open(os.path.join(RESULTS_DIR, f'{stamp}.json'), 'w') as f:
+        json.dump(result, f, indent=2)
+
+    for metric, value in result.items():
+        print(f"{metric:>16}: {value}")
+
+    if args.update_baseline:
+        baseline = dict(result, tolerance=args.tolerance if args.tolerance is not None else DEFAULT_TOLERANCE)
+        with open(BASELINE_PATH, 'w') as f:
+            json.dump(baseline, f, indent=2)
+            f.write('\n')
+        print(f"Baseline written to {BASELINE_PATH}")
+        return 0
+
+    try:
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print("No baseline.json; run with --update-baseline to create one")
+        return 0
+
+    tolerance = args.tolerance if args.tolerance is not None else baseline.get('tolerance', DEFAULT_TOLERANCE)
+    failures = compare(result, baseline, tolerance)
+    for metric, value, limit in failures:
+        print(f"REGRESSION {metric}: {value} > {limit:.3f} (baseline {baseline[metric]}, tolerance {tolerance:.0%})")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
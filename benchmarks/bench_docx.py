@@ -0,0 +1,76 @@
+# bench_docx.py - Throughput of templated DOCX plan export
+#
+# Renders DOCX reports for a spread of profiles (every specialty, experience
+# band, practice type and focus area, cycled) with reports.render_docx and
+# reports the one-off template load time and documents per second. Plans
+# and blocks are built up front so only DOCX rendering is timed.
+#
+#     python benchmarks/bench_docx.py            # 500 documents
+#     python benchmarks/bench_docx.py --docs 2000
+
+import argparse
+import itertools
+import os
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+
+def profiles(count):
+    import engine
+    from catalog import MARKETING_FOCUS_AREAS, MEDICAL_SPECIALTIES, PRACTICE_TYPES, YEARS_EXPERIENCE
+
+    combos = itertools.cycle(zip(
+        itertools.cycle(MEDICAL_SPECIALTIES),
+        itertools.cycle(YEARS_EXPERIENCE),
+        itertools.cycle(PRACTICE_TYPES),
+        itertools.cycle(MARKETING_FOCUS_AREAS),
+    ))
+    return [
+        engine.Profile(specialty, experience, practice, marketing_focus=focus)
+        for specialty, experience, practice, focus in itertools.islice(combos, count)
+    ]
+
+
+def benchmark(count):
+    sys.path.insert(0, REPO_DIR)
+    import engine
+    import reports
+
+    batch = profiles(count)
+    plans = engine.generate_many(batch)
+    # Vary the Brand Building selection too, so documents differ in length
+    documents = [reports.build_document(profile, plan, i * 0x9E37 & 0xFF)
+                 for i, (profile, plan) in enumerate(zip(batch, plans))]
+
+    started = time.perf_counter()
+    reports.docx_template()
+    load_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    total_bytes = sum(len(reports.render_docx(blocks)) for blocks in documents)
+    elapsed = time.perf_counter() - started
+    return {
+        'documents': count,
+        'template_load_ms': round(load_s * 1000, 3),
+        'render_s': round(elapsed, 3),
+        'ms_per_doc': round(elapsed * 1000 / count, 3),
+        'docs_per_s': round(count / elapsed, 1),
+        'mean_kb': round(total_bytes / count / 1024, 1)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark templated DOCX export.")
+    parser.add_argument('--docs', type=int, default=500, help="documents to render")
+    args = parser.parse_args(argv)
+
+    for metric, value in benchmark(args.docs).items():
+        print(f"{metric:>16}: {value}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,142 @@
+# bench_rules.py - Strategy rule matching latency at growing rule counts
+#
+# Adds synthetic rules (random conditions over the same facts as
+# strategy_rules.yaml) to the real ones and times, per rule count:
+#   full_ms         matching a profile from scratch (a new session's Matcher)
+#   incremental_ms  re-matching after one answer changes (one rating, the
+#                   focus, a facility, ...), the app's usual rerun
+#   reference_ms    checking every rule against the profile, for comparison
+# Every result is checked against the reference evaluation.
+#
+#     python benchmarks/bench_rules.py                  # the real rules, 200 and 500 rules
+#     python benchmarks/bench_rules.py --rules 1000
+#
+# Exits with status 1 if a p99 full or incremental match is over
+# MATCH_BUDGET_MS, or if a match differs from the reference.
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+MATCH_BUDGET_MS = 1.0
+PROFILES = 300
+SINGLE_VALUED = ('specialty', 'experience', 'scale', 'focus')
+
+
+def synthetic_rules(base, count, seed=0):
+    import strategy_rules
+    from catalog import BRAND_STRATEGIES
+
+    rng = random.Random(seed)
+    facts = list(strategy_rules.FACT_VALUES)
+    rules = list(base)
+    while len(rules) < count:
+        conditions = []
+        for fact in rng.sample(facts, rng.randint(1, 3)):
+            values = strategy_rules.FACT_VALUES[fact]
+            conditions.append((fact, tuple(rng.sample(values, rng.randint(1, min(3, len(values)))))))
+        boosts = tuple((key, round(rng.uniform(0.25, 2.0), 2))
+                       for key in rng.sample(list(BRAND_STRATEGIES), rng.randint(1, 2)))
+        rules.append(strategy_rules.Rule(tuple(conditions), boosts, f"Synthetic rule {len(rules)}"))
+    return strategy_rules.RuleSet(rules)
+
+
+def random_atoms(rng):
+    import strategy_rules
+
+    atoms = set()
+    for fact, values in strategy_rules.FACT_VALUES.items():
+        if fact in SINGLE_VALUED or fact.startswith('rating.'):
+            if rng.random() < 0.85:
+                atoms.add((fact, rng.choice(values)))
+        else:
+            atoms.update((fact, value) for value in rng.sample(values, rng.randint(0, 4)))
+    return frozenset(atoms)
+
+
+def change_one(atoms, rng):
+    """atoms with one answer changed: a single-valued fact set to another value, or a set member toggled."""
+    import strategy_rules
+
+    fact = rng.choice(list(strategy_rules.FACT_VALUES))
+    value = rng.choice(strategy_rules.FACT_VALUES[fact])
+    if fact in SINGLE_VALUED or fact.startswith('rating.'):
+        return frozenset({atom for atom in atoms if atom[0] != fact} | {(fact, value)})
+    return atoms ^ {(fact, value)}
+
+
+def percentile(times, pct):
+    ordered = sorted(times)
+    return ordered[min(int(len(ordered) * pct), len(ordered) - 1)] * 1000
+
+
+def benchmark(count, profiles):
+    import strategy_rules
+
+    base = strategy_rules.default_rules().rules
+    ruleset = synthetic_rules(base, count) if count > len(base) else strategy_rules.RuleSet(base)
+    rng = random.Random(1)
+    full, incremental, reference = [], [], []
+    mismatches = 0
+    matcher = ruleset.matcher()
+    atoms = random_atoms(rng)
+    matcher.update(atoms)
+    for _ in range(profiles):
+        profile_atoms = random_atoms(rng)
+        started = time.perf_counter()
+        fresh = ruleset.matcher()
+        fresh.update(profile_atoms)
+        full.append(time.perf_counter() - started)
+
+        atoms = change_one(atoms, rng)
+        started = time.perf_counter()
+        matcher.update(atoms)
+        incremental.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        expected = ruleset.evaluate(atoms)
+        reference.append(time.perf_counter() - started)
+        mismatches += matcher.key() != tuple(expected)
+        mismatches += fresh.key() != tuple(ruleset.evaluate(profile_atoms))
+    return {
+        'rules': len(ruleset.rules),
+        'conditions': len(ruleset.condition_rules),
+        'full_p50_ms': round(statistics.median(full) * 1000, 4),
+        'full_p99_ms': round(percentile(full, 0.99), 4),
+        'incremental_p50_ms': round(statistics.median(incremental) * 1000, 4),
+        'incremental_p99_ms': round(percentile(incremental, 0.99), 4),
+        'reference_p50_ms': round(statistics.median(reference) * 1000, 4),
+        'mismatches': mismatches
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark strategy rule matching.")
+    parser.add_argument('--rules', type=int, nargs='+', default=[0, 200, 500],
+                        help="rule counts (0 = the real rules only)")
+    parser.add_argument('--profiles', type=int, default=PROFILES, help="profiles matched per rule count")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, REPO_DIR)
+    failures = []
+    for count in args.rules:
+        result = benchmark(count, args.profiles)
+        print("  ".join(f"{metric}: {value}" for metric, value in result.items()))
+        for metric in ('full_p99_ms', 'incremental_p99_ms'):
+            if result[metric] > MATCH_BUDGET_MS:
+                failures.append(f"{metric} {result[metric]} > {MATCH_BUDGET_MS} at {result['rules']} rules")
+        if result['mismatches']:
+            failures.append(f"{result['mismatches']} matches differ from the reference at {result['rules']} rules")
+    for failure in failures:
+        print(f"FAILED {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
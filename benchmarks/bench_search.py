@@ -0,0 +1,100 @@
+# bench_search.py - Catalog search latency at growing catalog sizes
+#
+# Grows the real catalog entries with synthetic ones (names drawn from the
+# catalog's own words plus made-up words, so the vocabulary grows too) and
+# times a mix of queries against search.CatalogSearch: whole words,
+# prefixes down to one letter, multi-word phrases, typos and misses.
+# Reports index build time and per-query latency percentiles per size.
+#
+#     python benchmarks/bench_search.py                  # 1x, 10,000 and 50,000 entries
+#     python benchmarks/bench_search.py --sizes 20000
+#
+# Exits with status 1 if a p99 query time is over QUERY_BUDGET_MS.
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+QUERY_BUDGET_MS = 1.0
+QUERIES = [
+    'canva', 'can', 'c', 'm', 'google', 'google rev', 'heart attack', 'heart att', 'general phys',
+    'cardaic', 'genral physician', 'refferal', 'social media', 'patient', 'pa', 'ptca', 'xyzzy', 'care plan',
+]
+SYLLABLES = ['ka', 'ro', 'mi', 'ten', 'sul', 'va', 'dor', 'pha', 'lin', 'gro', 'zen', 'tri', 'ox', 'bel']
+
+
+def synthetic_entries(base, count, seed=0):
+    import search
+
+    rng = random.Random(seed)
+    words = sorted({term for entry in base for term in search.terms(entry.text)})
+    kinds = list(search.KINDS)
+    entries = list(base)
+    while len(entries) < count:
+        name_words = [rng.choice(words) for _ in range(rng.randint(1, 4))]
+        if rng.random() < 0.5:
+            name_words.append(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+        rng.shuffle(name_words)
+        entries.append(search.Entry(rng.choice(kinds), ' '.join(name_words).capitalize(), ('Synthetic',)))
+    return entries
+
+
+def benchmark(size, repeat):
+    import search
+
+    base = search.catalog_entries()
+    entries = synthetic_entries(base, size) if size > len(base) else base
+    started = time.perf_counter()
+    index = search.CatalogSearch(entries)
+    build_s = time.perf_counter() - started
+
+    times = []
+    for _ in range(repeat):
+        for query in QUERIES:
+            started = time.perf_counter()
+            index.search(query)
+            times.append(time.perf_counter() - started)
+    times_ms = sorted(t * 1000 for t in times)
+    return {
+        'entries': len(entries),
+        'terms': len(index.vocabulary),
+        'build_ms': round(build_s * 1000, 1),
+        'p50_ms': round(statistics.median(times_ms), 4),
+        'p99_ms': round(times_ms[int(len(times_ms) * 0.99)], 4),
+        'max_ms': round(times_ms[-1], 4),
+        'slowest_query': max(QUERIES, key=lambda q: min(_time(index, q) for _ in range(5)))
+    }
+
+
+def _time(index, query):
+    started = time.perf_counter()
+    index.search(query)
+    return time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark catalog search.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[0, 10_000, 50_000],
+                        help="catalog sizes (0 = the real catalog only)")
+    parser.add_argument('--repeat', type=int, default=200, help="passes over the query mix per size")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, REPO_DIR)
+    over = False
+    for size in args.sizes:
+        result = benchmark(size, args.repeat)
+        print("  ".join(f"{metric}: {value}" for metric, value in result.items()))
+        over = over or result['p99_ms'] > QUERY_BUDGET_MS
+    if over:
+        print(f"OVER BUDGET: p99 query time above {QUERY_BUDGET_MS} ms")
+    return 1 if over else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
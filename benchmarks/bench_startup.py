@@ -0,0 +1,131 @@
+# bench_startup.py - Cold-start budget for the app's first page
+#
+# Each round starts a fresh interpreter under python -X importtime, warms
+# Streamlit's own machinery with an empty script, then runs app.py once
+# through AppTest, the way a new server process paints its first page.
+# Reported per round: first paint time, time spent importing the app's own
+# modules and dependencies (from the importtime log, top-level imports
+# during the app run only; Streamlit's lazily loaded parts are listed but
+# not counted) and the slowest of those imports.
+#
+#     python benchmarks/bench_startup.py             # median of 5 rounds
+#     python benchmarks/bench_startup.py --rounds 9
+#
+# The command exits with status 1 when the median first paint or import
+# time is over STARTUP_BUDGET_MS, or when any round imports a module in
+# LAZY_MODULES: those belong to exports, charts, uploads and later wizard
+# steps and must only be imported when one is used.
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+APP_PATH = os.path.join(REPO_DIR, 'app.py')
+
+# About 1.5x what a fresh checkout measures, like bench_app's tolerance
+STARTUP_BUDGET_MS = {
+    'first_paint_ms': 600.0,
+    'import_ms': 40.0,
+}
+LAZY_MODULES = (
+    # Third-party
+    'numpy', 'pandas', 'pyarrow', 'jinja2', 'openpyxl', 'reportlab', 'docx', 'fitz', 'sqlite3', 'yaml',
+    # App modules that pull those in
+    'budget', 'charts', 'jobs', 'precompute', 'reports', 'roster', 'scenarios', 'scoring', 'search', 'segment',
+    'specialty_rules', 'store', 'strategy_rules', 'views',
+)
+MARKER = 'bench_startup: app run'
+SLOWEST = 5
+
+
+def child():
+    """Runs in the fresh interpreter; prints the round's result as JSON."""
+    from streamlit.testing.v1 import AppTest
+
+    with tempfile.NamedTemporaryFile('w', suffix='.py', delete=False) as f:
+        f.write("import streamlit as st\nst.title('warm-up')\n")
+    try:
+        AppTest.from_file(f.name).run()
+    finally:
+        os.unlink(f.name)
+
+    sys.path.insert(0, REPO_DIR)
+    before = set(sys.modules)
+    print(MARKER, file=sys.stderr, flush=True)
+    started = time.perf_counter()
+    at = AppTest.from_file(APP_PATH, default_timeout=60)
+    at.run()
+    first_paint = time.perf_counter() - started
+    if at.exception:
+        raise RuntimeError(f"app raised: {at.exception[0].value}")
+    loaded = set(sys.modules) - before
+    print(json.dumps({
+        'first_paint_ms': round(first_paint * 1000, 1),
+        'lazy_loaded': sorted(name for name in LAZY_MODULES if name in loaded)
+    }))
+
+
+def parse_importtime(stderr):
+    """(app ms, [(ms, module)] slowest first) of top-level imports after MARKER."""
+    imports = []
+    seen_marker = False
+    for line in stderr.splitlines():
+        if line.startswith(MARKER):
+            seen_marker = True
+            continue
+        if not seen_marker or not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        if name.startswith('  '):
+            continue  # nested import, already in its parent's cumulative time
+        imports.append((int(cumulative) / 1000, name.strip()))
+    imports.sort(reverse=True)
+    return sum(ms for ms, name in imports if name.split('.')[0] != 'streamlit'), imports
+
+
+def run_round():
+    env = dict(os.environ, MARKETING_PROFILE='0')
+    proc = subprocess.run([sys.executable, '-X', 'importtime', os.path.abspath(__file__), '--child'],
+                          capture_output=True, text=True, env=env, cwd=REPO_DIR)
+    if proc.returncode != 0:
+        raise RuntimeError(f"startup round failed:\n{proc.stderr[-2000:]}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result['import_ms'], result['slowest'] = parse_importtime(proc.stderr)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure and enforce the app's cold-start budget.")
+    parser.add_argument('--rounds', type=int, default=5, help="fresh interpreters to measure (median is gated)")
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        child()
+        return 0
+
+    rounds = [run_round() for _ in range(args.rounds)]
+    result = {metric: round(statistics.median(r[metric] for r in rounds), 1) for metric in STARTUP_BUDGET_MS}
+    for metric, value in result.items():
+        print(f"{metric:>16}: {value} (budget {STARTUP_BUDGET_MS[metric]})")
+    slowest = max(rounds, key=lambda r: r['import_ms'])['slowest'][:SLOWEST]
+    print("  slowest imports: " + ", ".join(f"{name} {ms:.1f} ms" for ms, name in slowest))
+
+    failures = [f"{metric}: {value} > {STARTUP_BUDGET_MS[metric]}"
+                for metric, value in result.items() if value > STARTUP_BUDGET_MS[metric]]
+    lazy_loaded = sorted({name for r in rounds for name in r['lazy_loaded']})
+    if lazy_loaded:
+        failures.append(f"imported on first paint: {', '.join(lazy_loaded)}")
+    for failure in failures:
+        print(f"OVER BUDGET {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,135 @@
+# bench_workers.py - Memory and startup of several server processes sharing the plan table
+#
+# Publishes the plan table segment (segment.py) to a temporary file, then
+# starts N fresh worker interpreters side by side in each of two modes:
+#   shared   load_table() attaches to the published segment, as app workers do
+#   private  build_table() in every worker, as each process did before
+# Each worker builds its scenario index and looks up PLANS random plans and
+# their scenario grids, then reports once all workers are up:
+#   ready_ms     time to a usable table and scenario index
+#   rebuilt      whether it computed any plan output itself
+#   private_kb   memory only this process uses, added by the table and index
+#   pss_kb       the same with shared pages split between the processes
+# (memory from /proc/self/smaps_rollup, so Linux only).
+#
+#     python benchmarks/bench_workers.py               # 4 workers
+#     python benchmarks/bench_workers.py --workers 8
+#
+# Exits with status 1 if a shared worker rebuilds anything or uses more
+# private memory than a private one.
+
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+PLANS = 200
+MODES = ('shared', 'private')
+
+
+def memory_kb():
+    """(private, Pss) KB of this process, or None where smaps_rollup is unavailable."""
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            fields = dict(line.split(':', 1) for line in f if ':' in line)
+    except OSError:
+        return None
+    kb = {name: int(value.split()[0]) for name, value in fields.items() if value.strip().endswith('kB')}
+    return kb['Private_Clean'] + kb['Private_Dirty'], kb['Pss']
+
+
+def child(mode, path, seed):
+    """Runs in a fresh interpreter: loads the table, reports, waits for a line on stdin, reports memory."""
+    sys.path.insert(0, REPO_DIR)
+    import engine
+    import precompute
+    import scenarios
+
+    before = memory_kb()
+    started = time.perf_counter()
+    table = precompute.load_table(path) if mode == 'shared' else precompute.build_table()
+    index = scenarios.ScenarioIndex(table)
+    ready = time.perf_counter() - started
+
+    rng = random.Random(seed)
+    for _ in range(PLANS):
+        profile = precompute.decode_profile(rng.randrange(precompute.TABLE_SIZE))
+        table[precompute.profile_code(profile)]
+        if profile.specialty and profile.marketing_focus:
+            index.grid(profile)
+    print(json.dumps({'ready_ms': round(ready * 1000, 1), 'rebuilt': engine.plan_graph.stats()['misses'] > 0}),
+          flush=True)
+
+    sys.stdin.readline()  # measure while every worker is alive, so shared pages are split between them
+    after = memory_kb()
+    print(json.dumps({} if before is None else {
+        'private_kb': after[0] - before[0],
+        'pss_kb': after[1] - before[1]
+    }), flush=True)
+
+
+def run_workers(mode, path, workers):
+    command = [sys.executable, os.path.abspath(__file__), '--child', mode, path]
+    procs = [subprocess.Popen(command + [str(seed)], stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+                              cwd=REPO_DIR) for seed in range(workers)]
+    results = [json.loads(proc.stdout.readline()) for proc in procs]
+    for proc, result in zip(procs, results):
+        proc.stdin.write('\n')
+        proc.stdin.flush()
+        result.update(json.loads(proc.stdout.readline()))
+    for proc in procs:
+        proc.stdin.close()
+        if proc.wait() != 0:
+            raise RuntimeError(f"{mode} worker exited with status {proc.returncode}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark server processes sharing the plan table.")
+    parser.add_argument('--workers', type=int, default=4, help="worker processes per mode")
+    parser.add_argument('--child', nargs=3, metavar=('MODE', 'PATH', 'SEED'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        mode, path, seed = args.child
+        child(mode, path, int(seed))
+        return 0
+
+    sys.path.insert(0, REPO_DIR)
+    import precompute
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'strategy_table.seg')
+        started = time.perf_counter()
+        precompute.save_table(path)
+        print(f"published {os.path.getsize(path) // 1024} KB segment in "
+              f"{(time.perf_counter() - started) * 1000:.0f} ms")
+        results = {mode: run_workers(mode, path, args.workers) for mode in MODES}
+
+    summary = {}
+    for mode, workers in results.items():
+        summary[mode] = {metric: round(statistics.median(w[metric] for w in workers), 1)
+                         for metric in ('ready_ms', 'private_kb', 'pss_kb') if metric in workers[0]}
+        summary[mode]['rebuilt'] = sum(w['rebuilt'] for w in workers)
+        print(f"{mode:>8}: " + "  ".join(f"{metric}: {value}" for metric, value in summary[mode].items()))
+
+    failures = []
+    if summary['shared']['rebuilt']:
+        failures.append(f"{summary['shared']['rebuilt']} shared workers rebuilt plans")
+    if 'private_kb' in summary['shared'] and summary['shared']['private_kb'] >= summary['private']['private_kb']:
+        failures.append(f"shared private_kb {summary['shared']['private_kb']} >= "
+                        f"private {summary['private']['private_kb']}")
+    for failure in failures:
+        print(f"FAILED {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
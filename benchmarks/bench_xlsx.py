@@ -0,0 +1,95 @@
+# bench_xlsx.py - Throughput and memory of the streaming XLSX roster export
+#
+# Writes synthetic doctor records (every specialty, experience band,
+# practice type and focus area, cycled, each with a unique id and name)
+# through roster.XlsxWriter and reports doctor rows per second (each row is
+# one line on each of the six dimension sheets; a few rows have blank
+# cells, as real rosters do) and how much the process's
+# peak RSS grew. Sizes run smallest first: with openpyxl's write-only mode
+# the larger rosters should not raise the peak noticeably. (tracemalloc
+# would slow openpyxl down several times, so it is not used.)
+#
+#     python benchmarks/bench_xlsx.py                 # 5,000 and 50,000 rows
+#     python benchmarks/bench_xlsx.py --rows 10000 100000
+
+import argparse
+import itertools
+import os
+import resource
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+
+def base_records():
+    import roster
+    from catalog import MARKETING_FOCUS_AREAS, MEDICAL_SPECIALTIES, PATIENT_TYPES, PRACTICE_TYPES, YEARS_EXPERIENCE
+
+    rows = [
+        {'specialty': specialty, 'years_experience': experience, 'practice_type': practice,
+         'marketing_focus': focus, 'patient_types': patients}
+        for specialty, experience, practice, focus, patients in itertools.islice(zip(
+            itertools.cycle(MEDICAL_SPECIALTIES),
+            itertools.cycle(YEARS_EXPERIENCE),
+            itertools.cycle(PRACTICE_TYPES),
+            itertools.cycle(MARKETING_FOCUS_AREAS),
+            itertools.cycle(PATIENT_TYPES),
+        ), 2520)
+    ]
+    # Blank cells are valid answers ("not selected") and must export too
+    rows.append({'specialty': '', 'years_experience': '6-10 years', 'practice_type': '', 'marketing_focus': '',
+                 'patient_types': ''})
+    rows.append({'specialty': '', 'years_experience': '', 'practice_type': '', 'marketing_focus': '',
+                 'patient_types': ''})
+    columns = {field: field for field in rows[0]}
+    return roster.process_chunk(0, rows, columns)
+
+
+def records(base, count):
+    for row, record in zip(range(count), itertools.cycle(base)):
+        yield dict(record, row=row, doctor_id=f"D{row:06d}", doctor_name=f"Doctor {row}")
+
+
+def max_rss_mb():
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def write(base, count, path):
+    import roster
+
+    rss_before = max_rss_mb()
+    started = time.perf_counter()
+    writer = roster.XlsxWriter(path)
+    for record in records(base, count):
+        writer.write(record)
+    writer.close()
+    elapsed = time.perf_counter() - started
+    return {
+        'rows': count,
+        'seconds': round(elapsed, 3),
+        'rows_per_s': round(count / elapsed, 1),
+        'max_rss_mb': max_rss_mb(),
+        'rss_growth_mb': round(max_rss_mb() - rss_before, 1),
+        'file_mb': round(os.path.getsize(path) / 2 ** 20, 2)
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the streaming XLSX roster export.")
+    parser.add_argument('--rows', type=int, nargs='+', default=[5000, 50000], help="roster sizes to write")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, REPO_DIR)
+    base = base_records()
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in sorted(args.rows):
+            result = write(base, count, os.path.join(tmp, f'roster-{count}.xlsx'))
+            print("  ".join(f"{metric}={value}" for metric, value in result.items()))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
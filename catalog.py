@@ -0,0 +1,229 @@
+# catalog.py - Domain catalogs for the Medical Professional Marketing Strategy Tool
+#
+# The catalog data lives in catalog.yaml. On import it is compiled into
+# frozen __slots__ records (lists become tuples, strings are interned) and
+# the compiled form is pickled to catalog.cache, keyed by the SHA-256 of the
+# YAML source, so later imports skip YAML parsing entirely. Records answer
+# entry['name'] and entry.get('aspects') like the dicts they replace.
+#
+# Plain data only: no Streamlit import, so the catalogs can be shared by the
+# app, the strategy engine and offline tooling.
+
+import hashlib
+import os
+import pickle
+import sys
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+CATALOG_PATH = os.path.join(_HERE, 'catalog.yaml')
+CACHE_PATH = os.path.join(_HERE, 'catalog.cache')
+
+# Bump when the compiled representation changes so stale caches are ignored
+CACHE_FORMAT = 1
+
+
+class Record:
+    """Frozen catalog entry; one subclass with matching __slots__ per field set."""
+
+    __slots__ = ()
+    _fields = ()
+    _field_set = frozenset()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"catalog records are read-only ({name!r})")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"catalog records are read-only ({name!r})")
+
+    def __getitem__(self, field):
+        if field not in self._field_set:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def get(self, field, default=None):
+        if field not in self._field_set:
+            return default
+        return getattr(self, field)
+
+    def __contains__(self, field):
+        return field in self._field_set
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def keys(self):
+        return self._fields
+
+    def values(self):
+        return tuple(getattr(self, field) for field in self._fields)
+
+    def items(self):
+        return tuple((field, getattr(self, field)) for field in self._fields)
+
+    def __eq__(self, other):
+        if not isinstance(other, Record):
+            return NotImplemented
+        return self._fields == other._fields and self.values() == other.values()
+
+    def __hash__(self):
+        return hash((self._fields, self.values()))
+
+    def __repr__(self):
+        body = ', '.join(f"{field}={getattr(self, field)!r}" for field in self._fields)
+        return f"Record({body})"
+
+    def __reduce__(self):
+        return (make_record, (self._fields, self.values()))
+
+
+_record_classes = {}
+
+
+def make_record(fields, values):
+    cls = _record_classes.get(fields)
+    if cls is None:
+        cls = type('Record', (Record,), {
+            '__slots__': fields,
+            '_fields': fields,
+            '_field_set': frozenset(fields)
+        })
+        _record_classes[fields] = cls
+    record = object.__new__(cls)
+    for field, value in zip(fields, values):
+        object.__setattr__(record, field, value)
+    return record
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        fields = tuple(sys.intern(str(field)) for field in value)
+        return make_record(fields, tuple(_freeze(v) for v in value.values()))
+    if isinstance(value, list):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, str):
+        return sys.intern(value)
+    return value
+
+
+def compile_catalogs(source):
+    """Compile parsed YAML into {section: catalog}.
+
+    Each section stays a plain dict (or tuple, for lists) keyed by catalog
+    key; the entries below it become records.
+    """
+    catalogs = {}
+    for section, data in source.items():
+        if isinstance(data, dict):
+            catalogs[section] = {
+                sys.intern(key) if isinstance(key, str) else key: _freeze(entry)
+                for key, entry in data.items()
+            }
+        else:
+            catalogs[section] = _freeze(data)
+    return catalogs
+
+
+def load_catalogs(path=CATALOG_PATH, cache_path=CACHE_PATH):
+    """Compiled catalogs from the cache when it matches the YAML, else from the YAML."""
+    with open(path, 'rb') as f:
+        source = f.read()
+    digest = hashlib.sha256(source).hexdigest()
+    try:
+        with open(cache_path, 'rb') as f:
+            cached = pickle.load(f)
+        if cached['format'] == CACHE_FORMAT and cached['digest'] == digest:
+            return cached['catalogs']
+    except (OSError, pickle.UnpicklingError, EOFError, KeyError, TypeError, AttributeError):
+        pass
+
+    import yaml
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    catalogs = compile_catalogs(yaml.load(source, Loader=loader))
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'format': CACHE_FORMAT, 'digest': digest, 'catalogs': catalogs}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # A read-only install still works, it just parses the YAML each start
+        pass
+    return catalogs
+
+
+_catalogs = load_catalogs()
+
+MEDICAL_SPECIALTIES = _catalogs['medical_specialties']
+YEARS_EXPERIENCE = _catalogs['years_experience']
+PRACTICE_TYPES = _catalogs['practice_types']
+PATIENT_TYPES = _catalogs['patient_types']
+DIAGNOSTIC_FACILITIES = _catalogs['diagnostic_facilities']
+COMPETITIVE_FACTORS = _catalogs['competitive_factors']
+MARKETING_FOCUS_AREAS = _catalogs['marketing_focus_areas']
+BRAND_STRATEGIES = _catalogs['brand_strategies']
+STRATEGY_PHASES = _catalogs['strategy_phases']
+PHASE_LABELS = _catalogs['phase_labels']
+
+
+class CatalogIndex:
+    """Key, display name and ordinal lookups for one catalog, built once at import.
+
+    Ordinals follow catalog order, so a set of entries can be kept as an int
+    bitmask with bit(key) and read back in catalog order with keys_in(mask).
+    """
+
+    __slots__ = ('keys', 'names', 'ordinals', 'keys_by_name')
+
+    def __init__(self, catalog):
+        self.keys = tuple(catalog)
+        if isinstance(catalog, dict):
+            self.names = tuple(
+                entry if isinstance(entry, str) else entry['name'] for entry in catalog.values()
+            )
+        else:
+            self.names = self.keys
+        self.ordinals = {key: i for i, key in enumerate(self.keys)}
+        self.keys_by_name = dict(zip(self.names, self.keys))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self.ordinals
+
+    def name(self, key):
+        return self.names[self.ordinals[key]]
+
+    def key(self, name, default=None):
+        return self.keys_by_name.get(name, default)
+
+    def bit(self, key):
+        return 1 << self.ordinals[key]
+
+    def mask(self, keys):
+        mask = 0
+        for key in keys:
+            mask |= 1 << self.ordinals[key]
+        return mask
+
+    def keys_in(self, mask):
+        return [key for i, key in enumerate(self.keys) if mask >> i & 1]
+
+
+SPECIALTY_INDEX = CatalogIndex(MEDICAL_SPECIALTIES)
+EXPERIENCE_INDEX = CatalogIndex(YEARS_EXPERIENCE)
+PRACTICE_INDEX = CatalogIndex(PRACTICE_TYPES)
+PATIENT_INDEX = CatalogIndex(PATIENT_TYPES)
+FACILITY_INDEX = CatalogIndex(DIAGNOSTIC_FACILITIES)
+FACTOR_INDEX = CatalogIndex(COMPETITIVE_FACTORS)
+FOCUS_INDEX = CatalogIndex(MARKETING_FOCUS_AREAS)
+STRATEGY_INDEX = CatalogIndex(BRAND_STRATEGIES)
+
+# Selected-strategy bitmask of each phase
+PHASE_MASKS = {
+    phase: STRATEGY_INDEX.mask(key for key, p in STRATEGY_PHASES.items() if p == phase)
+    for phase in PHASE_LABELS
+}
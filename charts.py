@@ -0,0 +1,98 @@
+# charts.py - Plotly figures for the app, memoized per input
+#
+# Building a Plotly figure takes around 10 ms, far more than the rest of a
+# rerun. The charts here depend only on small discrete inputs (six 0-3
+# ratings have 4^6 = 4096 combinations, 729 of them complete), so each
+# figure is built once per distinct input and reused; Streamlit then only
+# serializes the cached figure. Callers must not modify returned figures.
+#
+# Budget projections are drawn from precomputed percentiles (budget.project),
+# never from the raw samples, so the figure stays a few kilobytes.
+
+import functools
+
+import plotly.graph_objects as go
+
+from catalog import FACTOR_INDEX
+
+RADAR_HEIGHT = 380
+RATING_TICKS = {1: 'Needs Improvement', 2: 'Average', 3: 'Strong'}
+
+
+@functools.lru_cache(maxsize=1024)
+def radar(ratings, peers=None):
+    """Radar of per-factor ratings (tuple of 0-3 in FACTOR_INDEX order, 0 = unrated).
+
+    peers, if given, is a tuple of average ratings drawn as a dashed overlay;
+    round them first so the cache stays small.
+    """
+    # Close the polygon by repeating the first point
+    theta = list(FACTOR_INDEX.names) + [FACTOR_INDEX.names[0]]
+    fig = go.Figure()
+    fig.add_trace(go.Scatterpolar(
+        r=list(ratings) + [ratings[0]],
+        theta=theta,
+        fill='toself',
+        name='Your practice',
+        line=dict(color='#3b82f6')
+    ))
+    if peers is not None:
+        fig.add_trace(go.Scatterpolar(
+            r=list(peers) + [peers[0]],
+            theta=theta,
+            name='Peer average',
+            line=dict(color='#f59e0b', dash='dash')
+        ))
+    fig.update_layout(
+        polar=dict(radialaxis=dict(range=[0, 3], tickvals=list(RATING_TICKS), ticktext=list(RATING_TICKS.values()))),
+        showlegend=peers is not None,
+        legend=dict(orientation='h', y=-0.1),
+        height=RADAR_HEIGHT,
+        margin=dict(l=60, r=60, t=30, b=30)
+    )
+    return fig
+
+
+@functools.lru_cache(maxsize=256)
+def budget_projection(labels, values):
+    """Box per spend category from (p5, p25, p50, p75, p95) tuples, whiskers at p5/p95."""
+    fig = go.Figure()
+    for label, (p5, p25, p50, p75, p95) in zip(labels, values):
+        fig.add_trace(go.Box(
+            name=label,
+            q1=[p25], median=[p50], q3=[p75], lowerfence=[p5], upperfence=[p95],
+            orientation='h',
+            marker_color='#10b981' if label == labels[-1] else '#3b82f6',
+            hovertemplate=f"{label}<br>5th-95th: ${p5:,.0f} - ${p95:,.0f}<br>Median: ${p50:,.0f}<extra></extra>"
+        ))
+    fig.update_layout(
+        xaxis=dict(title='Annual spend ($)', tickformat='$,.0f'),
+        yaxis=dict(autorange='reversed'),
+        showlegend=False,
+        height=80 + 60 * len(labels),
+        margin=dict(l=10, r=20, t=20, b=40)
+    )
+    return fig
+
+
+@functools.lru_cache(maxsize=256)
+def heatmap(z, text, hover, x, y, colorscale, zmin, zmax, colorbar_title, current=None):
+    """Annotated heatmap from nested tuples (rows follow y, columns x).
+
+    current, a (row, column) pair, is outlined.
+    """
+    fig = go.Figure(go.Heatmap(
+        z=z, x=x, y=y, text=text, texttemplate='%{text}', hovertext=hover, hoverinfo='text',
+        colorscale=colorscale, zmin=zmin, zmax=zmax, colorbar=dict(title=colorbar_title)
+    ))
+    if current is not None:
+        row, column = current
+        fig.add_shape(type='rect', x0=column - 0.5, x1=column + 0.5, y0=row - 0.5, y1=row + 0.5,
+                      line=dict(color='#111827', width=3))
+    fig.update_layout(
+        xaxis=dict(side='top', tickangle=0),
+        yaxis=dict(autorange='reversed', title='Experience'),
+        height=120 + 60 * len(y),
+        margin=dict(l=10, r=10, t=60, b=10)
+    )
+    return fig
@@ -0,0 +1,449 @@
+# engine.py - Session-free strategy engine
+#
+# Every function here takes an explicit Profile instead of reading
+# st.session_state, so strategies can be generated outside a running
+# Streamlit script and in bulk via generate_many(). Nothing in this module
+# imports Streamlit.
+#
+# The derived outputs form a small dependency graph (PLAN_NODES): each one
+# declares the Profile fields and other outputs it is computed from, and
+# plan_graph memoizes it under just those answers. The experience strategy
+# is computed once per experience band whatever the other answers are, and
+# a plan that differs from a known one only in marketing focus reuses
+# everything but the recommended strategies. plan_graph.stats() counts hits
+# and misses per output (shown in the app's render profile panel).
+#
+# Returned dicts and lists are shared between calls (and between profiles
+# with the same answers); treat them as read-only.
+#
+# Profile and the catalogs are needed for the app's first page; scoring (and
+# with it NumPy) is imported on the first recommendation instead.
+
+import threading
+from operator import attrgetter
+from typing import Callable, NamedTuple, Optional, Tuple
+
+from catalog import (
+    MARKETING_FOCUS_AREAS,
+    MEDICAL_SPECIALTIES,
+    PRACTICE_TYPES,
+    YEARS_EXPERIENCE,
+)
+
+
+class Profile(NamedTuple):
+    specialty: Optional[str] = None
+    years_experience: Optional[str] = None
+    practice_type: Optional[str] = None
+    patient_types: Tuple[str, ...] = ()
+    services_offered: Tuple[str, ...] = ()
+    competitive_positioning: Tuple[Tuple[str, str], ...] = ()  # (factor key, rating) pairs
+    marketing_focus: Optional[str] = None
+
+
+# Experience-based strategies
+EXPERIENCE_STRATEGIES = {
+    '0-5 years': {
+        'focus': 'Establishing credibility and building initial patient base',
+        'key_actions': [
+            'Network with senior doctors for referrals',
+            'Build strong online presence with patient reviews',
+            'Offer competitive pricing to attract initial patients',
+            'Participate in local health camps and community events'
+        ],
+        'branding_priorities': ['Professional website', 'Patient testimonials', 'Local SEO'],
+        'budget_allocation': '70% digital marketing, 30% community outreach'
+    },
+    '6-10 years': {
+        'focus': 'Expanding practice and establishing specialization',
+        'key_actions': [
+            'Develop niche specialization within field',
+            'Build systematic referral networks',
+            'Enhance patient experience with technology',
+            'Start academic contributions through publications'
+        ],
+        'branding_priorities': ['Specialization branding', 'Patient referral system', 'Advanced certifications'],
+        'budget_allocation': '50% specialization marketing, 30% patient retention, 20% professional development'
+    },
+    '11-15 years': {
+        'focus': 'Leadership positioning and practice expansion',
+        'key_actions': [
+            'Mentor junior doctors and build team',
+            'Increase academic involvement and speaking engagements',
+            'Diversify practice with premium services',
+            'Develop standardized patient care protocols'
+        ],
+        'branding_priorities': ['Thought leadership', 'Team branding', 'Premium services'],
+        'budget_allocation': '40% team building, 30% premium services, 30% academic presence'
+    },
+    '16-20 years': {
+        'focus': 'Legacy building and practice succession',
+        'key_actions': [
+            'Develop junior partners for practice succession',
+            'Systematize practice operations',
+            'Increase community leadership roles',
+            'Focus on complex and interesting cases'
+        ],
+        'branding_priorities': ['Institutional reputation', 'Succession planning', 'Complex case branding'],
+        'budget_allocation': '50% institutional branding, 30% team development, 20% community impact'
+    },
+    '>20 years': {
+        'focus': 'Thought leadership and lasting legacy',
+        'key_actions': [
+            'Publish expertise through books and papers',
+            'Take industry leadership positions',
+            'Focus on philanthropy and social contribution',
+            'Develop training programs for next generation'
+        ],
+        'branding_priorities': ['Industry influence', 'Philanthropy branding', 'Training center establishment'],
+        'budget_allocation': '40% industry leadership, 30% social impact, 30% training programs'
+    }
+}
+
+# Practice recommendations by practice scale
+SCALE_RECOMMENDATIONS = {
+    'Small': {
+        'marketing_channels': ['Local SEO', 'Google My Business', 'Community newspapers', 'Local health camps'],
+        'team_structure': ['Receptionist with basic marketing skills', 'Part-time social media manager', 'Billing assistant'],
+        'technology_needs': ['Basic website', 'Appointment software', 'Electronic medical records', 'Payment gateway'],
+        'partnership_opportunities': ['Local pharmacies', 'Gymnasiums', 'Community centers', 'Local corporations']
+    },
+    'Medium': {
+        'marketing_channels': ['Digital marketing mix', 'Local TV/radio', 'Health magazines', 'Corporate tie-ups'],
+        'team_structure': ['Dedicated reception staff', 'Marketing coordinator', 'Patient relationship manager'],
+        'technology_needs': ['Advanced website with booking', 'CRM system', 'Telemedicine platform', 'Analytics tools'],
+        'partnership_opportunities': ['Insurance companies', 'Corporate HR departments', 'Other specialist clinics', 'Diagnostic centers']
+    },
+    'Large': {
+        'marketing_channels': ['Comprehensive digital strategy', 'TV commercials', 'National publications', 'Medical tourism portals'],
+        'team_structure': ['Full marketing team', 'PR manager', 'Digital marketing specialists', 'Patient experience team'],
+        'technology_needs': ['Enterprise software', 'Advanced analytics', 'Mobile apps', 'AI integration'],
+        'partnership_opportunities': ['International hospitals', 'Medical device companies', 'Research institutions', 'Government programs']
+    },
+    'Very Large': {
+        'marketing_channels': ['Brand campaigns', 'International marketing', 'Research publications', 'Industry conferences'],
+        'team_structure': ['Corporate marketing department', 'Brand managers', 'International marketing team', 'Research coordinators'],
+        'technology_needs': ['Global systems', 'Advanced data analytics', 'International telemedicine', 'Research databases'],
+        'partnership_opportunities': ['Global health organizations', 'International universities', 'Pharmaceutical companies', 'Government health departments']
+    }
+}
+
+EMPTY_PRACTICE_RECOMMENDATIONS = {
+    'marketing_channels': [],
+    'team_structure': [],
+    'technology_needs': [],
+    'partnership_opportunities': []
+}
+
+# Strategies added to every comprehensive plan
+UNIVERSAL_STRATEGIES = {
+    'patient_acquisition': [
+        'Online appointment booking optimization',
+        'Referral incentive program implementation',
+        'Health camp participation strategy',
+        'Corporate health program development'
+    ],
+    'patient_retention': [
+        'Systematic follow-up protocol',
+        'Patient education program development',
+        'Loyalty benefits for returning patients',
+        'Annual health review system'
+    ],
+    'reputation_management': [
+        'Quarterly patient feedback collection',
+        'Online review management system',
+        'Transparent outcome reporting mechanism',
+        'Quality accreditation pursuit'
+    ],
+    'financial_planning': [
+        'Marketing budget allocation planning',
+        'Revenue diversification strategy',
+        'Cost optimization analysis',
+        'ROI tracking system'
+    ]
+}
+
+# Strategy framework tabs on the plan page: (tab label, strategy dimension, heading)
+STRATEGY_TABS = [
+    ('Patient Acquisition', 'patient_acquisition', 'Patient Acquisition Strategies'),
+    ('Patient Retention', 'patient_retention', 'Patient Retention Strategies'),
+    ('Brand Building', 'personal_branding', 'Brand Building Strategies'),
+    ('Professional Growth', 'professional_development', 'Professional Development Strategies'),
+    ('Financial Planning', 'financial_planning', 'Financial Planning Strategies')
+]
+
+# 12-month implementation plan, the same for every profile
+IMPLEMENTATION_TIMELINE = [
+    ('Months 1-3', ['Foundation Building', 'Digital Presence Setup', 'Team Training']),
+    ('Months 4-6', ['Strategy Implementation', 'Marketing Campaigns', 'Network Building']),
+    ('Months 7-9', ['Performance Analysis', 'Strategy Refinement', 'Service Expansion']),
+    ('Months 10-12', ['Scale Successful Programs', 'Advanced Brand Building', 'Annual Review'])
+]
+
+# Immediate action items (next 30 days): (heading, items, numbered)
+IMMEDIATE_ACTIONS = [
+    ('Week 1-2', ['Set up Google My Business', 'Create social media profiles', 'Design patient intake forms'], True),
+    ('Week 3-4', ['Launch basic website', 'Set up appointment system', 'Create patient education materials'], True),
+    ('Metrics to Track', ['New patient inquiries', 'Website traffic', 'Patient satisfaction', 'Revenue growth'], False)
+]
+
+# Brand Building budget guide
+BUDGET_GUIDE = [
+    ('Low Budget (< $5,000/yr)', ['Focus on free tools', 'DIY content creation', 'Local networking']),
+    ('Medium Budget ($5,000-$20,000/yr)', ['Professional website', 'Basic marketing campaigns', 'Training programs']),
+    ('High Budget ($20,000+/yr)', ['Full marketing team', 'Advanced technology', 'Research projects'])
+]
+
+def _experience(profile):
+    if not profile.years_experience:
+        return {}
+    return EXPERIENCE_STRATEGIES.get(profile.years_experience, {})
+
+
+def _specialty(profile):
+    if not profile.specialty:
+        return {}
+    import specialty_rules  # specialty_rules.yaml, reloaded by the app when edited
+
+    return specialty_rules.rules.get(profile.specialty)
+
+
+def _rules_version():
+    import specialty_rules
+
+    return specialty_rules.rules.digest
+
+
+def _practice(profile):
+    if not profile.practice_type:
+        return {}
+    scale = PRACTICE_TYPES.get(profile.practice_type, {}).get('scale', '')
+    return SCALE_RECOMMENDATIONS.get(scale, EMPTY_PRACTICE_RECOMMENDATIONS)
+
+
+def _strategy(profile, exp_strategy, spec_rec, practice_rec):
+    return {
+        'personal_branding': list(exp_strategy.get('branding_priorities', [])),
+        'patient_acquisition': spec_rec.get('referral_sources', []) + UNIVERSAL_STRATEGIES['patient_acquisition'],
+        'patient_retention': list(UNIVERSAL_STRATEGIES['patient_retention']),
+        'professional_development': list(practice_rec.get('technology_needs', [])),
+        'reputation_management': spec_rec.get('brand_differentiators', []) + UNIVERSAL_STRATEGIES['reputation_management'],
+        'financial_planning': list(UNIVERSAL_STRATEGIES['financial_planning'])
+    }
+
+
+def _recommended(profile):
+    if not profile.marketing_focus:
+        return []
+    import scoring  # NumPy, only needed once a focus is chosen
+
+    return scoring.recommend(profile.marketing_focus)
+
+
+def _budget(profile, exp_strategy):
+    if not profile.practice_type:
+        return "Not available - select practice type"
+
+    budget_range = PRACTICE_TYPES.get(profile.practice_type, {}).get('marketing_budget', 'Not specified')
+
+    # Add recommendations based on experience
+    if exp_strategy:
+        return f"{budget_range} - Allocation: {exp_strategy.get('budget_allocation', '')}"
+
+    return budget_range
+
+
+# The outputs that make up a plan, in plan dict order
+PLAN_OUTPUTS = ('experience', 'specialty', 'practice', 'strategy', 'recommended', 'budget')
+
+
+def _plan(profile, *outputs):
+    return dict(zip(PLAN_OUTPUTS, outputs))
+
+
+class Node(NamedTuple):
+    fields: Tuple[str, ...]  # Profile fields read directly
+    inputs: Tuple[str, ...]  # nodes it is computed from, passed to compute after the profile
+    compute: Callable
+    version: Optional[Callable] = None  # version of outside data it reads (the specialty rules)
+
+
+# Every derived output and what it depends on
+PLAN_NODES = {
+    'experience': Node(('years_experience',), (), _experience),
+    'specialty': Node(('specialty',), (), _specialty, version=_rules_version),
+    'practice': Node(('practice_type',), (), _practice),
+    'strategy': Node((), ('experience', 'specialty', 'practice'), _strategy),
+    'recommended': Node(('marketing_focus',), (), _recommended),
+    'budget': Node(('practice_type',), ('experience',), _budget),
+    'plan': Node((), PLAN_OUTPUTS, _plan),
+}
+
+_MISSING = object()
+
+
+class DerivedGraph:
+    """Memoized derived outputs, each keyed by only the Profile fields it depends on.
+
+    A node's key is made of its own fields and those of its inputs, so
+    changing one answer only recomputes the nodes downstream of it; a new
+    version of a node's outside data drops that node and its dependents.
+    Hits and misses are counted per node.
+    """
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+        self.keys = {}  # node -> attrgetter for its key
+        self.versioned = {}  # node -> versioned nodes upstream of it (itself included)
+        self.dependents = {name: [] for name in nodes}
+        for name in nodes:
+            fields, upstream = self._closure(name)
+            self.keys[name] = attrgetter(*[f for f in Profile._fields if f in fields])
+            self.versioned[name] = tuple(n for n in upstream if nodes[n].version is not None)
+            for source in upstream:
+                self.dependents[source].append(name)
+        self.versioned_sources = tuple(name for name, node in nodes.items() if node.version is not None)
+        self.memo = {name: {} for name in nodes}
+        self.versions = {}
+        self.hits = dict.fromkeys(nodes, 0)
+        self.misses = dict.fromkeys(nodes, 0)
+        self._lock = threading.RLock()
+
+    def _closure(self, name):
+        node = self.nodes[name]
+        fields, upstream = set(node.fields), {name}
+        for input_name in node.inputs:
+            input_fields, input_upstream = self._closure(input_name)
+            fields |= input_fields
+            upstream |= input_upstream
+        return fields, upstream
+
+    def get(self, name, profile):
+        self.refresh(self.versioned[name])
+        return self._get(name, profile)
+
+    def cached(self, name, profile):
+        """The memoized value, or None; versions are not checked (call refresh() first)."""
+        value = self.memo[name].get(self.keys[name](profile))
+        if value is not None:
+            self.hits[name] += 1
+        return value
+
+    def refresh(self, sources=None):
+        """Drop outputs computed from an outdated version of the sources (default: all)."""
+        for source in self.versioned_sources if sources is None else sources:
+            if self.nodes[source].version() != self.versions.get(source, _MISSING):
+                self._invalidate(source)
+
+    def _get(self, name, profile):
+        value = self.memo[name].get(self.keys[name](profile), _MISSING)
+        if value is not _MISSING:
+            self.hits[name] += 1
+            return value
+        # Misses hold the lock so an invalidation cannot be overwritten by a stale result
+        with self._lock:
+            return self._get_locked(name, profile)
+
+    def _get_locked(self, name, profile):
+        memo = self.memo[name]
+        key = self.keys[name](profile)
+        value = memo.get(key, _MISSING)
+        if value is not _MISSING:
+            self.hits[name] += 1
+            return value
+        self.misses[name] += 1
+        node = self.nodes[name]
+        value = memo[key] = node.compute(profile, *[self._get_locked(input_name, profile) for input_name in node.inputs])
+        return value
+
+    def clear(self, names=None):
+        """Drop the memoized outputs of names (default: all nodes)."""
+        with self._lock:
+            for name in self.nodes if names is None else names:
+                self.memo[name] = {}
+
+    def _invalidate(self, source):
+        with self._lock:
+            version = self.nodes[source].version()
+            if self.versions.get(source, _MISSING) == version:
+                return
+            for name in self.dependents[source]:
+                self.memo[name] = {}
+            self.versions[source] = version
+
+    def stats(self):
+        hits = sum(self.hits.values())
+        misses = sum(self.misses.values())
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+            'nodes': {name: (self.hits[name], self.misses[name]) for name in self.nodes}
+        }
+
+
+plan_graph = DerivedGraph(PLAN_NODES)
+
+
+def get_experience_based_strategy(profile):
+    return plan_graph.get('experience', profile)
+
+
+def get_specialty_based_recommendations(profile):
+    return plan_graph.get('specialty', profile)
+
+
+def get_practice_type_recommendations(profile):
+    return plan_graph.get('practice', profile)
+
+
+def generate_comprehensive_strategy(profile):
+    return plan_graph.get('strategy', profile)
+
+
+def get_recommended_strategies(profile):
+    return plan_graph.get('recommended', profile)
+
+
+def calculate_marketing_budget(profile):
+    return plan_graph.get('budget', profile)
+
+
+def generate_plan(profile):
+    """Return every derived output for one profile as a single dict."""
+    return plan_graph.get('plan', profile)
+
+
+def plan_key(profile):
+    # Plans depend only on these answers; everything else is carried along
+    return (profile.specialty, profile.years_experience, profile.practice_type, profile.marketing_focus)
+
+
+def validate_profile(profile):
+    checks = (
+        ('specialty', profile.specialty, MEDICAL_SPECIALTIES),
+        ('years_experience', profile.years_experience, YEARS_EXPERIENCE),
+        ('practice_type', profile.practice_type, PRACTICE_TYPES),
+        ('marketing_focus', profile.marketing_focus, MARKETING_FOCUS_AREAS),
+    )
+    for field, value, allowed in checks:
+        if value is not None and value not in allowed:
+            raise ValueError(f"Unknown {field}: {value!r}")
+
+
+def generate_many(profiles):
+    """Generate plans for an iterable of profiles, in order.
+
+    Profiles that share the same answers share one plan object, so large
+    batches cost one dict lookup per profile after the first occurrence.
+    Raises ValueError for answers outside the catalogs.
+    """
+    plan_graph.refresh()
+    plans = []
+    for profile in profiles:
+        plan = plan_graph.cached('plan', profile)
+        if plan is None:
+            validate_profile(profile)
+            plan = plan_graph.get('plan', profile)
+        plans.append(plan)
+    return plans
@@ -0,0 +1,307 @@
+# jobs.py - Resumable bulk report jobs for hospital chains
+#
+# A job turns a roster (CSV or XLSX, read with roster.py) into one plan
+# document per doctor, collected in a single zip. Each job lives in its own
+# directory under MARKETING_JOB_DIR (default report_jobs/):
+#
+#     job.json        what to build: roster file, format, total rows
+#     roster.csv      the uploaded roster (or .xlsx)
+#     progress.json   state, rows done and failed, heartbeat (rewritten atomically)
+#     reports.zip     finished documents, appended as they complete
+#     cancel          present when a cancel was requested
+#
+# The runner is its own process (python jobs.py run JOB_DIR) so it can use
+# a process pool: a pool started inside the Streamlit script would re-run
+# app.py in every worker. Documents are rendered on the pool with at most
+# 2 x workers rows in flight and written into the zip by the runner as
+# each completes, so memory does not grow with the roster. Rendering goes
+# through the reports disk cache, so doctors with the same plan answers
+# share one render.
+#
+# Cancelling stops the runner at the next completion (or within a second);
+# resuming skips every row already in the zip. The zip is closed, writing
+# its directory, every CHECKPOINT_SECONDS and on exit; if the runner was
+# killed in between, the unreadable zip is set aside and rebuilt, mostly
+# from the report cache.
+
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+import uuid
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import roster
+
+JOB_DIR_ENV = 'MARKETING_JOB_DIR'
+DEFAULT_JOB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'report_jobs')
+DEFAULT_PRACTICE_TYPE = 'corporate_chain'
+FORMATS = ('pdf', 'docx')
+
+CHECKPOINT_SECONDS = 2.0
+HEARTBEAT_SECONDS = 0.5
+STALE_SECONDS = 10.0  # a running job with no heartbeat for this long has died
+
+_ROW_PREFIX = re.compile(r'^(\d+)-')
+
+
+def jobs_root():
+    return os.environ.get(JOB_DIR_ENV) or DEFAULT_JOB_DIR
+
+
+def job_path(job_id, name=''):
+    if not re.fullmatch(r'[0-9a-f]{32}', job_id):
+        raise ValueError(f"Invalid job id: {job_id!r}")
+    return os.path.join(jobs_root(), job_id, name)
+
+
+def _write_json(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def create_job(roster_name, roster_data, fmt='pdf', practice_type=DEFAULT_PRACTICE_TYPE):
+    """Store an uploaded roster as a new job and return its id. Raises ValueError for a bad roster."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown report format: {fmt!r}")
+    extension = '.xlsx' if roster_name.lower().endswith(('.xlsx', '.xlsm')) else '.csv'
+    job_id = uuid.uuid4().hex
+    os.makedirs(job_path(job_id))
+    # A rejected upload leaves nothing behind, not even the roster copy
+    try:
+        roster_path = job_path(job_id, 'roster' + extension)
+        with open(roster_path, 'wb') as f:
+            f.write(roster_data)
+        total = 0
+        columns = None
+        try:
+            for rows in roster.read_roster(roster_path):
+                if not rows:
+                    continue
+                if columns is None:
+                    columns = roster.resolve_columns(rows[0].keys())
+                total += len(rows)
+        except (zipfile.BadZipFile, KeyError) as exc:
+            # pandas' ParserError and EmptyDataError are already ValueErrors
+            raise ValueError(f"Not a readable {extension[1:].upper()} file ({exc})") from None
+        if not total:
+            raise ValueError("Roster has no rows")
+        _write_json(job_path(job_id, 'job.json'), {
+            'id': job_id,
+            'roster': os.path.basename(roster_path),
+            'roster_name': roster_name,
+            'format': fmt,
+            'practice_type': practice_type,
+            'total': total,
+            'created': time.time()
+        })
+    except BaseException:
+        shutil.rmtree(job_path(job_id), ignore_errors=True)
+        raise
+    return job_id
+
+
+def start_job(job_id, workers=None):
+    """Launch (or relaunch, to resume) the runner process for a job."""
+    try:
+        os.remove(job_path(job_id, 'cancel'))
+    except FileNotFoundError:
+        pass
+    # Replace the previous run's final state until the runner reports in
+    progress = _read_json(job_path(job_id, 'progress.json')) or {'done': 0, 'failed': {}}
+    progress.pop('finished', None)
+    _write_json(job_path(job_id, 'progress.json'), dict(progress, state='queued', heartbeat=time.time()))
+    command = [sys.executable, os.path.abspath(__file__), 'run', job_path(job_id)]
+    if workers is not None:
+        command += ['--workers', str(workers)]
+    with open(job_path(job_id, 'runner.log'), 'ab') as log:
+        subprocess.Popen(command, stdout=log, stderr=log, stdin=subprocess.DEVNULL, start_new_session=True)
+
+
+def cancel_job(job_id):
+    open(job_path(job_id, 'cancel'), 'w').close()
+
+
+def job_status(job_id):
+    """job.json merged with progress.json; state is one of new, queued,
+    running, done, cancelled, interrupted (runner died) or failed."""
+    job = _read_json(job_path(job_id, 'job.json'))
+    if job is None:
+        return None
+    progress = _read_json(job_path(job_id, 'progress.json')) or {'state': 'new', 'done': 0, 'failed': {}}
+    status = dict(job, **progress)
+    if status['state'] in ('queued', 'running') and time.time() - status.get('heartbeat', 0) > STALE_SECONDS:
+        status['state'] = 'interrupted'
+    status['zip_path'] = job_path(job_id, 'reports.zip')
+    return status
+
+
+# Runner side
+def _arcname(row, doctor_id, doctor_name, fmt):
+    label = '-'.join(part for part in (str(doctor_id), str(doctor_name)) if part) or 'doctor'
+    slug = re.sub(r'[^A-Za-z0-9]+', '-', label).strip('-')[:60] or 'doctor'
+    return f"{row:05d}-{slug}.{fmt}"
+
+
+def render_row(row, raw, columns, fmt, practice_type):
+    """Render one doctor's document; runs on the process pool. Returns (row, arcname, data, error)."""
+    import reports
+
+    fields = {field: raw.get(column, '') for field, column in columns.items()}
+    if not fields.get('practice_type'):
+        fields['practice_type'] = practice_type
+    name = _arcname(row, fields.get('doctor_id', ''), fields.get('doctor_name', ''), fmt)
+    try:
+        profile = roster.row_to_profile(fields)
+        return row, name, reports.report(profile, 0, fmt), None
+    except ValueError as exc:
+        return row, name, None, str(exc)
+
+
+def _done_rows(zip_path):
+    """Rows already in the zip; sets an unreadable zip aside."""
+    if not os.path.exists(zip_path):
+        return set()
+    try:
+        with zipfile.ZipFile(zip_path) as archive:
+            names = archive.namelist()
+    except zipfile.BadZipFile:
+        os.replace(zip_path, f"{zip_path}.{int(time.time())}.corrupt")
+        return set()
+    return {int(match.group(1)) for name in names if (match := _ROW_PREFIX.match(name))}
+
+
+class _Progress:
+    def __init__(self, path, total, done):
+        self.path = path
+        self.data = {'state': 'running', 'total': total, 'done': done, 'failed': {},
+                     'started': time.time(), 'pid': os.getpid()}
+        self.last_write = 0.0
+
+    def update(self, force=False, **changes):
+        self.data.update(changes)
+        now = time.time()
+        if force or now - self.last_write >= HEARTBEAT_SECONDS:
+            self.data['heartbeat'] = now
+            _write_json(self.path, self.data)
+            self.last_write = now
+
+
+def run_job(job_dir, workers=None):
+    """Render every remaining row of a job; returns the final state."""
+    job = _read_json(os.path.join(job_dir, 'job.json'))
+    roster_path = os.path.join(job_dir, job['roster'])
+    zip_path = os.path.join(job_dir, 'reports.zip')
+    cancel_path = os.path.join(job_dir, 'cancel')
+    fmt = job['format']
+    workers = workers or os.cpu_count() or 1
+
+    done_rows = _done_rows(zip_path)
+    progress = _Progress(os.path.join(job_dir, 'progress.json'), job['total'], len(done_rows))
+    progress.update(force=True)
+
+    def remaining():
+        start = 0
+        columns = None
+        for rows in roster.read_roster(roster_path):
+            if columns is None:
+                columns = roster.resolve_columns(rows[0].keys())
+            for offset, raw in enumerate(rows):
+                if start + offset not in done_rows:
+                    yield start + offset, raw, columns
+            start += len(rows)
+
+    state = 'done'
+    archive = zipfile.ZipFile(zip_path, 'a', zipfile.ZIP_STORED)
+    last_checkpoint = time.monotonic()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rows = remaining()
+            in_flight = set()
+            exhausted = False
+            while True:
+                while not exhausted and len(in_flight) < 2 * workers:
+                    item = next(rows, None)
+                    if item is None:
+                        exhausted = True
+                    else:
+                        in_flight.add(pool.submit(render_row, *item, fmt, job['practice_type']))
+                if not in_flight:
+                    break
+                finished, in_flight = wait(in_flight, timeout=1.0, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    row, name, data, error = future.result()
+                    if error is None:
+                        archive.writestr(name, data)
+                        progress.data['done'] += 1
+                    else:
+                        progress.data['failed'][str(row)] = error
+                if time.monotonic() - last_checkpoint >= CHECKPOINT_SECONDS:
+                    archive.close()
+                    archive = zipfile.ZipFile(zip_path, 'a', zipfile.ZIP_STORED)
+                    last_checkpoint = time.monotonic()
+                progress.update()
+                if os.path.exists(cancel_path):
+                    state = 'cancelled'
+                    for future in in_flight:
+                        future.cancel()
+                    pool.shutdown(wait=True, cancel_futures=True)
+                    break
+    except Exception as exc:
+        state = 'failed'
+        progress.data['error'] = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        archive.close()
+        progress.update(force=True, state=state, finished=time.time())
+    return state
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk per-doctor report jobs.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    create = commands.add_parser('create', help="create a job from a roster and run it")
+    create.add_argument('roster', help="CSV or XLSX roster, one doctor per row")
+    create.add_argument('--format', choices=FORMATS, default='pdf')
+    create.add_argument('--practice-type', default=DEFAULT_PRACTICE_TYPE,
+                        help="practice type for rows without one (default: %(default)s)")
+    create.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    run = commands.add_parser('run', help="run or resume a job directory")
+    run.add_argument('job_dir')
+    run.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    if args.command == 'create':
+        try:
+            with open(args.roster, 'rb') as f:
+                job_id = create_job(os.path.basename(args.roster), f.read(), args.format, args.practice_type)
+        except (OSError, ValueError) as exc:
+            parser.exit(2, f"jobs: {exc}\n")
+        job_dir = job_path(job_id)
+        print(f"Job {job_id} in {job_dir}", file=sys.stderr)
+    else:
+        job_dir = args.job_dir
+    state = run_job(job_dir, args.workers)
+    status = _read_json(os.path.join(job_dir, 'progress.json'))
+    print(f"{state}: {status['done']} of {status['total']} documents, {len(status['failed'])} failed",
+          file=sys.stderr)
+    return 0 if state == 'done' and not status['failed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
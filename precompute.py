@@ -0,0 +1,146 @@
+# precompute.py - Precomputed strategy plans for the whole profile space
+#
+# Plans depend only on specialty, experience band, practice type and marketing
+# focus, all drawn from small closed catalogs. Every combination (including
+# "not selected yet" for each answer) is built once and stored in a table
+# indexed by an integer profile code, so the app does one lookup per rerun.
+#
+# Build the table ahead of time with:
+#
+#     python precompute.py [strategy_table.seg]
+#
+# The table is published as a read-only segment file (segment.py) that
+# every server process maps, so the plans live once in the page cache
+# instead of once per process. load_table() attaches to the segment when it
+# matches the current catalogs; otherwise the first process to get the
+# publish lock builds and publishes it and the others attach to the result.
+# current_table() keeps one table per process and reloads it when the
+# specialty rules are reloaded; whichever process republishes recomputes
+# only the plan outputs that depend on specialty if it built the previous
+# table, everything otherwise (about 35 and 100 ms).
+
+import functools
+import hashlib
+import os
+import sys
+import threading
+
+import engine
+import scoring
+import segment
+import specialty_rules
+from catalog import BRAND_STRATEGIES, MARKETING_FOCUS_AREAS, MEDICAL_SPECIALTIES, PRACTICE_TYPES, YEARS_EXPERIENCE
+
+DEFAULT_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'strategy_table.seg')
+
+# Bump when the shape of a plan changes so saved tables are rebuilt
+TABLE_FORMAT = 3
+
+# Ordinal 0 means "not selected"; catalog entries start at 1
+SPECIALTY_KEYS = (None,) + tuple(MEDICAL_SPECIALTIES)
+EXPERIENCE_KEYS = (None,) + tuple(YEARS_EXPERIENCE)
+PRACTICE_KEYS = (None,) + tuple(PRACTICE_TYPES)
+FOCUS_KEYS = (None,) + tuple(MARKETING_FOCUS_AREAS)
+
+SPECIALTY_ORDINALS = {key: i for i, key in enumerate(SPECIALTY_KEYS)}
+EXPERIENCE_ORDINALS = {key: i for i, key in enumerate(EXPERIENCE_KEYS)}
+PRACTICE_ORDINALS = {key: i for i, key in enumerate(PRACTICE_KEYS)}
+FOCUS_ORDINALS = {key: i for i, key in enumerate(FOCUS_KEYS)}
+
+TABLE_SIZE = len(SPECIALTY_KEYS) * len(EXPERIENCE_KEYS) * len(PRACTICE_KEYS) * len(FOCUS_KEYS)
+
+
+def profile_code(profile):
+    """Mixed-radix code of the answers a plan depends on. Raises KeyError for unknown answers."""
+    code = SPECIALTY_ORDINALS[profile.specialty]
+    code = code * len(EXPERIENCE_KEYS) + EXPERIENCE_ORDINALS[profile.years_experience]
+    code = code * len(PRACTICE_KEYS) + PRACTICE_ORDINALS[profile.practice_type]
+    return code * len(FOCUS_KEYS) + FOCUS_ORDINALS[profile.marketing_focus]
+
+
+def decode_profile(code):
+    code, focus = divmod(code, len(FOCUS_KEYS))
+    code, practice = divmod(code, len(PRACTICE_KEYS))
+    specialty, experience = divmod(code, len(EXPERIENCE_KEYS))
+    return engine.Profile(
+        specialty=SPECIALTY_KEYS[specialty],
+        years_experience=EXPERIENCE_KEYS[experience],
+        practice_type=PRACTICE_KEYS[practice],
+        marketing_focus=FOCUS_KEYS[focus]
+    )
+
+
+def catalog_fingerprint():
+    # Changes whenever any input to plan generation changes
+    return _fingerprint(specialty_rules.rules.digest)
+
+
+@functools.lru_cache(maxsize=8)
+def _fingerprint(rules_digest):
+    payload = repr((
+        TABLE_FORMAT, SPECIALTY_KEYS, EXPERIENCE_KEYS, PRACTICE_KEYS, FOCUS_KEYS,
+        MEDICAL_SPECIALTIES, PRACTICE_TYPES, MARKETING_FOCUS_AREAS,
+        BRAND_STRATEGIES, engine.EXPERIENCE_STRATEGIES, rules_digest,
+        engine.SCALE_RECOMMENDATIONS, engine.UNIVERSAL_STRATEGIES, scoring.FOCUS_CATEGORIES,
+        scoring.TIME_PREFERENCES, scoring.LOW_COST_PREFERENCES, scoring.REASONING
+    ))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def build_table():
+    # engine.plan_graph shares the parts that depend on fewer answers between
+    # plans, which keeps both memory and the segment small.
+    return tuple(engine.generate_many(decode_profile(code) for code in range(TABLE_SIZE)))
+
+
+def save_table(path=DEFAULT_TABLE_PATH):
+    import scenarios
+
+    fingerprint = catalog_fingerprint()
+    table = build_table()
+    segment.publish(path, fingerprint, table, scenarios.item_matrix(table))
+    return table
+
+
+def load_table(path=DEFAULT_TABLE_PATH):
+    """Attach to the published table at path, publishing it first if missing or stale."""
+    fingerprint = catalog_fingerprint()
+    table = segment.attach(path, fingerprint)
+    if table is not None:
+        return table
+    with segment.publish_lock(path):
+        # Another process may have published it while we waited
+        table = segment.attach(path, fingerprint)
+        if table is not None:
+            return table
+        try:
+            table = save_table(path)
+        except OSError:
+            return build_table()  # read-only install: keep a private table
+        # The plans now live in the segment; drop this process's copies
+        engine.plan_graph.clear(['plan'])
+        return segment.attach(path, fingerprint) or table
+
+
+_current = (None, None)  # (specialty rules digest, table)
+_current_lock = threading.Lock()
+
+
+def current_table():
+    """This process's plan table, reloaded when the specialty rules change."""
+    global _current
+    digest = specialty_rules.rules.digest
+    loaded_digest, table = _current
+    if loaded_digest != digest:
+        with _current_lock:
+            loaded_digest, table = _current
+            if loaded_digest != digest:
+                table = load_table()
+                _current = (digest, table)
+    return table
+
+
+if __name__ == '__main__':
+    out_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_TABLE_PATH
+    save_table(out_path)
+    print(f"Wrote {TABLE_SIZE} plans to {out_path}")
@@ -0,0 +1,196 @@
+# profiler.py - Per-rerun render profiling for the Streamlit app
+#
+# Switched on with MARKETING_PROFILE=1 in the environment or ?profile=1 in
+# the URL. Each run (a full script run or a fragment rerun) gets a
+# RenderProfile that times named sections, counts widgets, markdown-style
+# elements and layout containers emitted through the wrapped st.* functions,
+# and sums the bytes of markdown/HTML bodies. Finished profiles are appended
+# to a JSONL log (MARKETING_PROFILE_LOG, default render_profile.jsonl) and
+# the latest full-run profile is shown in a collapsible debug panel.
+#
+# Every Streamlit session runs its script in its own thread, so the active
+# profile is kept in a context variable; the st.* wrappers are installed
+# once per process and do nothing for runs that are not being profiled.
+
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+ENABLE_ENV = 'MARKETING_PROFILE'
+LOG_ENV = 'MARKETING_PROFILE_LOG'
+DEFAULT_LOG_PATH = 'render_profile.jsonl'
+
+# st.* function name -> element kind
+MARKDOWN_ELEMENTS = ('markdown', 'caption', 'info', 'success', 'warning', 'error',
+                     'title', 'header', 'subheader', 'html', 'write')
+WIDGETS = ('button', 'checkbox', 'radio', 'selectbox', 'multiselect', 'slider',
+           'number_input', 'text_input', 'download_button', 'file_uploader')
+OTHER_ELEMENTS = ('metric', 'progress', 'plotly_chart', 'dataframe', 'table')
+LAYOUTS = ('columns', 'tabs', 'expander', 'container', 'empty')
+
+_current = contextvars.ContextVar('render_profile', default=None)
+_install_lock = threading.Lock()
+_installed = False
+_log_lock = threading.Lock()
+
+
+class RenderProfile:
+    __slots__ = ('kind', 'label', 'started', 'total', 'sections', 'widgets',
+                 'markdown_elements', 'other_elements', 'layouts', 'markdown_bytes')
+
+    def __init__(self, kind, label=''):
+        self.kind = kind
+        self.label = label
+        self.started = time.perf_counter()
+        self.total = None
+        self.sections = {}
+        self.widgets = 0
+        self.markdown_elements = 0
+        self.other_elements = 0
+        self.layouts = 0
+        self.markdown_bytes = 0
+
+    def add_section(self, name, seconds):
+        self.sections[name] = self.sections.get(name, 0.0) + seconds
+
+    def to_dict(self):
+        return {
+            'ts': time.time(),
+            'kind': self.kind,
+            'label': self.label,
+            'total_ms': round((self.total or 0.0) * 1000, 3),
+            'sections_ms': {name: round(s * 1000, 3) for name, s in self.sections.items()},
+            'widgets': self.widgets,
+            'markdown_elements': self.markdown_elements,
+            'other_elements': self.other_elements,
+            'layouts': self.layouts,
+            'markdown_bytes': self.markdown_bytes
+        }
+
+
+def enabled(query_params=None):
+    if os.environ.get(ENABLE_ENV, '') not in ('', '0'):
+        return True
+    return bool(query_params) and query_params.get('profile', '') not in ('', '0')
+
+
+def _counting(kind, fn):
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        profile = _current.get()
+        if profile is not None:
+            if kind == 'markdown':
+                profile.markdown_elements += 1
+                body = args[0] if args else kwargs.get('body', '')
+                if isinstance(body, str):
+                    profile.markdown_bytes += len(body.encode('utf-8'))
+            elif kind == 'widget':
+                profile.widgets += 1
+            elif kind == 'layout':
+                profile.layouts += 1
+            else:
+                profile.other_elements += 1
+        return fn(*args, **kwargs)
+    wrapper.__profiled__ = True
+    return wrapper
+
+
+def install(st):
+    """Wrap the st.* element functions with counters (once per process)."""
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        for kind, names in (('markdown', MARKDOWN_ELEMENTS), ('widget', WIDGETS),
+                            ('other', OTHER_ELEMENTS), ('layout', LAYOUTS)):
+            for name in names:
+                fn = getattr(st, name, None)
+                if fn is not None and not getattr(fn, '__profiled__', False):
+                    setattr(st, name, _counting(kind, fn))
+        _installed = True
+
+
+def start(kind='app', label=''):
+    profile = RenderProfile(kind, label)
+    _current.set(profile)
+    return profile
+
+
+def current():
+    return _current.get()
+
+
+def finish(label=None, log_path=None):
+    """Close the active profile, append it to the JSONL log and return it."""
+    profile = _current.get()
+    if profile is None:
+        return None
+    _current.set(None)
+    if label is not None:
+        profile.label = label
+    profile.total = time.perf_counter() - profile.started
+    path = log_path or os.environ.get(LOG_ENV) or DEFAULT_LOG_PATH
+    line = json.dumps(profile.to_dict())
+    with _log_lock:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+    return profile
+
+
+@contextmanager
+def section(name):
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add_section(name, time.perf_counter() - started)
+
+
+def timed(name, when=None):
+    """Time a render function as a section.
+
+    Inside a profiled full run this adds to that run's profile. A fragment
+    rerun does not execute the script body, so there the call gets a
+    profile of its own when when() is true, logged when the function returns.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current.get() is not None or when is None or not when():
+                with section(name):
+                    return fn(*args, **kwargs)
+            start('fragment', name)
+            try:
+                with section(name):
+                    return fn(*args, **kwargs)
+            finally:
+                finish()
+        return wrapper
+    return decorator
+
+
+def render_panel(st, profile, extra_metrics=None):
+    """Collapsible debug panel for a finished profile, plus any {label: value} metrics."""
+    with st.expander("🔧 Render profile", expanded=False):
+        cols = st.columns(4)
+        cols[0].metric("Run time", f"{(profile.total or 0) * 1000:.1f} ms")
+        cols[1].metric("Widgets", profile.widgets)
+        cols[2].metric("Markdown elements", profile.markdown_elements)
+        cols[3].metric("Markdown/HTML", f"{profile.markdown_bytes / 1024:.1f} KB")
+        if extra_metrics:
+            cols = st.columns(max(len(extra_metrics), 4))
+            for col, (label, value) in zip(cols, extra_metrics.items()):
+                col.metric(label, value)
+        rows = "\n".join(
+            f"| {name} | {seconds * 1000:.2f} |" for name, seconds in profile.sections.items()
+        )
+        st.markdown("| Section | ms |\n|---|---:|\n" + rows)
+        st.caption(f"Other elements: {profile.other_elements} · Layout containers: {profile.layouts}")
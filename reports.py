@@ -0,0 +1,432 @@
+# reports.py - Downloadable plan reports
+#
+# build_document() turns a profile's plan (and any selected Brand Building
+# strategies) into a list of simple (kind, payload) blocks: title, heading,
+# subheading, para, entry (bold name + detail), bullets, numbered and rows
+# (label/value pairs). Renderers turn those blocks into a file format:
+# render_pdf() uses reportlab, render_docx() a .docx template.
+#
+# The .docx template (MARKETING_DOCX_TEMPLATE, default python-docx's own) is
+# parsed once per process into a DocxTemplate holding prototype elements for
+# every block kind, and the template's other parts pre-zipped. Each
+# document deep-copies the template's document.xml and those prototypes and
+# appends the result to a copy of that zip, so nothing is re-read,
+# re-parsed or re-compressed per document.
+#
+# PDFs are rendered on a background thread pool so the Streamlit script
+# never waits for them. (A process pool would re-run app.py in every
+# worker: Streamlit installs the running script as __main__, which spawn
+# re-imports.) Finished PDFs are stored in a content-addressed disk cache
+# (MARKETING_REPORT_CACHE, default report_cache/) keyed by a hash of the
+# plan answers, the selection and the catalog version. Asking again for the
+# same plan, from any session, returns the cached file.
+
+import copy
+import functools
+import hashlib
+import io
+import os
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import engine
+import precompute
+from catalog import (
+    BRAND_STRATEGIES,
+    MARKETING_FOCUS_AREAS,
+    MEDICAL_SPECIALTIES,
+    PHASE_LABELS,
+    PHASE_MASKS,
+    PRACTICE_TYPES,
+    STRATEGY_INDEX,
+)
+
+# Bump when the document layout changes so cached reports are regenerated
+REPORT_VERSION = 1
+
+CACHE_ENV = 'MARKETING_REPORT_CACHE'
+DOCX_TEMPLATE_ENV = 'MARKETING_DOCX_TEMPLATE'
+WORKERS_ENV = 'MARKETING_REPORT_WORKERS'
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'report_cache')
+DEFAULT_WORKERS = 2
+
+
+# Document model: (kind, payload) tuples
+def build_document(profile, plan, selected=0):
+    """Blocks for the full strategy plan plus the selected brand plan."""
+    specialty = MEDICAL_SPECIALTIES.get(profile.specialty, {}).get('name', 'Not Selected')
+    practice = PRACTICE_TYPES.get(profile.practice_type, {}).get('name', 'Not Selected')
+    focus = MARKETING_FOCUS_AREAS.get(profile.marketing_focus, {}).get('name', 'Not Selected')
+    blocks = [
+        ('title', 'Medical Practice Marketing Strategy'),
+        ('rows', [
+            ('Specialty', specialty),
+            ('Experience', profile.years_experience or 'Not Selected'),
+            ('Practice Type', practice),
+            ('Marketing Focus', focus),
+            ('Marketing Budget', plan['budget'])
+        ])
+    ]
+
+    exp_strategy = plan['experience']
+    if exp_strategy:
+        blocks += [
+            ('heading', 'Experience-Based Strategy'),
+            ('para', f"Focus: {exp_strategy.get('focus', '')}"),
+            ('subheading', 'Key Actions'),
+            ('bullets', exp_strategy.get('key_actions', [])[:3]),
+            ('subheading', 'Branding Priorities'),
+            ('bullets', exp_strategy.get('branding_priorities', []))
+        ]
+
+    practice_rec = plan['practice']
+    if practice_rec:
+        blocks += [
+            ('heading', 'Practice Infrastructure Plan'),
+            ('subheading', 'Marketing Channels'),
+            ('bullets', practice_rec.get('marketing_channels', [])[:4]),
+            ('subheading', 'Technology Needs'),
+            ('bullets', practice_rec.get('technology_needs', [])[:4])
+        ]
+
+    blocks.append(('heading', 'Complete Marketing Strategy Framework'))
+    for _, dimension, heading in engine.STRATEGY_TABS:
+        blocks += [('subheading', heading), ('numbered', plan['strategy'].get(dimension, []))]
+
+    blocks.append(('heading', '12-Month Implementation Plan'))
+    for period, milestones in engine.IMPLEMENTATION_TIMELINE:
+        blocks += [('subheading', period), ('bullets', milestones)]
+
+    blocks.append(('heading', 'Immediate Action Items (Next 30 Days)'))
+    for heading, items, numbered in engine.IMMEDIATE_ACTIONS:
+        blocks += [('subheading', heading), ('numbered' if numbered else 'bullets', items)]
+
+    if selected:
+        blocks += brand_plan_blocks(selected)
+    return blocks
+
+
+def brand_plan_blocks(selected):
+    blocks = [('heading', 'Selected Brand Building Plan')]
+    for phase, label in PHASE_LABELS.items():
+        keys = STRATEGY_INDEX.keys_in(selected & PHASE_MASKS[phase])
+        if not keys:
+            continue
+        blocks.append(('subheading', label))
+        for key in keys:
+            strategy = BRAND_STRATEGIES[key]
+            blocks += [
+                ('entry', (strategy['name'], f"{strategy['focus']}, {strategy['time']}, {strategy['budget']} budget")),
+                ('bullets', [
+                    f"{resource['name']}: {resource['desc']} ({', '.join(resource['tools'][:3])}; "
+                    f"cost {resource['cost']})"
+                    for resource in strategy['resources']
+                ])
+            ]
+    blocks.append(('heading', 'Budget Planning Guide'))
+    for heading, items in engine.BUDGET_GUIDE:
+        blocks += [('subheading', heading), ('bullets', items)]
+    return blocks
+
+
+def render_pdf(blocks):
+    """Render document blocks to PDF bytes."""
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import cm
+    from reportlab.platypus import ListFlowable, ListItem, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+    from xml.sax.saxutils import escape
+
+    styles = _pdf_styles()
+    margin = 2 * cm
+    text_width = A4[0] - 2 * margin
+    story = []
+    for kind, payload in blocks:
+        if kind == 'title':
+            story.append(Paragraph(escape(payload), styles['Title']))
+        elif kind == 'heading':
+            story += [Spacer(1, 0.3 * cm), Paragraph(escape(payload), styles['Heading2'])]
+        elif kind == 'subheading':
+            story.append(Paragraph(escape(payload), styles['Heading4']))
+        elif kind == 'para':
+            story.append(Paragraph(escape(payload), styles['BodyText']))
+        elif kind == 'entry':
+            name, detail = payload
+            story.append(Paragraph(f"<b>{escape(name)}</b> ({escape(detail)})", styles['BodyText']))
+        elif kind in ('bullets', 'numbered'):
+            if not payload:
+                continue
+            items = [ListItem(Paragraph(escape(item), styles['BodyText'])) for item in payload]
+            story.append(ListFlowable(items, bulletType='1' if kind == 'numbered' else 'bullet',
+                                      bulletFontSize=9, leftIndent=14))
+        elif kind == 'rows':
+            rows = [
+                [Paragraph(f"<b>{escape(label)}</b>", styles['BodyText']), Paragraph(escape(str(value)), styles['BodyText'])]
+                for label, value in payload
+            ]
+            table = Table(rows, colWidths=[4 * cm, text_width - 4 * cm], hAlign='LEFT')
+            table.setStyle(TableStyle([
+                ('LINEBELOW', (0, 0), (-1, -1), 0.25, colors.lightgrey),
+                ('VALIGN', (0, 0), (-1, -1), 'TOP')
+            ]))
+            story.append(table)
+
+    buffer = io.BytesIO()
+    SimpleDocTemplate(buffer, pagesize=A4, title='Medical Practice Marketing Strategy',
+                      leftMargin=margin, rightMargin=margin, topMargin=margin, bottomMargin=margin).build(story)
+    return buffer.getvalue()
+
+
+_styles = None
+
+
+def _pdf_styles():
+    # getSampleStyleSheet() builds a fresh stylesheet on every call
+    global _styles
+    if _styles is None:
+        from reportlab.lib.styles import getSampleStyleSheet
+        _styles = getSampleStyleSheet()
+    return _styles
+
+
+class DocxTemplate:
+    """A .docx template parsed once; render() clones it per document."""
+
+    DOCUMENT_PART = 'word/document.xml'
+
+    # Block kind -> (paragraph styles to try, in order)
+    PARAGRAPH_STYLES = {
+        'title': ('Title',),
+        'heading': ('Heading 1',),
+        'subheading': ('Heading 3',),
+        'para': ('Body Text', 'Normal'),
+        'entry': ('Body Text', 'Normal'),
+        'bullets': ('List Bullet',),
+        'numbered': ('List Paragraph', 'Normal')
+    }
+    TABLE_STYLES = ('Light List Accent 1', 'Table Grid')
+
+    def __init__(self, path=None):
+        import docx
+        from docx.oxml.ns import qn
+
+        if path is None:
+            # python-docx's bundled default template, through its public API
+            buffer = io.BytesIO()
+            docx.Document().save(buffer)
+            data = buffer.getvalue()
+        else:
+            with open(path, 'rb') as f:
+                data = f.read()
+        # Every part but document.xml, compressed once; render() appends to a copy
+        static = io.BytesIO()
+        with zipfile.ZipFile(io.BytesIO(data)) as source, \
+                zipfile.ZipFile(static, 'w', zipfile.ZIP_DEFLATED) as target:
+            for info in source.infolist():
+                if info.filename != self.DOCUMENT_PART:
+                    target.writestr(info, source.read(info.filename), zipfile.ZIP_DEFLATED)
+        self.static_zip = static.getvalue()
+
+        document = docx.Document(io.BytesIO(data))
+        style_names = {style.name for style in document.styles}
+
+        def pick(names):
+            return next((document.styles[name] for name in names if name in style_names), None)
+
+        self.prototypes = {}
+        for kind, names in self.PARAGRAPH_STYLES.items():
+            paragraph = document.add_paragraph(style=pick(names))
+            if kind == 'entry':
+                paragraph.add_run('-').bold = True
+            paragraph.add_run('-')
+            self.prototypes[kind] = paragraph._p
+
+        table = document.add_table(rows=1, cols=2)
+        table.style = pick(self.TABLE_STYLES)
+        label, value = table.rows[0].cells
+        label.paragraphs[0].add_run('-').bold = True
+        value.paragraphs[0].add_run('-')
+        self.table = table._tbl
+        self.row = table.rows[0]._tr
+
+        body = document.element.body
+        for element in list(self.prototypes.values()) + [self.table]:
+            body.remove(element)
+        self.table.remove(self.row)
+        self.root = document.element
+        self.sect_pr = qn('w:sectPr')
+        self.text_tag = qn('w:t')
+
+    def _filled(self, prototype, *texts):
+        element = copy.deepcopy(prototype)
+        for node, text in zip(element.iter(self.text_tag), texts):
+            node.text = text
+            if text != text.strip():
+                node.set('{http://www.w3.org/XML/1998/namespace}space', 'preserve')
+        return element
+
+    def render(self, blocks):
+        """Render document blocks to .docx bytes."""
+        from lxml import etree
+
+        root = copy.deepcopy(self.root)
+        body = root[0]
+        # New content goes after any template content, before the section properties
+        position = len(body) - 1 if len(body) and body[-1].tag == self.sect_pr else len(body)
+        elements = []
+        for kind, payload in blocks:
+            if kind in ('title', 'heading', 'subheading', 'para'):
+                elements.append(self._filled(self.prototypes[kind], payload))
+            elif kind == 'entry':
+                name, detail = payload
+                elements.append(self._filled(self.prototypes['entry'], name, f" ({detail})"))
+            elif kind == 'bullets':
+                elements += [self._filled(self.prototypes['bullets'], item) for item in payload]
+            elif kind == 'numbered':
+                # Word's List Number continues across lists; number each list from 1
+                elements += [self._filled(self.prototypes['numbered'], f"{i}. {item}")
+                             for i, item in enumerate(payload, 1)]
+            elif kind == 'rows':
+                table = copy.deepcopy(self.table)
+                for label, value in payload:
+                    table.append(self._filled(self.row, label, str(value)))
+                elements.append(table)
+        body[position:position] = elements
+
+        document_xml = etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True)
+        buffer = io.BytesIO(self.static_zip)
+        with zipfile.ZipFile(buffer, 'a', zipfile.ZIP_DEFLATED) as target:
+            target.writestr(self.DOCUMENT_PART, document_xml)
+        return buffer.getvalue()
+
+
+_docx_template = None
+_docx_template_lock = threading.Lock()
+
+
+def docx_template():
+    global _docx_template
+    with _docx_template_lock:
+        if _docx_template is None:
+            _docx_template = DocxTemplate(os.environ.get(DOCX_TEMPLATE_ENV) or None)
+        return _docx_template
+
+
+def render_docx(blocks):
+    return docx_template().render(blocks)
+
+
+# Content-addressed cache; the key covers the specialty rules, so an edit
+# to them is a new key rather than a stale document
+def catalog_version():
+    return precompute.catalog_fingerprint()
+
+
+def report_key(profile, selected=0, fmt='pdf'):
+    payload = repr((REPORT_VERSION, fmt, engine.plan_key(profile), selected, catalog_version()))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def cache_dir():
+    return os.environ.get(CACHE_ENV) or DEFAULT_CACHE_DIR
+
+
+def cache_path(key, fmt='pdf'):
+    return os.path.join(cache_dir(), f"{key}.{fmt}")
+
+
+def cached(key, fmt='pdf'):
+    """Cached report bytes, or None."""
+    try:
+        with open(cache_path(key, fmt), 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _store(key, fmt, data):
+    os.makedirs(cache_dir(), exist_ok=True)
+    path = cache_path(key, fmt)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return path
+
+
+RENDERERS = {'pdf': render_pdf, 'docx': render_docx}
+
+
+def report(profile, selected=0, fmt='pdf'):
+    """Report bytes for a plan in fmt, rendered on first request and cached on disk."""
+    key = report_key(profile, selected, fmt)
+    data = cached(key, fmt)
+    if data is None:
+        plan = engine.generate_many([profile])[0]
+        data = RENDERERS[fmt](build_document(profile, plan, selected))
+        _store(key, fmt, data)
+    return data
+
+
+def docx_report(profile, selected=0):
+    return report(profile, selected, 'docx')
+
+
+def render_pdf_to_cache(key, profile, selected=0):
+    """Build, render and store one PDF; runs on the worker pool."""
+    plan = engine.generate_many([profile])[0]
+    return _store(key, 'pdf', render_pdf(build_document(profile, plan, selected)))
+
+
+# Background rendering
+_pool = None
+_pool_lock = threading.Lock()
+_jobs_lock = threading.Lock()
+_pending = {}   # cache key -> Future, shared by all sessions
+_failed = {}    # cache key -> error message of the last attempt
+
+
+def _executor():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            workers = max(1, int(os.environ.get(WORKERS_ENV, DEFAULT_WORKERS)))
+            _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='report')
+        return _pool
+
+
+def submit_pdf(profile, selected=0):
+    """Start rendering the PDF in the background unless cached or in flight; returns its key."""
+    key = report_key(profile, selected)
+    executor = _executor()
+    with _jobs_lock:
+        if key in _pending or os.path.exists(cache_path(key)):
+            return key
+        _pending[key] = future = executor.submit(render_pdf_to_cache, key, profile, selected)
+        _failed.pop(key, None)
+    future.add_done_callback(functools.partial(_finished, key))
+    return key
+
+
+def _finished(key, future):
+    with _jobs_lock:
+        _pending.pop(key, None)
+        if future.exception() is not None:
+            _failed[key] = str(future.exception())
+
+
+def status(key, fmt='pdf'):
+    """'ready', 'pending', 'failed' or None if never requested."""
+    with _jobs_lock:
+        if key in _pending:
+            return 'pending'
+        if key in _failed:
+            return 'failed'
+    if os.path.exists(cache_path(key, fmt)):
+        return 'ready'
+    return None
+
+
+def error(key):
+    return _failed.get(key)
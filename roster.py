@@ -0,0 +1,359 @@
+# roster.py - Bulk strategy generation for a roster of doctors
+#
+# Reads a CSV or XLSX roster in chunks, maps each row to an engine.Profile,
+# generates plans on a process pool and streams one result per doctor to a
+# JSONL, CSV or XLSX file as chunks complete. Only a bounded number of
+# chunks is in flight at once, so memory stays flat however long the roster
+# is. XLSX output has one sheet per strategy dimension, written with
+# openpyxl's write-only mode (rows go straight to disk as inline strings).
+#
+#     python roster.py doctors.xlsx -o plans.jsonl --workers 4
+#     python roster.py doctors.csv -o plans.csv --map specialty=Department
+#     python roster.py chain.csv -o chain-plans.xlsx
+#
+# Cells may hold catalog keys ("cardiology") or display names ("Cardiology").
+# Patient types are separated by ";" or ",".
+
+import argparse
+import csv
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import engine
+from catalog import MARKETING_FOCUS_AREAS, MEDICAL_SPECIALTIES, PATIENT_TYPES, PRACTICE_TYPES, YEARS_EXPERIENCE
+
+DEFAULT_CHUNKSIZE = 500
+
+# Profile field -> roster column names tried in order (case-insensitive)
+DEFAULT_COLUMNS = {
+    'doctor_id': ['doctor_id', 'doctor id', 'id'],
+    'doctor_name': ['doctor_name', 'name', 'doctor'],
+    'specialty': ['specialty', 'speciality'],
+    'years_experience': ['years_experience', 'experience', 'years of experience'],
+    'practice_type': ['practice_type', 'practice', 'practice type'],
+    'patient_types': ['patient_types', 'patient types', 'patients'],
+    'marketing_focus': ['marketing_focus', 'focus', 'marketing focus']
+}
+
+STRATEGY_DIMENSIONS = [
+    'patient_acquisition',
+    'patient_retention',
+    'personal_branding',
+    'professional_development',
+    'reputation_management',
+    'financial_planning'
+]
+
+
+def _name_lookup(catalog):
+    lookup = {}
+    for key, entry in catalog.items():
+        lookup[key.lower()] = key
+        lookup[entry['name'].lower()] = key
+    return lookup
+
+
+SPECIALTY_LOOKUP = _name_lookup(MEDICAL_SPECIALTIES)
+PRACTICE_LOOKUP = _name_lookup(PRACTICE_TYPES)
+PATIENT_LOOKUP = _name_lookup(PATIENT_TYPES)
+FOCUS_LOOKUP = _name_lookup(MARKETING_FOCUS_AREAS)
+EXPERIENCE_LOOKUP = {years.lower(): years for years in YEARS_EXPERIENCE}
+
+
+def _resolve(field, value, lookup):
+    value = str(value).strip()
+    if not value:
+        return None
+    try:
+        return lookup[value.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown {field}: {value!r}") from None
+
+
+def row_to_profile(row):
+    """Build a Profile from a row already keyed by profile field names."""
+    patient_cell = str(row.get('patient_types') or '').replace(',', ';')
+    return engine.Profile(
+        specialty=_resolve('specialty', row.get('specialty') or '', SPECIALTY_LOOKUP),
+        years_experience=_resolve('years_experience', row.get('years_experience') or '', EXPERIENCE_LOOKUP),
+        practice_type=_resolve('practice_type', row.get('practice_type') or '', PRACTICE_LOOKUP),
+        patient_types=tuple(
+            _resolve('patient type', part, PATIENT_LOOKUP) for part in patient_cell.split(';') if part.strip()
+        ),
+        marketing_focus=_resolve('marketing_focus', row.get('marketing_focus') or '', FOCUS_LOOKUP)
+    )
+
+
+def resolve_columns(header, overrides=None):
+    """Map profile fields to the roster's actual column names."""
+    by_lower = {str(name).strip().lower(): name for name in header if name is not None}
+    columns = {}
+    for field, candidates in DEFAULT_COLUMNS.items():
+        if overrides and field in overrides:
+            candidates = [overrides[field]]
+        for candidate in candidates:
+            if candidate.lower() in by_lower:
+                columns[field] = by_lower[candidate.lower()]
+                break
+    if 'specialty' not in columns:
+        raise ValueError(f"Roster has no specialty column (looked for {DEFAULT_COLUMNS['specialty']})")
+    return columns
+
+
+def read_roster(path, chunksize=DEFAULT_CHUNKSIZE, sheet=None):
+    """Yield lists of raw row dicts, chunksize rows at a time."""
+    if path.lower().endswith(('.xlsx', '.xlsm')):
+        yield from _read_xlsx(path, chunksize, sheet)
+    else:
+        import pandas as pd
+        reader = pd.read_csv(path, chunksize=chunksize, dtype=str, keep_default_na=False)
+        for frame in reader:
+            if len(frame):  # a header-only file yields one empty frame
+                yield frame.to_dict('records')
+
+
+def _read_xlsx(path, chunksize, sheet):
+    # pandas.read_excel loads the whole sheet; openpyxl's read-only mode streams rows
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.worksheets[0]
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        chunk = []
+        for values in rows:
+            if not any(v not in (None, '') for v in values):
+                continue
+            chunk.append({name: ('' if v is None else v) for name, v in zip(header, values)})
+            if len(chunk) >= chunksize:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    finally:
+        workbook.close()
+
+
+def process_chunk(start, rows, columns):
+    """Generate plan records for one chunk; runs in a worker process."""
+    records = []
+    for offset, raw in enumerate(rows):
+        row = {field: raw.get(column, '') for field, column in columns.items()}
+        record = {
+            'row': start + offset,
+            'doctor_id': row.get('doctor_id', ''),
+            'doctor_name': row.get('doctor_name', '')
+        }
+        try:
+            profile = row_to_profile(row)
+        except ValueError as exc:
+            record['error'] = str(exc)
+            records.append(record)
+            continue
+        plan = engine.generate_many([profile])[0]
+        record.update({
+            'specialty': profile.specialty,
+            'years_experience': profile.years_experience,
+            'practice_type': profile.practice_type,
+            'patient_types': list(profile.patient_types),
+            'marketing_focus': profile.marketing_focus,
+            'experience_focus': plan['experience'].get('focus', ''),
+            'marketing_budget': plan['budget'],
+            'strategy': {dim: plan['strategy'][dim] for dim in STRATEGY_DIMENSIONS},
+            'recommended_strategies': [rec['name'] for rec in plan['recommended']]
+        })
+        records.append(record)
+    return records
+
+
+class JsonlWriter:
+    def __init__(self, f):
+        self.f = f
+
+    def write(self, record):
+        self.f.write(json.dumps(record, ensure_ascii=False))
+        self.f.write('\n')
+
+    def close(self):
+        pass
+
+
+class CsvWriter:
+    FIELDS = [
+        'row', 'doctor_id', 'doctor_name', 'specialty', 'years_experience', 'practice_type',
+        'patient_types', 'marketing_focus', 'experience_focus', 'marketing_budget',
+        *STRATEGY_DIMENSIONS, 'recommended_strategies', 'error'
+    ]
+
+    def __init__(self, f):
+        self.writer = csv.DictWriter(f, fieldnames=self.FIELDS)
+        self.writer.writeheader()
+
+    def write(self, record):
+        flat = dict(record)
+        for dim, items in flat.pop('strategy', {}).items():
+            flat[dim] = '; '.join(items)
+        for field in ('patient_types', 'recommended_strategies'):
+            if field in flat:
+                flat[field] = '; '.join(flat[field])
+        self.writer.writerow(flat)
+
+    def close(self):
+        pass
+
+
+class XlsxWriter:
+    """One worksheet per strategy dimension, one row per doctor, streamed to disk."""
+
+    HEADER = ['Row', 'Doctor ID', 'Doctor Name', 'Specialty', 'Experience', 'Practice Type', 'Marketing Focus',
+              'Actions']
+    WIDTHS = {'A': 8, 'B': 12, 'C': 24, 'D': 20, 'E': 12, 'F': 24, 'G': 30}
+    ACTION_WIDTH = 40
+
+    def __init__(self, path):
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font
+
+        self.path = path
+        self.workbook = Workbook(write_only=True)
+        self.sheets = {}
+        for dim in STRATEGY_DIMENSIONS:
+            sheet = self.workbook.create_sheet(dim.replace('_', ' ').title())
+            # Column widths and panes must be set before the first row in write-only mode
+            for column, width in self.WIDTHS.items():
+                sheet.column_dimensions[column].width = width
+            sheet.column_dimensions['H'].width = self.ACTION_WIDTH
+            sheet.freeze_panes = 'D2'
+            header = []
+            for title in self.HEADER:
+                cell = WriteOnlyCell(sheet, title)
+                cell.font = Font(bold=True)
+                header.append(cell)
+            sheet.append(header)
+            self.sheets[dim] = sheet
+        self.errors = None
+
+    def write(self, record):
+        if 'error' in record:
+            if self.errors is None:
+                self.errors = self.workbook.create_sheet('Errors')
+                self.errors.append(['Row', 'Doctor ID', 'Doctor Name', 'Error'])
+            self.errors.append([record['row'], record['doctor_id'], record['doctor_name'], record['error']])
+            return
+        identity = [
+            record['row'],
+            record['doctor_id'],
+            record['doctor_name'],
+            MEDICAL_SPECIALTIES[record['specialty']]['name'] if record['specialty'] else '',
+            record['years_experience'],
+            PRACTICE_TYPES[record['practice_type']]['name'] if record['practice_type'] else '',
+            MARKETING_FOCUS_AREAS[record['marketing_focus']]['name'] if record['marketing_focus'] else ''
+        ]
+        for dim, items in record['strategy'].items():
+            self.sheets[dim].append(identity + list(items))
+
+    def close(self):
+        self.workbook.save(self.path)
+
+
+def open_writer(path):
+    """(file to flush and close, or None, writer) for an output path."""
+    if path.lower().endswith('.xlsx'):
+        return None, XlsxWriter(path)
+    f = open(path, 'w', newline='', encoding='utf-8') if path != '-' else sys.stdout
+    writer = CsvWriter(f) if path.lower().endswith('.csv') else JsonlWriter(f)
+    return f, writer
+
+
+def iter_results(chunks, columns, workers):
+    """Yield record lists in roster order, keeping at most 2 * workers chunks in flight."""
+    if workers <= 0:
+        start = 0
+        for rows in chunks:
+            yield process_chunk(start, rows, columns)
+            start += len(rows)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        start = 0
+        for rows in chunks:
+            pending.append(pool.submit(process_chunk, start, rows, columns))
+            start += len(rows)
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def run(roster_path, output_path, chunksize=DEFAULT_CHUNKSIZE, workers=None, overrides=None, sheet=None):
+    """Process a roster file; returns (rows written, rows with errors)."""
+    if workers is None:
+        workers = os.cpu_count() or 1
+    chunks = read_roster(roster_path, chunksize, sheet)
+    first = next(chunks, None)
+    if not first:
+        columns = {}
+    else:
+        columns = resolve_columns(first[0].keys(), overrides)
+
+    def all_chunks():
+        if first:
+            yield first
+            yield from chunks
+
+    f, writer = open_writer(output_path)
+    written = errors = 0
+    try:
+        for records in iter_results(all_chunks(), columns, workers):
+            for record in records:
+                writer.write(record)
+                written += 1
+                errors += 'error' in record
+            if f is not None:
+                f.flush()
+    finally:
+        writer.close()
+        if f not in (None, sys.stdout):
+            f.close()
+    return written, errors
+
+
+def parse_overrides(pairs):
+    overrides = {}
+    for pair in pairs or []:
+        field, sep, column = pair.partition('=')
+        if not sep or field not in DEFAULT_COLUMNS:
+            raise argparse.ArgumentTypeError(f"--map expects FIELD=COLUMN with FIELD in {list(DEFAULT_COLUMNS)}")
+        overrides[field] = column
+    return overrides
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate marketing strategies for a roster of doctors.")
+    parser.add_argument('roster', help="CSV or XLSX roster, one doctor per row")
+    parser.add_argument('-o', '--output', default='-', help="output .jsonl, .csv or .xlsx file (default: stdout, JSONL)")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help="rows per work unit")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (0 = run in-process)")
+    parser.add_argument('--sheet', help="worksheet name for XLSX rosters (default: first sheet)")
+    parser.add_argument('--map', action='append', metavar='FIELD=COLUMN', help="map a profile field to a roster column")
+    args = parser.parse_args(argv)
+
+    try:
+        overrides = parse_overrides(args.map)
+        written, errors = run(args.roster, args.output, args.chunksize, args.workers, overrides, args.sheet)
+    except (OSError, ValueError, argparse.ArgumentTypeError) as exc:
+        parser.exit(2, f"roster: {exc}\n")
+    print(f"{written} doctors processed, {errors} with errors", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+# scenarios.py - What-if grid of experience bands x practice types
+#
+# For the current specialty and marketing focus, evaluates every
+# YEARS_EXPERIENCE x PRACTICE_TYPES combination at once: the budget range
+# each practice type implies, and how much each scenario's plan overlaps
+# the current one.
+#
+# ScenarioIndex is built once from the precomputed plan table (or mapped
+# from its published segment, see segment.py). Every plan's
+# action items (strategy dimensions, experience key actions, practice
+# marketing channels) become a row of a boolean matrix over the vocabulary
+# of all items. A grid is then a fancy-index of those rows by profile codes
+# computed with broadcasting, and Jaccard overlap with the current plan is
+# two vectorized reductions, so the whole 5 x 7 grid takes microseconds.
+# No Streamlit import.
+
+import numpy as np
+
+import budget
+import precompute
+from catalog import EXPERIENCE_INDEX, PRACTICE_INDEX
+
+
+def plan_items(plan):
+    """The action items of a plan that scenarios are compared on."""
+    items = [(dimension, item) for dimension, values in plan['strategy'].items() for item in values]
+    items.extend(('experience', action) for action in plan['experience'].get('key_actions', []))
+    items.extend(('practice', channel) for channel in plan['practice'].get('marketing_channels', []))
+    return items
+
+
+def item_matrix(table):
+    """Plans x action items boolean matrix for a precompute table."""
+    vocabulary = {}
+    rows = [[vocabulary.setdefault(item, len(vocabulary)) for item in plan_items(plan)] for plan in table]
+    items = np.zeros((len(table), len(vocabulary)), dtype=bool)
+    for code, columns in enumerate(rows):
+        items[code, columns] = True
+    return items
+
+
+class ScenarioIndex:
+    """Boolean item matrix over every plan in a precompute table."""
+
+    def __init__(self, table):
+        # A table attached from a segment (segment.py) carries the matrix already
+        items = getattr(table, 'scenario_items', None)
+        self.items = item_matrix(table) if items is None else items
+        self.vocabulary_size = self.items.shape[1]
+
+        # Ordinals in precompute's code space (0 = not selected), for every band and practice type
+        self.experience_ordinals = np.array([precompute.EXPERIENCE_ORDINALS[key] for key in EXPERIENCE_INDEX.keys])
+        self.practice_ordinals = np.array([precompute.PRACTICE_ORDINALS[key] for key in PRACTICE_INDEX.keys])
+        shares = np.array([budget.BUDGET_SHARES[key] for key in PRACTICE_INDEX.keys])
+        self.share_low = shares[:, 0]
+        self.share_high = shares[:, 1]
+
+    def grid_codes(self, specialty, focus):
+        """Profile codes shaped (experience bands, practice types)."""
+        specialty_ordinal = precompute.SPECIALTY_ORDINALS[specialty]
+        focus_ordinal = precompute.FOCUS_ORDINALS[focus]
+        codes = specialty_ordinal * len(precompute.EXPERIENCE_KEYS) + self.experience_ordinals[:, None]
+        codes = codes * len(precompute.PRACTICE_KEYS) + self.practice_ordinals[None, :]
+        return codes * len(precompute.FOCUS_KEYS) + focus_ordinal
+
+    def grid(self, profile):
+        """Scenario grid for a profile's specialty and focus, compared with the profile's own plan.
+
+        Returns a dict of arrays shaped (experience bands, practice types):
+        share_low and share_high (budget fraction of revenue), overlap
+        (Jaccard similarity of action items with the current plan, 0-1),
+        shared and added (item counts), plus the current cell as
+        (experience ordinal, practice ordinal) or None.
+        """
+        codes = self.grid_codes(profile.specialty, profile.marketing_focus)
+        scenarios = self.items[codes]                                   # (bands, practices, vocabulary)
+        current = self.items[precompute.profile_code(profile)]
+        shared = np.count_nonzero(scenarios & current, axis=-1)
+        union = np.count_nonzero(scenarios | current, axis=-1)
+        overlap = np.divide(shared, union, out=np.ones(union.shape), where=union > 0)
+        current_cell = None
+        if profile.years_experience and profile.practice_type:
+            current_cell = (EXPERIENCE_INDEX.ordinals[profile.years_experience],
+                            PRACTICE_INDEX.ordinals[profile.practice_type])
+        shape = codes.shape
+        return {
+            'share_low': np.broadcast_to(self.share_low, shape),
+            'share_high': np.broadcast_to(self.share_high, shape),
+            'overlap': overlap,
+            'shared': shared,
+            'added': np.count_nonzero(scenarios & ~current, axis=-1),
+            'current': current_cell
+        }
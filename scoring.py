@@ -0,0 +1,207 @@
+# scoring.py - Vectorized brand strategy scoring
+#
+# Each strategy in the catalog becomes a row of a feature matrix (strategy
+# focus category, timeframe, budget level, mean resource cost level). Each
+# marketing focus is a row of a weight matrix over the same features, so
+# scoring every strategy for one focus, or for a blend of several focuses,
+# is a single matrix product followed by an argpartition top-k.
+#
+# A strategy whose category matches the focus scores FOCUS_MATCH_WEIGHT;
+# timeframe and cost preferences add at most 0.5 on top to rank matches
+# against each other. Strategies below RELEVANCE_THRESHOLD are not
+# recommended, which keeps unrelated strategies out even when they happen
+# to fit the preferred timeframe.
+#
+# recommend() also takes per-strategy boosts (from strategy_rules.py),
+# added to the scores before ranking, so a boost of RELEVANCE_THRESHOLD or
+# more brings a strategy into the recommendations whatever the focus.
+
+import numpy as np
+
+from catalog import BRAND_STRATEGIES, MARKETING_FOCUS_AREAS
+
+FOCUS_MATCH_WEIGHT = 3.0
+RELEVANCE_THRESHOLD = 1.0
+HIGH_PRIORITY_SCORE = FOCUS_MATCH_WEIGHT
+
+TIME_LEVELS = ('Short-term', 'Medium-term', 'Long-term')
+BUDGET_LEVELS = {'Low': 1.0, 'Low-Moderate': 1.5, 'Moderate': 2.0, 'High': 3.0}
+MAX_BUDGET_LEVEL = 3.0
+MAX_COST_LEVEL = 5.0  # '$$$$$'
+
+# Strategy focus categories each marketing focus is served by
+FOCUS_CATEGORIES = {
+    'new_patients': ['Both', 'Patient Education'],
+    'patient_retention': ['Patient Retention'],
+    'referral_volume': ['Professional'],
+    'premium_services': ['High-value Patients'],
+    'expert_positioning': ['Professional Reputation', 'Expert Positioning'],
+    'institutional_reputation': ['Professional', 'Community']
+}
+
+# Secondary preferences: weight per timeframe, and a bonus for low budget
+# and resource cost (applied as weight * (1 - level))
+TIME_PREFERENCES = {
+    'new_patients': {'Short-term': 0.3, 'Medium-term': 0.15},
+    'patient_retention': {'Long-term': 0.3, 'Medium-term': 0.15},
+    'referral_volume': {'Long-term': 0.3},
+    'premium_services': {'Medium-term': 0.3},
+    'expert_positioning': {'Long-term': 0.3},
+    'institutional_reputation': {'Medium-term': 0.3, 'Long-term': 0.15}
+}
+LOW_COST_PREFERENCES = {
+    'new_patients': 0.2,
+    'patient_retention': 0.1,
+    'referral_volume': 0.1,
+    'premium_services': 0.0,
+    'expert_positioning': 0.0,
+    'institutional_reputation': 0.1
+}
+
+REASONING = {
+    'new_patients': 'Directly attracts new patients through education and awareness building',
+    'patient_retention': 'Focuses on retaining existing patients through relationship building',
+    'referral_volume': 'Specifically designed to increase referrals from other professionals',
+    'premium_services': 'Directly promotes and develops premium service offerings',
+    'expert_positioning': 'Establishes expertise through credentials and research',
+    'institutional_reputation': 'Builds institutional credibility and community trust'
+}
+
+
+def cost_level(cost):
+    return 0.0 if cost == 'Free' else float(cost.count('$'))
+
+
+class StrategyScorer:
+    """Feature and weight matrices for one strategy catalog."""
+
+    def __init__(self, strategies=BRAND_STRATEGIES, focus_areas=MARKETING_FOCUS_AREAS):
+        self.keys = list(strategies)
+        self.strategies = [strategies[key] for key in self.keys]
+        self.focus_keys = list(focus_areas)
+        self.focus_index = {key: i for i, key in enumerate(self.focus_keys)}
+        self.key_index = {key: i for i, key in enumerate(self.keys)}
+
+        categories = list(dict.fromkeys(s['focus'] for s in self.strategies))
+        category_index = {name: i for i, name in enumerate(categories)}
+        n_cat = len(categories)
+        time_col = n_cat
+        budget_col = time_col + len(TIME_LEVELS)
+        cost_col = budget_col + 1
+        n_features = cost_col + 1
+
+        # Strategies x features
+        features = np.zeros((len(self.strategies), n_features))
+        for row, strategy in enumerate(self.strategies):
+            features[row, category_index[strategy['focus']]] = 1.0
+            if strategy['time'] in TIME_LEVELS:
+                features[row, time_col + TIME_LEVELS.index(strategy['time'])] = 1.0
+            # Stored inverted so a positive weight prefers cheaper strategies
+            budget = BUDGET_LEVELS.get(strategy['budget'], MAX_BUDGET_LEVEL)
+            features[row, budget_col] = 1.0 - budget / MAX_BUDGET_LEVEL
+            costs = [cost_level(r['cost']) for r in strategy.get('resources', [])]
+            features[row, cost_col] = 1.0 - (sum(costs) / len(costs) / MAX_COST_LEVEL if costs else 0.0)
+
+        # Focus areas x features
+        weights = np.zeros((len(self.focus_keys), n_features))
+        for row, focus in enumerate(self.focus_keys):
+            for name in FOCUS_CATEGORIES.get(focus, []):
+                if name in category_index:
+                    weights[row, category_index[name]] = FOCUS_MATCH_WEIGHT
+            for name, weight in TIME_PREFERENCES.get(focus, {}).items():
+                weights[row, time_col + TIME_LEVELS.index(name)] = weight
+            low_cost = LOW_COST_PREFERENCES.get(focus, 0.0)
+            weights[row, budget_col] = low_cost / 2
+            weights[row, cost_col] = low_cost / 2
+
+        self.features = features
+        self.weights = weights
+        # Focus areas x strategies: which strategies each focus is served by
+        self.matches = weights[:, :n_cat] @ features[:, :n_cat].T > 0
+
+    def focus_vector(self, focus):
+        """Blend weights for a focus key or a {focus key: weight} mapping; sums to 1."""
+        mix = np.zeros(len(self.focus_keys))
+        if isinstance(focus, str):
+            focus = {focus: 1.0}
+        for key, weight in focus.items():
+            if key not in self.focus_index:
+                raise KeyError(f"Unknown marketing focus: {key!r}")
+            mix[self.focus_index[key]] += weight
+        total = mix.sum()
+        return mix / total if total > 0 else mix
+
+    def score_many(self, mixes):
+        """Scores for a batch of focus mixes (n x focus areas) -> (n x strategies)."""
+        return (np.asarray(mixes) @ self.weights) @ self.features.T
+
+    def score(self, focus):
+        return self.features @ (self.focus_vector(focus) @ self.weights)
+
+    def rank(self, focus, k=6):
+        """Indices and scores of the top-k relevant strategies, best first."""
+        return self.rank_mix(self.focus_vector(focus), k)
+
+    def boost_vector(self, boosts):
+        """{strategy key: boost} -> a vector in strategy order."""
+        vector = np.zeros(len(self.keys))
+        for key, boost in boosts.items():
+            vector[self.key_index[key]] += boost
+        return vector
+
+    def rank_mix(self, mix, k=6, boost=None):
+        scores = self.features @ (mix @ self.weights)
+        if boost is not None:
+            scores = scores + boost
+        candidates = np.flatnonzero(scores >= RELEVANCE_THRESHOLD)
+        if len(candidates) > k:
+            top = np.argpartition(-scores[candidates], k - 1)[:k]
+            candidates = candidates[top]
+        # Highest score first, catalog order breaks ties
+        order = np.lexsort((candidates, -scores[candidates]))
+        candidates = candidates[order]
+        return candidates, scores[candidates]
+
+    def reasoning(self, index, mix):
+        # Explain with the heaviest-weighted focus this strategy serves
+        served = mix * self.matches[:, index]
+        if not served.any():
+            return ''
+        return REASONING.get(self.focus_keys[int(served.argmax())], '')
+
+    def recommend(self, focus, k=6, boosts=None, reasons=None):
+        """Top-k recommendations; boosts ({key: score}) are added before ranking and
+        reasons ({key: [text]}) are listed with the boosted strategies as rule_reasons."""
+        mix = self.focus_vector(focus)
+        indices, scores = self.rank_mix(mix, k, self.boost_vector(boosts) if boosts else None)
+        recommendations = []
+        for index, score in zip(indices.tolist(), scores.tolist()):
+            strategy = self.strategies[index]
+            key = self.keys[index]
+            recommendations.append({
+                'key': key,
+                'name': strategy['name'],
+                'score': round(score, 3),
+                'reasoning': self.reasoning(index, mix),
+                'rule_reasons': list((reasons or {}).get(key, ())),
+                'focus': strategy['focus'],
+                'time': strategy['time'],
+                'budget': strategy['budget'],
+                'resources': strategy['resources']
+            })
+        return recommendations
+
+
+_default_scorer = None
+
+
+def default_scorer():
+    global _default_scorer
+    if _default_scorer is None:
+        _default_scorer = StrategyScorer()
+    return _default_scorer
+
+
+def recommend(focus, k=6):
+    """Top-k brand strategies for a focus key or a blend of focus keys."""
+    return default_scorer().recommend(focus, k)
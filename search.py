@@ -0,0 +1,218 @@
+# search.py - Instant search over everything in the catalogs
+#
+# Brand strategies, their resources and tools, specialty procedures,
+# patient type services and the specialty recommendation tables (patient
+# education topics, referral sources, ...) become one list of entries,
+# merged when the same text appears in several places.
+#
+# CatalogSearch indexes entry names once per process:
+#   - postings: term -> frozenset of entry ids
+#   - a sorted vocabulary, so a prefix is a bisected range of terms; for
+#     prefixes covering more than PREFIX_CACHE_TERMS terms the union is
+#     precomputed, so no query unions more than that many sets
+#   - single-character deletions of every term, so a term within one edit
+#     (insert, delete, substitute or swap) of a query word is found by
+#     lookup instead of by scanning the vocabulary
+#
+# Every query word must match. Entries where every word matches a whole
+# term rank first, then those where words match as prefixes, then those
+# needing a typo correction; typos are only looked up when the better tiers
+# leave room in the results. Entry ids follow KINDS order and then name
+# length, so within a tier the smallest ids are the best results: large
+# sets (a one-letter prefix) keep a sorted copy that is scanned in order
+# until the results are full, instead of intersecting and sorting
+# everything. Queries take well under a millisecond with tens of thousands
+# of entries (see benchmarks/bench_search.py). No Streamlit import.
+
+import bisect
+import heapq
+import re
+from typing import NamedTuple, Tuple
+
+from catalog import BRAND_STRATEGIES, MEDICAL_SPECIALTIES, PATIENT_TYPES
+
+# Result order across kinds, and their labels
+KINDS = {
+    'strategy': 'Brand strategy',
+    'resource': 'Resource',
+    'tool': 'Tool',
+    'procedure': 'Procedure',
+    'service': 'Patient service',
+    'education': 'Patient education topic',
+    'referral': 'Referral source',
+    'network': 'Networking group',
+    'content': 'Content idea',
+    'differentiator': 'Brand differentiator',
+}
+# Specialty recommendation table fields (specialty_rules.FIELDS) by kind
+RECOMMENDATION_KINDS = {
+    'patient_education_topics': 'education',
+    'referral_sources': 'referral',
+    'networking_groups': 'network',
+    'digital_content_types': 'content',
+    'brand_differentiators': 'differentiator',
+}
+
+DEFAULT_LIMIT = 10
+PREFIX_CACHE_TERMS = 32
+SCAN_MIN_IDS = 256  # sets at least this large are kept sorted and scanned in order
+TYPO_MIN_LENGTH = 4  # shorter words have too many one-edit neighbours
+
+_TERM = re.compile(r'[a-z0-9]+')
+_EMPTY = frozenset()
+
+
+class Entry(NamedTuple):
+    kind: str
+    text: str
+    contexts: Tuple[str, ...] = ()  # where it appears, e.g. the strategy a tool belongs to
+
+
+def terms(text):
+    return _TERM.findall(text.lower())
+
+
+def _deletes(term):
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+def within_one_edit(a, b):
+    """True if a and b differ by at most one insert, delete, substitution or adjacent swap."""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) < len(b):
+        return a[i:] == b[i + 1:]
+    return a[i + 1:] == b[i + 1:] or (a[i + 2:] == b[i + 2:] and a[i:i + 2] == b[i:i + 2][::-1])
+
+
+def catalog_entries():
+    """Entries for every searchable catalog item, duplicates merged."""
+    import specialty_rules
+
+    merged = {}
+
+    def add(kind, text, context):
+        entry = merged.setdefault((kind, text.lower()), (text, []))
+        if context not in entry[1]:
+            entry[1].append(context)
+
+    for strategy in BRAND_STRATEGIES.values():
+        add('strategy', strategy.name, f"{strategy.focus} · {strategy.time}")
+        for resource in strategy.resources:
+            add('resource', resource.name, strategy.name)
+            for tool in resource.tools:
+                add('tool', tool, f"{resource.name} ({strategy.name})")
+    for specialty in MEDICAL_SPECIALTIES.values():
+        for procedure in specialty.procedures:
+            add('procedure', procedure, specialty.name)
+    for patient_type in PATIENT_TYPES.values():
+        for service in patient_type.services:
+            add('service', service, patient_type.name)
+    for key, recommendations in specialty_rules.rules.table.items():
+        for field, kind in RECOMMENDATION_KINDS.items():
+            for text in recommendations.get(field, []):
+                add(kind, text, MEDICAL_SPECIALTIES[key].name)
+    return [Entry(kind, text, tuple(contexts)) for (kind, _), (text, contexts) in merged.items()]
+
+
+class CatalogSearch:
+    """Inverted index over entry names with prefix and one-typo matching."""
+
+    def __init__(self, entries):
+        kind_order = {kind: i for i, kind in enumerate(KINDS)}
+        self.entries = sorted(entries, key=lambda e: (kind_order.get(e.kind, len(kind_order)), len(e.text), e.text))
+        postings = {}
+        for entry_id, entry in enumerate(self.entries):
+            for term in terms(entry.text):
+                postings.setdefault(term, set()).add(entry_id)
+        self.postings = {term: frozenset(ids) for term, ids in postings.items()}
+        self.vocabulary = sorted(self.postings)
+        self.ordered = {term: tuple(sorted(ids)) for term, ids in self.postings.items() if len(ids) >= SCAN_MIN_IDS}
+
+        # Union per prefix wherever the prefix covers too many terms to union per query
+        self.prefix_postings = {}
+        for term in self.vocabulary:
+            for length in range(1, len(term)):
+                prefix = term[:length]
+                if prefix in self.prefix_postings:
+                    continue
+                low, high = self._prefix_range(prefix)
+                if high - low <= PREFIX_CACHE_TERMS:
+                    break  # longer prefixes of this term cover fewer terms still
+                self.prefix_postings[prefix] = frozenset().union(*(self.postings[t] for t in self.vocabulary[low:high]))
+        self.prefix_ordered = {prefix: tuple(sorted(ids)) for prefix, ids in self.prefix_postings.items()
+                               if len(ids) >= SCAN_MIN_IDS}
+
+        self.deletions = {}
+        for term in self.vocabulary:
+            if len(term) >= TYPO_MIN_LENGTH - 1:
+                for variant in _deletes(term):
+                    self.deletions.setdefault(variant, []).append(term)
+
+    def _prefix_range(self, prefix):
+        low = bisect.bisect_left(self.vocabulary, prefix)
+        return low, bisect.bisect_left(self.vocabulary, prefix + '\x7f', low)
+
+    def prefix_ids(self, prefix):
+        """Ids of entries with a term starting with prefix (whole-term matches included)."""
+        cached = self.prefix_postings.get(prefix)
+        if cached is not None:
+            return cached
+        low, high = self._prefix_range(prefix)
+        return frozenset().union(*(self.postings[t] for t in self.vocabulary[low:high]))
+
+    def typo_ids(self, word):
+        """Ids of entries with a term within one edit of word."""
+        if len(word) < TYPO_MIN_LENGTH:
+            return _EMPTY
+        candidates = set(self.deletions.get(word, ()))
+        for variant in _deletes(word):
+            if variant in self.postings:
+                candidates.add(variant)
+            candidates.update(self.deletions.get(variant, ()))
+        return frozenset().union(*(self.postings[t] for t in candidates if within_one_edit(t, word)))
+
+    def _matches(self, word, tier):
+        """(ids, the same ids sorted or None) for a query word: tier 0 whole term, 1 prefix, 2 prefix or typo."""
+        if tier == 0:
+            return self.postings.get(word, _EMPTY), self.ordered.get(word)
+        if tier == 1 and word in self.prefix_postings:
+            return self.prefix_postings[word], self.prefix_ordered.get(word)
+        ids = self.prefix_ids(word)
+        return (ids | self.typo_ids(word) if tier == 2 else ids), None
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        """Best matching entries for a free-text query, at most limit of them."""
+        words = terms(query)
+        if not words:
+            return []
+        found = []
+        seen = set()
+        for tier in range(3):
+            # Rarest word first: scan or intersect from the smallest set
+            matches = sorted((self._matches(word, tier) for word in words), key=lambda m: len(m[0]))
+            (ids, ordered), others = matches[0], [m[0] for m in matches[1:]]
+            wanted = limit - len(found)
+            if ordered is not None:
+                new = []
+                for entry_id in ordered:
+                    if entry_id not in seen and all(entry_id in other for other in others):
+                        new.append(entry_id)
+                        if len(new) == wanted:
+                            break
+            else:
+                for other in others:
+                    ids = ids & other
+                new = heapq.nsmallest(wanted, ids - seen)
+            found.extend(new)
+            if len(found) >= limit:
+                break
+            seen.update(new)
+        return [self.entries[entry_id] for entry_id in found]
@@ -0,0 +1,170 @@
+# segment.py - The precomputed plan table as a read-only mapped file
+#
+# With several server processes behind a load balancer, each one used to
+# unpickle (or build) its own copy of the plan table and of the scenario
+# item matrix. publish() writes both once into a segment file; attach()
+# maps it read-only, so every process shares the same page-cache pages and
+# a new process starts without building anything.
+#
+# Layout: MAGIC, the length of a pickled directory, the directory, then
+# 64-byte aligned sections:
+#   plan_parts      uint32 (plans, len(engine.PLAN_OUTPUTS)): part ids per plan
+#   part_offsets    uint64 (parts + 1): where each part starts in parts
+#   parts           the distinct plan outputs, pickled once each
+#   scenario_items  bool (plans, vocabulary): scenarios.item_matrix()
+# Plans share most of their outputs, so there are a few hundred parts for
+# thousands of plans. SharedTable unpickles a part on first use and
+# assembles plan dicts on demand (the PLAN_CACHE_SIZE most recent are
+# kept); the scenario matrix is a NumPy view of the mapping, never copied.
+#
+# Files are replaced atomically, so a process that mapped an older segment
+# keeps reading it undisturbed. No Streamlit import.
+
+import contextlib
+import functools
+import mmap
+import os
+import pickle
+import struct
+import threading
+
+import numpy as np
+
+import engine
+
+MAGIC = b'MKTSEG01'
+ALIGN = 64
+PLAN_CACHE_SIZE = 1024
+
+_HEADER = struct.Struct('<8sQ')
+
+
+def _aligned(offset):
+    return -(-offset // ALIGN) * ALIGN
+
+
+def publish(path, fingerprint, table, scenario_items):
+    """Write table (a sequence of plans) and its scenario matrix to a segment at path."""
+    parts = []
+    part_ids = {}  # id(output) -> part id; plans share output objects
+    plan_parts = np.empty((len(table), len(engine.PLAN_OUTPUTS)), dtype=np.uint32)
+    for code, plan in enumerate(table):
+        for column, output in enumerate(engine.PLAN_OUTPUTS):
+            value = plan[output]
+            part_id = part_ids.get(id(value))
+            if part_id is None:
+                part_id = part_ids[id(value)] = len(parts)
+                parts.append(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+            plan_parts[code, column] = part_id
+    part_offsets = np.zeros(len(parts) + 1, dtype=np.uint64)
+    np.cumsum([len(part) for part in parts], out=part_offsets[1:])
+    arrays = {
+        'plan_parts': plan_parts,
+        'part_offsets': part_offsets,
+        'parts': np.frombuffer(b''.join(parts), dtype=np.uint8),
+        'scenario_items': np.ascontiguousarray(scenario_items, dtype=bool),
+    }
+
+    # The directory holds the section offsets, which depend on its own
+    # length: size it with placeholder offsets at least as long as the real ones
+    sections = {name: (1 << 62, array.dtype.str, array.shape) for name, array in arrays.items()}
+    directory = {'fingerprint': fingerprint, 'outputs': engine.PLAN_OUTPUTS, 'sections': sections}
+    offset = _aligned(_HEADER.size + len(pickle.dumps(directory, protocol=pickle.HIGHEST_PROTOCOL)))
+    for name, array in arrays.items():
+        sections[name] = (offset, array.dtype.str, array.shape)
+        offset = _aligned(offset + array.nbytes)
+    header = pickle.dumps(directory, protocol=pickle.HIGHEST_PROTOCOL)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(_HEADER.pack(MAGIC, len(header)))
+            f.write(header)
+            for name, array in arrays.items():
+                f.seek(sections[name][0])
+                f.write(array.tobytes())
+        os.replace(tmp_path, path)
+    finally:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp_path)
+
+
+def attach(path, fingerprint=None):
+    """A SharedTable over the segment at path, or None if missing, invalid or for another fingerprint."""
+    try:
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):  # ValueError: empty file
+        return None
+    try:
+        table = SharedTable(mapped)
+    except (ValueError, KeyError, TypeError, struct.error, pickle.UnpicklingError, EOFError):
+        return None
+    if fingerprint is not None and table.fingerprint != fingerprint:
+        return None
+    return table
+
+
+@contextlib.contextmanager
+def publish_lock(path):
+    """Serialize building and publishing the segment at path across processes (no-op without fcntl)."""
+    try:
+        import fcntl
+        lock_file = open(f"{path}.lock", 'wb')
+    except (ImportError, OSError):
+        yield
+        return
+    with lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class SharedTable:
+    """A plan table backed by a mapped segment; indexed by profile code like build_table()'s tuple."""
+
+    def __init__(self, mapped):
+        magic, length = _HEADER.unpack_from(mapped, 0)
+        if magic != MAGIC:
+            raise ValueError("not a plan segment")
+        directory = pickle.loads(mapped[_HEADER.size:_HEADER.size + length])
+        if directory['outputs'] != engine.PLAN_OUTPUTS:
+            raise ValueError("segment has other plan outputs")
+        self.fingerprint = directory['fingerprint']
+        self._map = mapped
+        arrays = {}
+        for name, (offset, dtype, shape) in directory['sections'].items():
+            count = int(np.prod(shape))
+            arrays[name] = np.frombuffer(mapped, dtype=dtype, count=count, offset=offset).reshape(shape)
+        self.plan_parts = arrays['plan_parts']
+        self.part_offsets = arrays['part_offsets']
+        self.scenario_items = arrays['scenario_items']
+        self._parts_view = memoryview(arrays['parts'])
+        self._parts = {}
+        self._parts_lock = threading.Lock()
+        self._plan = functools.lru_cache(maxsize=PLAN_CACHE_SIZE)(self._assemble)
+
+    def __len__(self):
+        return len(self.plan_parts)
+
+    def __getitem__(self, code):
+        if not 0 <= code < len(self.plan_parts):
+            raise IndexError(code)
+        return self._plan(code)
+
+    def __iter__(self):
+        return (self[code] for code in range(len(self)))
+
+    def part(self, part_id):
+        value = self._parts.get(part_id)
+        if value is None:
+            start, end = self.part_offsets[part_id:part_id + 2].tolist()
+            value = pickle.loads(self._parts_view[start:end])
+            with self._parts_lock:
+                value = self._parts.setdefault(part_id, value)
+        return value
+
+    def _assemble(self, code):
+        return dict(zip(engine.PLAN_OUTPUTS, map(self.part, self.plan_parts[code].tolist())))
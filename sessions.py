@@ -0,0 +1,318 @@
+# sessions.py - Compact wizard state, session registry and idle eviction
+#
+# Wizard answers are kept as small integers instead of lists and nested
+# dicts: catalog ordinals for single choices (0 = not selected), bitmasks
+# for multi-selects and two bits per competitive factor for ratings. One
+# WizardState is a __slots__ object of well under 200 bytes.
+#
+# States live in a process-wide SessionRegistry keyed by session id rather
+# than in st.session_state, so the registry can account for their memory
+# and evict sessions that have been idle for longer than IDLE_TIMEOUT. An
+# evicted state can be kept as a 37-byte snapshot; if the session comes
+# back it resumes where it left off.
+#
+# token() packs the same fields into a short URL-safe string (single bytes
+# for the step and choices, varints for the masks) for ?plan= links;
+# from_token() validates it, since it comes from the browser.
+#
+# No Streamlit import: the app passes in its session id and session_state.
+
+import base64
+import os
+import struct
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from catalog import (
+    EXPERIENCE_INDEX,
+    FACILITY_INDEX,
+    FACTOR_INDEX,
+    FOCUS_INDEX,
+    PATIENT_INDEX,
+    PRACTICE_INDEX,
+    SPECIALTY_INDEX,
+    STRATEGY_INDEX,
+)
+
+IDLE_TIMEOUT = float(os.environ.get('MARKETING_SESSION_IDLE', 30 * 60))  # seconds
+KEEP_SNAPSHOTS = os.environ.get('MARKETING_SESSION_SNAPSHOTS', '1') not in ('', '0')
+MAX_SNAPSHOTS = 100_000
+SWEEP_INTERVAL = 30.0  # seconds between idle sweeps
+
+RATING_BITS = 2
+RATING_MASK = (1 << RATING_BITS) - 1
+
+# step, specialty, experience, practice, focus; patients, services, ratings, strategies
+_SNAPSHOT = struct.Struct('<5B4Q')
+
+TOKEN_VERSION = 1
+STEPS = 6
+
+for _index in (PATIENT_INDEX, FACILITY_INDEX, STRATEGY_INDEX):
+    assert len(_index) <= 64, "bitmask catalogs must fit a snapshot word"
+assert len(FACTOR_INDEX) * RATING_BITS <= 64
+
+
+def _choice(slot, index):
+    # Property mapping a catalog key to ordinal + 1 in slot (0 = None)
+    def fget(self):
+        ordinal = getattr(self, slot)
+        return index.keys[ordinal - 1] if ordinal else None
+
+    def fset(self, key):
+        setattr(self, slot, 0 if key is None else index.ordinals[key] + 1)
+
+    return property(fget, fset)
+
+
+class WizardState:
+    """The wizard answers and brand plan selection of one session."""
+
+    __slots__ = ('step', '_specialty', '_experience', '_practice', '_focus',
+                 'patients', 'services', 'ratings', 'selected_strategies')
+
+    specialty = _choice('_specialty', SPECIALTY_INDEX)
+    years_experience = _choice('_experience', EXPERIENCE_INDEX)
+    practice_type = _choice('_practice', PRACTICE_INDEX)
+    marketing_focus = _choice('_focus', FOCUS_INDEX)
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.step = 1
+        self._specialty = self._experience = self._practice = self._focus = 0
+        self.patients = 0             # bitmask over PATIENT_INDEX
+        self.services = 0             # bitmask over FACILITY_INDEX
+        self.ratings = 0              # RATING_BITS per factor in FACTOR_INDEX, 0 = unrated
+        self.selected_strategies = 0  # bitmask over STRATEGY_INDEX
+
+    # Patient types
+    @property
+    def patient_types(self):
+        return tuple(PATIENT_INDEX.keys_in(self.patients))
+
+    def set_patient(self, key, selected):
+        if selected:
+            self.patients |= PATIENT_INDEX.bit(key)
+        else:
+            self.patients &= ~PATIENT_INDEX.bit(key)
+
+    # Diagnostic facilities, as display names
+    @property
+    def services_offered(self):
+        return tuple(FACILITY_INDEX.name(key) for key in FACILITY_INDEX.keys_in(self.services))
+
+    def set_services(self, keys):
+        self.services = FACILITY_INDEX.mask(keys)
+
+    # Competitive factor ratings, '1'..'3'
+    def rating(self, key):
+        value = self.ratings >> (FACTOR_INDEX.ordinals[key] * RATING_BITS) & RATING_MASK
+        return str(value) if value else None
+
+    def set_rating(self, key, rating):
+        shift = FACTOR_INDEX.ordinals[key] * RATING_BITS
+        self.ratings = self.ratings & ~(RATING_MASK << shift) | int(rating) << shift
+
+    def rating_vector(self):
+        """Per-factor ratings as ints in FACTOR_INDEX order (0 = unrated)."""
+        return unpack_ratings(self.ratings)
+
+    def rated_count(self):
+        return sum(1 for i in range(len(FACTOR_INDEX)) if self.ratings >> (i * RATING_BITS) & RATING_MASK)
+
+    def is_complete(self):
+        """Whether every wizard step has been answered, so Step 6 can be shown."""
+        return bool(self._specialty and self._experience and self._practice and self.patients
+                    and self._focus and self.rated_count() == len(FACTOR_INDEX))
+
+    @property
+    def competitive_positioning(self):
+        """(factor key, rating) pairs in catalog order."""
+        return tuple(
+            (key, rating) for key in FACTOR_INDEX.keys if (rating := self.rating(key)) is not None
+        )
+
+    # Memory and snapshots
+    def nbytes(self):
+        # Ints below 256 are shared singletons; only larger masks cost extra
+        return sys.getsizeof(self) + sum(
+            sys.getsizeof(value) for value in (self.patients, self.services, self.ratings, self.selected_strategies)
+            if value > 255
+        )
+
+    def snapshot(self):
+        return _SNAPSHOT.pack(self.step, self._specialty, self._experience, self._practice, self._focus,
+                              self.patients, self.services, self.ratings, self.selected_strategies)
+
+    @classmethod
+    def from_snapshot(cls, data):
+        state = cls.__new__(cls)
+        (state.step, state._specialty, state._experience, state._practice, state._focus,
+         state.patients, state.services, state.ratings, state.selected_strategies) = _SNAPSHOT.unpack(data)
+        return state
+
+    def token(self):
+        data = bytearray((TOKEN_VERSION, self.step, self._specialty, self._experience, self._practice, self._focus))
+        for value in (self.patients, self.services, self.ratings, self.selected_strategies):
+            while value > 0x7F:
+                data.append(value & 0x7F | 0x80)
+                value >>= 7
+            data.append(value)
+        return base64.urlsafe_b64encode(bytes(data)).rstrip(b'=').decode('ascii')
+
+    @classmethod
+    def from_token(cls, token):
+        """Decode a token(); raises ValueError if it is malformed or out of range."""
+        data = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        if len(data) < 6 or data[0] != TOKEN_VERSION:
+            raise ValueError("unsupported plan token")
+        step, specialty, experience, practice, focus = data[1:6]
+        masks = []
+        position = 6
+        for _ in range(4):
+            value = shift = 0
+            while True:
+                if position >= len(data) or shift > 63:
+                    raise ValueError("truncated plan token")
+                byte = data[position]
+                position += 1
+                value |= (byte & 0x7F) << shift
+                shift += 7
+                if not byte & 0x80:
+                    break
+            masks.append(value)
+        if position != len(data):
+            raise ValueError("trailing bytes in plan token")
+        patients, services, ratings, strategies = masks
+        if not (1 <= step <= STEPS
+                and specialty <= len(SPECIALTY_INDEX) and experience <= len(EXPERIENCE_INDEX)
+                and practice <= len(PRACTICE_INDEX) and focus <= len(FOCUS_INDEX)
+                and patients >> len(PATIENT_INDEX) == 0 and services >> len(FACILITY_INDEX) == 0
+                and ratings >> (len(FACTOR_INDEX) * RATING_BITS) == 0
+                and strategies >> len(STRATEGY_INDEX) == 0):
+            raise ValueError("plan token out of range")
+        state = cls.__new__(cls)
+        (state.step, state._specialty, state._experience, state._practice, state._focus) = \
+            step, specialty, experience, practice, focus
+        state.patients, state.services, state.ratings, state.selected_strategies = masks
+        return state
+
+
+def unpack_ratings(ratings):
+    return tuple(ratings >> (i * RATING_BITS) & RATING_MASK for i in range(len(FACTOR_INDEX)))
+
+
+def deep_sizeof(obj, seen=None):
+    """Approximate bytes held by obj and the containers and strings inside it."""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(v, seen) for v in obj)
+    elif callable(getattr(obj, 'nbytes', None)):
+        size = obj.nbytes()  # WizardState, strategy_rules.Matcher
+    return size
+
+
+class SessionRegistry:
+    """Process-wide WizardState per session, with idle eviction and snapshots."""
+
+    def __init__(self, idle_timeout=IDLE_TIMEOUT, keep_snapshots=KEEP_SNAPSHOTS, max_snapshots=MAX_SNAPSHOTS):
+        self.idle_timeout = idle_timeout
+        self.keep_snapshots = keep_snapshots
+        self.max_snapshots = max_snapshots
+        self._lock = threading.Lock()
+        self._states = {}
+        self._last_seen = {}
+        self._session_bytes = {}  # other st.session_state contents, as last reported
+        self._snapshots = OrderedDict()
+        self._last_sweep = time.monotonic()
+        self.evictions = 0
+        self.resumes = 0
+
+    def get(self, session_id):
+        """The session's state: live, resumed from a snapshot, or new."""
+        now = time.monotonic()
+        with self._lock:
+            state = self._states.get(session_id)
+            if state is None:
+                data = self._snapshots.pop(session_id, None)
+                if data is not None:
+                    state = WizardState.from_snapshot(data)
+                    self.resumes += 1
+                else:
+                    state = WizardState()
+                self._states[session_id] = state
+            self._last_seen[session_id] = now
+            if now - self._last_sweep >= SWEEP_INTERVAL:
+                self._sweep(now)
+        return state
+
+    def replace(self, session_id, state):
+        """Make state the session's live state, e.g. one restored from a token."""
+        with self._lock:
+            self._snapshots.pop(session_id, None)
+            self._states[session_id] = state
+            self._last_seen[session_id] = time.monotonic()
+
+    def record_usage(self, session_id, session_state):
+        """Account for the rest of a session's st.session_state."""
+        nbytes = deep_sizeof({key: session_state[key] for key in session_state})
+        with self._lock:
+            if session_id in self._states:
+                self._session_bytes[session_id] = nbytes
+
+    def evict_idle(self, now=None):
+        """Evict every session idle longer than idle_timeout; returns how many."""
+        with self._lock:
+            return self._sweep(time.monotonic() if now is None else now)
+
+    def _sweep(self, now):
+        cutoff = now - self.idle_timeout
+        idle = [session_id for session_id, seen in self._last_seen.items() if seen < cutoff]
+        for session_id in idle:
+            state = self._states.pop(session_id)
+            del self._last_seen[session_id]
+            self._session_bytes.pop(session_id, None)
+            if self.keep_snapshots:
+                self._snapshots[session_id] = state.snapshot()
+                while len(self._snapshots) > self.max_snapshots:
+                    self._snapshots.popitem(last=False)
+        self.evictions += len(idle)
+        self._last_sweep = now
+        return len(idle)
+
+    def drop(self, session_id):
+        with self._lock:
+            self._states.pop(session_id, None)
+            self._last_seen.pop(session_id, None)
+            self._session_bytes.pop(session_id, None)
+            self._snapshots.pop(session_id, None)
+
+    def stats(self):
+        with self._lock:
+            state_bytes = sum(state.nbytes() for state in self._states.values())
+            session_bytes = sum(self._session_bytes.values())
+            snapshot_bytes = sum(sys.getsizeof(data) for data in self._snapshots.values())
+            return {
+                'sessions': len(self._states),
+                'snapshots': len(self._snapshots),
+                'state_bytes': state_bytes,
+                'session_state_bytes': session_bytes,
+                'snapshot_bytes': snapshot_bytes,
+                'total_bytes': state_bytes + session_bytes + snapshot_bytes,
+                'evictions': self.evictions,
+                'resumes': self.resumes
+            }
+
+
+registry = SessionRegistry()
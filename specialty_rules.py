@@ -0,0 +1,141 @@
+# specialty_rules.py - Specialty recommendation table with hot reload
+#
+# The per-specialty recommendations (content ideas, networking groups,
+# education topics, differentiators, referral sources) live in
+# specialty_rules.yaml so content editors can change them without touching
+# code. The file is compiled once into a dict keyed by specialty, so a
+# lookup is a single dict access; compiling also checks that every
+# specialty in the catalog has every field, and an incomplete file fails
+# the import.
+#
+# In the app, watch() starts a daemon thread that stats the file every
+# RELOAD_INTERVAL seconds and recompiles it when its mtime changes, so
+# requests never touch the file. A reload replaces the table, then the
+# digest; caches of derived output (plans, the plan table, reports, search)
+# are keyed by the digest, so a cache is never older than its key. An
+# invalid edit leaves the previous table in place, logs a warning and sets
+# error, which the app shows until the file is fixed.
+# No Streamlit import.
+
+import hashlib
+import logging
+import os
+import sys
+import threading
+import time
+
+from catalog import MEDICAL_SPECIALTIES
+
+RULES_ENV = 'MARKETING_SPECIALTY_RULES'
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'specialty_rules.yaml')
+RELOAD_INTERVAL = 1.0
+
+logger = logging.getLogger(__name__)
+
+FIELDS = (
+    'digital_content_types',
+    'networking_groups',
+    'patient_education_topics',
+    'brand_differentiators',
+    'referral_sources',
+)
+
+
+def compile_rules(source):
+    """Parsed YAML -> {specialty: {field: [str, ...]}}. Raises ValueError if incomplete or malformed."""
+    if not isinstance(source, dict):
+        raise ValueError("Specialty rules must map specialty keys to recommendations")
+    unknown = sorted(set(source) - set(MEDICAL_SPECIALTIES))
+    missing = [key for key in MEDICAL_SPECIALTIES if key not in source]
+    if unknown:
+        raise ValueError(f"Unknown specialties in rules: {', '.join(map(str, unknown))}")
+    if missing:
+        raise ValueError(f"No rules for specialties: {', '.join(missing)}")
+    table = {}
+    for specialty in MEDICAL_SPECIALTIES:
+        entry = source[specialty]
+        if not isinstance(entry, dict) or set(entry) != set(FIELDS):
+            raise ValueError(f"Rules for {specialty} must have exactly these fields: {', '.join(FIELDS)}")
+        table[specialty] = {}
+        for field in FIELDS:
+            items = entry[field]
+            if not isinstance(items, list) or not all(isinstance(item, str) and item.strip() for item in items):
+                raise ValueError(f"{specialty}.{field} must be a list of non-empty strings")
+            table[specialty][field] = [sys.intern(item.strip()) for item in items]
+    return table
+
+
+def load_rules(path):
+    """(compiled table, SHA-256 of its contents); comments and layout do not change the digest."""
+    import yaml
+
+    with open(path, 'rb') as f:
+        source = f.read()
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    try:
+        parsed = yaml.load(source, Loader=loader)
+    except yaml.YAMLError as exc:
+        raise ValueError(f"Invalid YAML in {os.path.basename(path)}: {exc}") from None
+    table = compile_rules(parsed)
+    return table, hashlib.sha256(repr(table).encode('utf-8')).hexdigest()
+
+
+class RulesTable:
+    """The compiled rules for one file, reloaded when the file changes."""
+
+    def __init__(self, path):
+        self.path = path
+        self._stamp = self._file_stamp()
+        self.table, self.digest = load_rules(path)
+        self.error = None
+        self.reloads = 0
+        self._lock = threading.Lock()
+        self._watcher = None
+
+    def _file_stamp(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self, specialty):
+        return self.table[specialty]
+
+    def check(self):
+        """Reload if the file changed since the last check; True if a new table was published."""
+        try:
+            stamp = self._file_stamp()
+        except OSError as exc:
+            self.error = str(exc)
+            return False
+        if stamp == self._stamp:
+            return False
+        self._stamp = stamp
+        try:
+            table, digest = load_rules(self.path)
+        except (OSError, ValueError) as exc:
+            self.error = str(exc)
+            logger.warning("Keeping previous specialty rules: %s", exc)
+            return False
+        self.error = None
+        if digest == self.digest:
+            return False
+        # Table first: anyone who reads the new digest also sees the new table
+        self.table = table
+        self.digest = digest
+        self.reloads += 1
+        return True
+
+    def watch(self, interval=RELOAD_INTERVAL):
+        """Start the background reload thread (once per process)."""
+        with self._lock:
+            if self._watcher is None:
+                self._watcher = threading.Thread(target=self._watch, args=(interval,),
+                                                 name='specialty-rules-watcher', daemon=True)
+                self._watcher.start()
+
+    def _watch(self, interval):
+        while True:
+            time.sleep(interval)
+            self.check()
+
+
+rules = RulesTable(os.environ.get(RULES_ENV) or DEFAULT_RULES_PATH)
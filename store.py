@@ -0,0 +1,142 @@
+# store.py - Saved plans in a local SQLite database
+#
+# A saved plan is a short random id mapped to the wizard state token
+# (sessions.WizardState.token()), so ?saved=<id> links stay short and keep
+# working across restarts. Saving the same answers twice returns the same id.
+# The specialty and packed ratings are stored alongside so peer_ratings() can
+# compare a plan with others saved for the same specialty.
+#
+# The database (MARKETING_PLAN_DB, default plans.db) runs in WAL mode, so
+# sessions reading plans never wait for one saving a plan. Streamlit runs
+# every session on its own thread; connections are opened once and handed
+# out from a small pool instead of being reconnected per rerun. No
+# Streamlit import.
+
+import os
+import queue
+import secrets
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+DB_ENV = 'MARKETING_PLAN_DB'
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'plans.db')
+POOL_SIZE = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS plans (
+    id TEXT PRIMARY KEY,
+    token TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL DEFAULT '',
+    created REAL NOT NULL,
+    last_opened REAL,
+    opens INTEGER NOT NULL DEFAULT 0,
+    specialty TEXT,
+    ratings INTEGER NOT NULL DEFAULT 0
+)
+"""
+# Columns added after the first release, for databases created before them
+MIGRATIONS = [
+    ('specialty', 'ALTER TABLE plans ADD COLUMN specialty TEXT'),
+    ('ratings', 'ALTER TABLE plans ADD COLUMN ratings INTEGER NOT NULL DEFAULT 0'),
+]
+INDEXES = 'CREATE INDEX IF NOT EXISTS plans_specialty ON plans (specialty)'
+
+
+class PlanStore:
+    """Saved plan tokens keyed by id, over a pool of WAL-mode connections."""
+
+    def __init__(self, path=DEFAULT_DB_PATH, pool_size=POOL_SIZE):
+        self.path = path
+        self.pool_size = pool_size
+        self._pool = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+        with self.connection() as conn:
+            conn.execute(SCHEMA)
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(plans)')}
+            for column, statement in MIGRATIONS:
+                if column not in columns:
+                    conn.execute(statement)
+            conn.execute(INDEXES)
+
+    def _connect(self):
+        # Autocommit mode; check_same_thread is off because pooled
+        # connections move between session threads (one at a time)
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled connection, opening one if the pool is not full yet."""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._opened < self.pool_size
+                if create:
+                    self._opened += 1
+            if create:
+                try:
+                    conn = self._connect()
+                except sqlite3.Error:
+                    with self._lock:
+                        self._opened -= 1
+                    raise
+            else:
+                conn = self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def save(self, token, name='', specialty=None, ratings=0):
+        """Store a plan token and return its id (the existing id if already saved)."""
+        with self.connection() as conn:
+            row = conn.execute('SELECT id FROM plans WHERE token = ?', (token,)).fetchone()
+            if row is not None:
+                return row[0]
+            plan_id = secrets.token_urlsafe(6)
+            conn.execute('INSERT OR IGNORE INTO plans (id, token, name, created, specialty, ratings) '
+                         'VALUES (?, ?, ?, ?, ?, ?)', (plan_id, token, name, time.time(), specialty, ratings))
+            # A concurrent save of the same token may have won the insert
+            return conn.execute('SELECT id FROM plans WHERE token = ?', (token,)).fetchone()[0]
+
+    def load(self, plan_id):
+        """The saved token for plan_id, or None."""
+        with self.connection() as conn:
+            row = conn.execute('SELECT token FROM plans WHERE id = ?', (plan_id,)).fetchone()
+            if row is not None:
+                conn.execute('UPDATE plans SET last_opened = ?, opens = opens + 1 WHERE id = ?',
+                             (time.time(), plan_id))
+        return row[0] if row else None
+
+    def peer_ratings(self, specialty):
+        """Packed ratings of every rated plan saved for a specialty."""
+        with self.connection() as conn:
+            rows = conn.execute('SELECT ratings FROM plans WHERE specialty = ? AND ratings != 0', (specialty,))
+            return [row[0] for row in rows]
+
+    def close(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._opened = 0
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def default_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PlanStore(os.environ.get(DB_ENV) or DEFAULT_DB_PATH)
+        return _store
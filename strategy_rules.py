@@ -0,0 +1,247 @@
+# strategy_rules.py - Rules that boost brand strategies from profile facts
+#
+# strategy_rules.yaml holds rules such as "patient experience rated 1 ->
+# boost patient_relationship". A profile is turned into a set of fact atoms,
+# ('specialty', 'cardiology'), ('rating.cost', 1), one per facility and
+# patient type, and so on; each rule condition is one fact that must take
+# one of a few values, and a rule fires when all its conditions hold.
+#
+# compile_rules() indexes the conditions by atom. A Matcher keeps, per
+# condition, how many atoms satisfy it and, per rule, how many of its
+# conditions hold, so moving it to a new profile only walks the index
+# entries of the atoms that changed: rating one factor touches a handful of
+# conditions however many rules there are. The app keeps one Matcher per
+# session. Boosts of the firing rules are summed per strategy and added to
+# the scoring.py scores (see benchmarks/bench_rules.py for timings).
+# No Streamlit import; yaml and scoring are imported on first use.
+
+import functools
+import os
+import sys
+from typing import NamedTuple, Tuple
+
+from catalog import (
+    BRAND_STRATEGIES,
+    COMPETITIVE_FACTORS,
+    DIAGNOSTIC_FACILITIES,
+    FACILITY_INDEX,
+    MARKETING_FOCUS_AREAS,
+    MEDICAL_SPECIALTIES,
+    PATIENT_TYPES,
+    PRACTICE_TYPES,
+    YEARS_EXPERIENCE,
+)
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'strategy_rules.yaml')
+RATINGS = (1, 2, 3)
+
+# Fact -> the values it can take
+FACT_VALUES = {
+    'specialty': tuple(MEDICAL_SPECIALTIES),
+    'experience': tuple(YEARS_EXPERIENCE),
+    'scale': tuple(dict.fromkeys(practice['scale'] for practice in PRACTICE_TYPES.values())),
+    'focus': tuple(MARKETING_FOCUS_AREAS),
+    'facility': tuple(DIAGNOSTIC_FACILITIES),
+    'patient_type': tuple(PATIENT_TYPES),
+    **{f'rating.{key}': RATINGS for key in COMPETITIVE_FACTORS},
+}
+
+
+class Rule(NamedTuple):
+    conditions: Tuple[Tuple[str, tuple], ...]  # (fact, values any of which satisfy it)
+    boosts: Tuple[Tuple[str, float], ...]  # (brand strategy key, score added)
+    reason: str
+
+
+def facts(profile):
+    """The fact atoms of an engine.Profile, as a frozenset of (fact, value) pairs."""
+    atoms = set()
+    if profile.specialty:
+        atoms.add(('specialty', profile.specialty))
+    if profile.years_experience:
+        atoms.add(('experience', profile.years_experience))
+    if profile.practice_type in PRACTICE_TYPES:
+        atoms.add(('scale', PRACTICE_TYPES[profile.practice_type]['scale']))
+    if profile.marketing_focus:
+        atoms.add(('focus', profile.marketing_focus))
+    for facility in profile.services_offered:
+        # The wizard keeps display names; keys are accepted too
+        atoms.add(('facility', FACILITY_INDEX.key(facility, facility)))
+    for key in profile.patient_types:
+        atoms.add(('patient_type', key))
+    for key, rating in profile.competitive_positioning:
+        atoms.add((f'rating.{key}', int(rating)))
+    return frozenset(atoms)
+
+
+def compile_rules(source):
+    """Parsed YAML -> RuleSet. Raises ValueError for malformed rules or unknown facts, values or strategies."""
+    if not isinstance(source, list):
+        raise ValueError("Strategy rules must be a list of rules")
+    rules = []
+    for number, entry in enumerate(source, 1):
+        if not isinstance(entry, dict) or set(entry) != {'when', 'boost', 'reason'}:
+            raise ValueError(f"Rule {number} must have exactly these fields: when, boost, reason")
+        when, boost, reason = entry['when'], entry['boost'], entry['reason']
+        if not isinstance(when, dict) or not when:
+            raise ValueError(f"Rule {number}: when must map facts to values")
+        conditions = []
+        for fact, values in when.items():
+            if fact not in FACT_VALUES:
+                raise ValueError(f"Rule {number}: unknown fact {fact!r}")
+            values = tuple(values) if isinstance(values, list) else (values,)
+            if not values:
+                raise ValueError(f"Rule {number}: no values for {fact}")
+            for value in values:
+                if value not in FACT_VALUES[fact]:
+                    raise ValueError(f"Rule {number}: unknown {fact} {value!r}")
+            conditions.append((fact, values))
+        if not isinstance(boost, dict) or not boost:
+            raise ValueError(f"Rule {number}: boost must map brand strategies to scores")
+        for key, amount in boost.items():
+            if key not in BRAND_STRATEGIES:
+                raise ValueError(f"Rule {number}: unknown brand strategy {key!r}")
+            if isinstance(amount, bool) or not isinstance(amount, (int, float)):
+                raise ValueError(f"Rule {number}: boost for {key} must be a number")
+        if not isinstance(reason, str) or not reason.strip():
+            raise ValueError(f"Rule {number}: reason must be a non-empty string")
+        rules.append(Rule(tuple(conditions), tuple((key, float(amount)) for key, amount in boost.items()),
+                          reason.strip()))
+    return RuleSet(rules)
+
+
+def load_rules(path=DEFAULT_RULES_PATH):
+    import yaml
+
+    with open(path, 'rb') as f:
+        source = f.read()
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    try:
+        parsed = yaml.load(source, Loader=loader)
+    except yaml.YAMLError as exc:
+        raise ValueError(f"Invalid YAML in {os.path.basename(path)}: {exc}") from None
+    return compile_rules(parsed)
+
+
+class RuleSet:
+    """Compiled rules, with an index from fact atom to the conditions it satisfies."""
+
+    def __init__(self, rules):
+        self.rules = tuple(rules)
+        self.sizes = tuple(len(rule.conditions) for rule in self.rules)
+        self.condition_rules = []  # condition id -> rule id
+        index = {}
+        for rule_id, rule in enumerate(self.rules):
+            for fact, values in rule.conditions:
+                condition_id = len(self.condition_rules)
+                self.condition_rules.append(rule_id)
+                for value in values:
+                    index.setdefault((fact, value), []).append(condition_id)
+        self.index = {atom: tuple(ids) for atom, ids in index.items()}
+
+    def matcher(self):
+        return Matcher(self)
+
+    def evaluate(self, atoms):
+        """Ids of the rules that fire for atoms, checking every rule (for tests and benchmarks)."""
+        return [rule_id for rule_id, rule in enumerate(self.rules)
+                if all(any((fact, value) in atoms for value in values) for fact, values in rule.conditions)]
+
+
+class Matcher:
+    """Incrementally maintained rule matches for one changing profile."""
+
+    __slots__ = ('ruleset', 'atoms', 'hits', 'held', 'firing', 'boosts')
+
+    def __init__(self, ruleset):
+        self.ruleset = ruleset
+        self.atoms = frozenset()
+        self.hits = bytearray(len(ruleset.condition_rules))  # atoms satisfying each condition
+        self.held = bytearray(len(ruleset.rules))  # conditions holding, per rule
+        self.firing = set()
+        self.boosts = {}  # strategy key -> summed boost of the firing rules
+
+    def update(self, atoms):
+        """Move to a new set of fact atoms; True if the firing rules changed."""
+        if atoms == self.atoms:
+            return False
+        index = self.ruleset.index
+        condition_rules = self.ruleset.condition_rules
+        sizes = self.ruleset.sizes
+        hits, held = self.hits, self.held
+        touched = set()
+        for atom in self.atoms - atoms:
+            for condition_id in index.get(atom, ()):
+                hits[condition_id] -= 1
+                if not hits[condition_id]:
+                    rule_id = condition_rules[condition_id]
+                    held[rule_id] -= 1
+                    touched.add(rule_id)
+        for atom in atoms - self.atoms:
+            for condition_id in index.get(atom, ()):
+                if not hits[condition_id]:
+                    rule_id = condition_rules[condition_id]
+                    held[rule_id] += 1
+                    touched.add(rule_id)
+                hits[condition_id] += 1
+        self.atoms = atoms
+
+        rules = self.ruleset.rules
+        changed = False
+        for rule_id in touched:
+            fires = held[rule_id] == sizes[rule_id]
+            if fires == (rule_id in self.firing):
+                continue
+            changed = True
+            if fires:
+                self.firing.add(rule_id)
+            else:
+                self.firing.discard(rule_id)
+            for key, amount in rules[rule_id].boosts:
+                total = self.boosts.get(key, 0.0) + (amount if fires else -amount)
+                if abs(total) < 1e-9:
+                    self.boosts.pop(key, None)
+                else:
+                    self.boosts[key] = total
+        return changed
+
+    def nbytes(self):
+        # The rule set is shared by every session and not counted
+        return sys.getsizeof(self) + sum(sys.getsizeof(value) for value in (
+            self.atoms, self.hits, self.held, self.firing, self.boosts, *self.atoms))
+
+    def key(self):
+        """Hashable id of the firing rules, for caching what is derived from them."""
+        return tuple(sorted(self.firing))
+
+
+_default_rules = None
+
+
+def default_rules():
+    global _default_rules
+    if _default_rules is None:
+        _default_rules = load_rules()
+    return _default_rules
+
+
+def recommend(recommended, focus, matcher, k=6):
+    """(recommendations, key) for a focus: recommended as is when no rule fires, else rescored with the boosts."""
+    if not focus or not matcher.firing:
+        return recommended, ()
+    key = matcher.key()
+    return _boosted(matcher.ruleset, focus, key, k), key
+
+
+@functools.lru_cache(maxsize=1024)
+def _boosted(ruleset, focus, key, k):
+    import scoring
+
+    rules = [ruleset.rules[rule_id] for rule_id in key]
+    boosts = {}
+    reasons = {}
+    for rule in rules:
+        for strategy_key, amount in rule.boosts:
+            boosts[strategy_key] = boosts.get(strategy_key, 0.0) + amount
+            reasons.setdefault(strategy_key, []).append(rule.reason)
+    return scoring.default_scorer().recommend(focus, k, boosts=boosts, reasons=reasons)
@@ -0,0 +1,144 @@
+# views.py - Precompiled HTML sections for Step 6 and the Brand Building results
+#
+# Those pages used to emit every heading, bullet and column with its own
+# st.markdown call, each a separate delta message to the browser. Here each
+# section is rendered from a Jinja2 macro in templates/sections.html into a
+# single HTML payload that the app sends with one st.markdown call; only
+# tabs, expanders and buttons stay Streamlit elements.
+#
+# The template is compiled once at import. Rendered sections are cached by
+# plan (precompute.profile_code), and Brand Building results also by the
+# strategy rules that fired, so rerunning or revisiting the same plan, from
+# any session, does not render again. No Streamlit import.
+
+import functools
+import os
+import threading
+from collections import OrderedDict
+
+import jinja2
+
+import engine
+import precompute
+import scoring
+from catalog import MARKETING_FOCUS_AREAS, MEDICAL_SPECIALTIES, PRACTICE_TYPES, STRATEGY_INDEX
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+CACHE_SIZE = 512  # plans kept per page
+
+_env = jinja2.Environment(
+    loader=jinja2.FileSystemLoader(TEMPLATE_DIR),
+    autoescape=True,
+    auto_reload=False,
+    trim_blocks=True,
+    lstrip_blocks=True
+)
+# Compiled once; each macro returns Markup
+_sections = _env.get_template('sections.html').module
+
+
+class _LRU:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+
+    def get(self, key, build):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+        value = build()
+        with self._lock:
+            self._items[key] = value
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        return value
+
+
+_step_6_cache = _LRU(CACHE_SIZE)
+_brand_cache = _LRU(CACHE_SIZE)
+
+
+def step_6(code, plan):
+    """Step 6 sections for the plan with this profile code.
+
+    A dict of HTML strings: summary, experience and practice (empty when
+    the plan has none), tabs (one per engine.STRATEGY_TABS entry), timeline
+    and actions.
+    """
+    # Also keyed by the plan object, which a specialty rules reload replaces;
+    # the entry holds the plan so its id is not reused while cached
+    return _step_6_cache.get((code, id(plan)), lambda: (plan, _render_step_6(code, plan)))[1]
+
+
+def _render_step_6(code, plan):
+    profile = precompute.decode_profile(code)
+    metrics = [
+        ('Specialty', MEDICAL_SPECIALTIES.get(profile.specialty, {}).get('name', 'Not Selected')),
+        ('Experience', profile.years_experience or 'Not Selected'),
+        ('Practice Type', PRACTICE_TYPES.get(profile.practice_type, {}).get('name', 'Not Selected')),
+        ('Marketing Budget', plan['budget'])
+    ]
+    return {
+        'summary': str(_sections.profile_summary(metrics)),
+        'experience': str(_sections.experience_plan(plan['experience'])) if plan['experience'] else '',
+        'practice': str(_sections.practice_plan(plan['practice'])) if plan['practice'] else '',
+        'tabs': [
+            str(_sections.strategy_tab(heading, plan['strategy'].get(dimension, [])))
+            for _, dimension, heading in engine.STRATEGY_TABS
+        ],
+        'timeline': str(_sections.timeline('warning', '🚀 12-Month Implementation Plan',
+                                           engine.IMPLEMENTATION_TIMELINE)),
+        'actions': str(_sections.timeline('info', '✅ Immediate Action Items (Next 30 Days)',
+                                          engine.IMMEDIATE_ACTIONS))
+    }
+
+
+def brand_results(code, plan, recommendations=None, rules_key=()):
+    """Brand Building sections for the plan with this profile code.
+
+    A dict with the insights HTML and, per recommendation key, the card
+    details and a list of resource HTML strings. recommendations replace
+    plan['recommended'] when strategy rules fire; rules_key
+    (strategy_rules.Matcher.key()) identifies them.
+    """
+    return _brand_cache.get((code, rules_key), lambda: _render_brand_results(
+        code, plan, plan['recommended'] if recommendations is None else recommendations))
+
+
+def _render_brand_results(code, plan, recommendations):
+    focus_key = precompute.decode_profile(code).marketing_focus
+    return {
+        'insights': str(_sections.brand_insights(plan['experience'], MARKETING_FOCUS_AREAS[focus_key]))
+        if focus_key else '',
+        'cards': {
+            rec['key']: str(_sections.strategy_card(rec, rec['score'] >= scoring.HIGH_PRIORITY_SCORE))
+            for rec in recommendations
+        },
+        'resources': {
+            rec['key']: [str(_sections.strategy_resource(resource, i == 0))
+                         for i, resource in enumerate(rec['resources'])]
+            for rec in recommendations
+        }
+    }
+
+
+@functools.lru_cache(maxsize=256)
+def positioning_priorities(ruleset, rules_key):
+    """The reasons of the firing strategy rules, with the strategies each boosts."""
+    rules = [ruleset.rules[rule_id] for rule_id in rules_key]
+    return str(_sections.positioning_priorities([
+        (rule.reason, [STRATEGY_INDEX.name(key) for key, _ in rule.boosts]) for rule in rules
+    ]))
+
+
+@functools.lru_cache(maxsize=256)
+def phase_strategies(mask):
+    """✓ list of the strategies in a selection bitmask."""
+    return str(_sections.phase_strategies([STRATEGY_INDEX.name(key) for key in STRATEGY_INDEX.keys_in(mask)]))
+
+
+@functools.lru_cache(maxsize=1)
+def budget_guide():
+    return str(_sections.timeline('info', '💰 Budget Planning Guide', engine.BUDGET_GUIDE))